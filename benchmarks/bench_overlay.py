@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Temas superpuestos frente a copias completas: listado, carga, compilación y disco
+
+Uso: python3 benchmarks/bench_overlay.py [número de temas]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from theme_catalog import ThemeCatalog
+from theme_compiler import compile_theme
+from overlay import OVERLAY_NAME, load_theme, create_overlay
+
+MODULES_PER_THEME = 200
+
+def create_system_themes(root, count):
+    for i in range(count):
+        theme_dir = os.path.join(root, f"theme-{i:04d}")
+        os.makedirs(theme_dir)
+        with open(os.path.join(theme_dir, "config"), 'w') as f:
+            f.write("include-file = colors.ini\ninclude-file = modules.ini\n\n"
+                    "[bar/main]\nwidth = 100%\nbackground = ${colors.background}\n"
+                    "modules-left = " + " ".join(f"m{n}" for n in range(10)) + "\n")
+        with open(os.path.join(theme_dir, "colors.ini"), 'w') as f:
+            f.write("[colors]\nbackground = #222\nforeground = #ddd\nalert = #f00\n")
+        with open(os.path.join(theme_dir, "modules.ini"), 'w') as f:
+            for n in range(MODULES_PER_THEME):
+                f.write(f"; módulo {n}\n[module/m{n}]\ntype = custom/script\n"
+                        f"exec = echo {n}\ninterval = 5\nlabel = %output%\n\n")
+        with open(os.path.join(theme_dir, "README.md"), 'w') as f:
+            f.write(f"# theme-{i:04d}\n\nTema sintético {i}.\n")
+
+def create_copies(system_root, root):
+    for name in os.listdir(system_root):
+        shutil.copytree(os.path.join(system_root, name), os.path.join(root, name))
+        with open(os.path.join(root, name, "colors.ini"), 'w') as f:
+            f.write("[colors]\nbackground = #000\nforeground = #ddd\nalert = #f00\n")
+
+def create_overlays(system_root, root):
+    for name in os.listdir(system_root):
+        theme_dir = os.path.join(root, name)
+        create_overlay(os.path.join(system_root, name), theme_dir)
+        with open(os.path.join(theme_dir, OVERLAY_NAME), 'r') as f:
+            overlay = json.load(f)
+        overlay["sections"] = {"colors": {"background": "#000"}}
+        with open(os.path.join(theme_dir, OVERLAY_NAME), 'w') as f:
+            json.dump(overlay, f)
+
+def disk_usage(root):
+    total = 0
+    for directory, _, files in os.walk(root):
+        for file_name in files:
+            total += os.stat(os.path.join(directory, file_name)).st_blocks * 512
+    return total
+
+def timed(function, root):
+    start = time.perf_counter()
+    for name in sorted(os.listdir(root)):
+        function(os.path.join(root, name))
+    return time.perf_counter() - start
+
+def measure(label, root, tmp):
+    index_path = os.path.join(tmp, f"{label}-index.json")
+    cache_dir = os.path.join(tmp, f"{label}-compiled")
+    results = {}
+    for run in ("frío", "caliente"):
+        start = time.perf_counter()
+        ThemeCatalog([(root, "user")], index_path=index_path).load()
+        results[f"listado en {run}"] = time.perf_counter() - start
+    for run in ("frío", "caliente"):
+        results[f"carga en {run}"] = timed(load_theme, root)
+    for run in ("frío", "caliente"):
+        results[f"compilación en {run}"] = timed(lambda path: compile_theme(path, cache_dir), root)
+
+    for name, elapsed in results.items():
+        print(f"{label}: {name}: {elapsed * 1000:.1f} ms")
+    print(f"{label}: disco: {disk_usage(root) / 1024:.0f} KiB")
+    return results
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        system_root = os.path.join(tmp, "system")
+        create_system_themes(system_root, count)
+        copies_root = os.path.join(tmp, "copies")
+        create_copies(system_root, copies_root)
+        overlays_root = os.path.join(tmp, "overlays")
+        create_overlays(system_root, overlays_root)
+
+        print(f"{count} temas de {MODULES_PER_THEME} módulos")
+        copies = measure("copias", copies_root, tmp)
+        overlays = measure("superpuestos", overlays_root, tmp)
+
+        slower = [name for name in copies if overlays[name] > copies[name] * 1.2]
+        if slower:
+            print(f"Más lento con temas superpuestos: {', '.join(slower)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
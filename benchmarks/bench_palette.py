@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Cambio de paleta en muchos temas: índice de colores en frío y en caché, y archivos escritos
+
+Uso: python3 benchmarks/bench_palette.py [número de temas]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from palette import PaletteIndex, apply_palette
+
+THEMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "themes")
+PALETTE = {"background": "#1e1e2e", "foreground": "#cdd6f4", "#EC7875": "#f38ba8", "#222": "#181825"}
+
+def create_themes(root, count):
+    sources = sorted(os.listdir(THEMES_DIR))
+    for i in range(count):
+        source = sources[i % len(sources)]
+        shutil.copytree(os.path.join(THEMES_DIR, source), os.path.join(root, f"{source}-{i:04d}"))
+
+def mtimes(root):
+    return {os.path.join(directory, name): os.stat(os.path.join(directory, name)).st_mtime_ns
+            for directory, _, files in os.walk(root) for name in files}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "themes")
+        create_themes(root, count)
+        themes = [os.path.join(root, name) for name in sorted(os.listdir(root))]
+        index_path = os.path.join(tmp, "index.json")
+
+        start = time.perf_counter()
+        index = PaletteIndex(index_path)
+        uses = sum(len(index.uses(path)) for path in themes)
+        index.save()
+        print(f"{count} temas, {uses} colores: índice en frío {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        index = PaletteIndex(index_path)
+        for path in themes:
+            index.uses(path)
+        print(f"índice en caché: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        before = mtimes(root)
+        start = time.perf_counter()
+        results = apply_palette(themes, PALETTE, PaletteIndex(index_path))
+        elapsed = time.perf_counter() - start
+        written = sum(1 for path, mtime in mtimes(root).items() if before.get(path) != mtime)
+        print(f"paleta aplicada: {elapsed * 1000:.1f} ms, {sum(r['recolored'] for r in results)} valores, "
+              f"{written} archivos escritos de {len(before)}")
+
+        before = mtimes(root)
+        start = time.perf_counter()
+        apply_palette(themes, PALETTE, PaletteIndex(index_path))
+        elapsed = time.perf_counter() - start
+        written = sum(1 for path, mtime in mtimes(root).items() if before.get(path) != mtime)
+        print(f"misma paleta otra vez: {elapsed * 1000:.1f} ms, {written} archivos escritos")
+        if written:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
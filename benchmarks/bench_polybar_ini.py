@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compara polybar_ini con configparser sobre los temas incluidos
+
+Uso: python3 benchmarks/bench_polybar_ini.py [repeticiones]
+"""
+
+import os
+import sys
+import time
+import configparser
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import polybar_ini
+
+THEMES_DIR = os.path.join(SRC_DIR, "themes")
+
+def theme_files(theme_path):
+    """Archivos que el tema incluye y que existen en el propio directorio"""
+    config = polybar_ini.load_theme_config(theme_path)
+    polybar_ini.clear_cache()
+    return list(config.files)
+
+def bench_configparser(files):
+    # configparser no entiende include-file: se le pasan los archivos ya resueltos
+    parser = configparser.ConfigParser(interpolation=None, strict=False,
+                                       comment_prefixes=(";", "#"), inline_comment_prefixes=None)
+    parser.read(files)
+    return parser
+
+def measure(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    print(f"{'tema':<10} {'configparser':>14} {'polybar_ini frío':>18} {'polybar_ini caché':>19}")
+    for theme in sorted(os.listdir(THEMES_DIR)):
+        theme_path = os.path.join(THEMES_DIR, theme)
+        files = theme_files(theme_path)
+
+        reference = measure(lambda: bench_configparser(files), repeat)
+
+        def cold():
+            polybar_ini.clear_cache()
+            polybar_ini.load_theme_config(theme_path)
+
+        cold_ms = measure(cold, repeat)
+        polybar_ini.load_theme_config(theme_path)
+        warm_ms = measure(lambda: polybar_ini.load_theme_config(theme_path), repeat)
+
+        print(f"{theme:<10} {reference:>11.3f} ms {cold_ms:>15.3f} ms {warm_ms:>16.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Tiempo hasta la ventana del selector de paneles (regresión de arranque)
+
+Lanza panel_selector.py --profile-startup sin pantalla varias veces y falla si la
+mediana del tiempo hasta el primer pintado supera el presupuesto.
+
+Uso: python3 benchmarks/bench_startup.py [presupuesto en ms] [repeticiones]
+"""
+
+import os
+import re
+import sys
+import time
+import statistics
+import subprocess
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "panel_selector.py")
+DEFAULT_BUDGET_MS = 1500
+DEFAULT_RUNS = 5
+
+TRACE_RE = re.compile(r"^startup time:\s+(\d+) \|\s+(\d+) \| (.+)$")
+IMPORT_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def run_once():
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, SCRIPT, "--profile-startup"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=60)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"panel_selector.py terminó con código {result.returncode}:\n{result.stderr}")
+
+    phases = {}
+    imports = []
+    for line in result.stderr.splitlines():
+        match = TRACE_RE.match(line)
+        if match:
+            phases[match.group(3)] = int(match.group(2)) / 1000
+            continue
+        match = IMPORT_RE.match(line)
+        # Solo las importaciones de primer nivel
+        if match and not match.group(3):
+            imports.append((int(match.group(2)) / 1000, match.group(4)))
+
+    if "primer pintado" not in phases:
+        raise RuntimeError("La traza no incluye el primer pintado:\n" + result.stderr)
+    return wall_ms, phases, sorted(imports, reverse=True)
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RUNS
+
+    # Una ejecución previa para calentar la caché de disco y los .pyc
+    run_once()
+    results = [run_once() for _ in range(runs)]
+
+    wall = statistics.median(wall_ms for wall_ms, _, _ in results)
+    _, phases, imports = results[-1]
+    for phase, cumulative in phases.items():
+        print(f"{phase:<20} {cumulative:8.1f} ms")
+    print("Importaciones más lentas:")
+    for cumulative, name in imports[:5]:
+        print(f"  {name:<30} {cumulative:8.1f} ms")
+    print(f"Tiempo hasta la ventana (mediana de {runs}, proceso completo): {wall:.1f} ms, "
+          f"presupuesto: {budget_ms:.0f} ms")
+
+    if wall > budget_ms:
+        print("Presupuesto superado", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tiempo hasta el primer pintado de la lista de temas con 10 000 temas sintéticos
+
+Uso: python3 benchmarks/bench_theme_list.py [número de temas]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QListView
+from PyQt5.QtCore import QObject, QEvent
+
+from theme_catalog import ThemeCatalog
+from thumbnails import ThumbnailCache, ICON_SIZE
+from theme_model import ThemeListModel
+
+def create_themes(root, count):
+    for i in range(count):
+        theme_dir = os.path.join(root, f"theme-{i:05d}")
+        os.makedirs(theme_dir)
+        with open(os.path.join(theme_dir, "config"), 'w') as f:
+            f.write("[bar/main]\nmodules-left = date\n")
+        with open(os.path.join(theme_dir, "README.md"), 'w') as f:
+            f.write(f"# theme-{i:05d}\n\nTema sintético {i}.\n")
+
+class FirstPaint(QObject):
+    def __init__(self):
+        super().__init__()
+        self.painted_at = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+        return False
+
+def time_to_first_paint(app, root, index_path):
+    start = time.perf_counter()
+    catalog = ThemeCatalog([(root, "user")], index_path=index_path)
+    thumbnails = ThumbnailCache()
+    model = ThemeListModel(thumbnails)
+    view = QListView()
+    view.setModel(model)
+    view.setIconSize(ICON_SIZE)
+    view.setUniformItemSizes(True)
+
+    first_paint = FirstPaint()
+    view.viewport().installEventFilter(first_paint)
+
+    model.set_themes(catalog.load())
+    view.resize(300, 600)
+    view.show()
+    while first_paint.painted_at is None:
+        app.processEvents()
+
+    elapsed = first_paint.painted_at - start
+    rows = model.rowCount()
+    view.close()
+    return elapsed, rows
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "themes")
+        index_path = os.path.join(tmp, "theme_index.json")
+        create_themes(root, count)
+
+        cold, rows = time_to_first_paint(app, root, index_path)
+        print(f"{count} temas, en frío (sin índice): {cold * 1000:.1f} ms, filas cargadas: {rows}")
+
+        warm, rows = time_to_first_paint(app, root, index_path)
+        print(f"{count} temas, en caliente (con índice): {warm * 1000:.1f} ms, filas cargadas: {rows}")
+
+if __name__ == "__main__":
+    main()
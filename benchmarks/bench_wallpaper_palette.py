@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Paleta del fondo de pantalla: lectura reducida, agrupación de colores y caché por hash
+
+Uso: python3 benchmarks/bench_wallpaper_palette.py [imagen]
+(sin imagen se genera un fondo de 3840x2160; hace falta python-pillow)
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from wallpaper_palette import sample_pixels, quantize, _median_cut, build_palette, wallpaper_palette, CLUSTERS
+
+RUNS = 5
+
+def create_wallpaper(path):
+    from PIL import Image
+    image = Image.new("RGB", (3840, 2160))
+    image.paste((30, 40, 90), (0, 0, 2500, 2160))
+    image.paste((200, 130, 30), (2500, 0, 3840, 1200))
+    image.paste((120, 30, 40), (2500, 1200, 3840, 2160))
+    image.save(path, quality=90)
+
+def best(function, *args):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times) * 1000
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tmp, "fondo.jpg")
+        if len(sys.argv) <= 1:
+            create_wallpaper(path)
+
+        data, elapsed = best(sample_pixels, path)
+        print(f"lectura reducida: {elapsed:.1f} ms, {len(data) // 3} píxeles")
+        (colors, method), elapsed = best(quantize, data)
+        print(f"{method}: {elapsed:.1f} ms")
+        _, elapsed = best(_median_cut, data, CLUSTERS)
+        print(f"median-cut (Python puro): {elapsed:.1f} ms")
+        print(build_palette(colors))
+
+        start = time.perf_counter()
+        wallpaper_palette(path, cache_dir=tmp)
+        cold = (time.perf_counter() - start) * 1000
+        result, cached = best(wallpaper_palette, path, tmp)
+        print(f"paleta completa: {cold:.1f} ms sin caché, {cached:.1f} ms en caché")
+        if not result["cached"] or cold > 100:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import hashlib
+import zipfile
+
+from fileutil import write_atomic
+
+# Retención predeterminada de instantáneas sueltas
+KEEP_COUNT = 20
+KEEP_DAYS = 30
+# Máximo de instantáneas guardadas en el archivo comprimido
+MAX_ARCHIVED = 500
+
+class BackupStore:
+    """Almacén de copias de seguridad direccionado por contenido.
+
+    Cada versión distinta de un archivo se guarda una sola vez en objects/<sha256>.
+    index.json lista las instantáneas (de la más antigua a la más reciente); las que
+    superan la retención se empaquetan en archive.zip y sus objetos se eliminan.
+    """
+
+    def __init__(self, directory, keep_count=KEEP_COUNT, keep_days=KEEP_DAYS, max_archived=MAX_ARCHIVED):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.index_path = os.path.join(directory, "index.json")
+        self.archive_path = os.path.join(directory, "archive.zip")
+        self.keep_count = keep_count
+        self.keep_days = keep_days
+        self.max_archived = max_archived
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)["snapshots"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _save(self, snapshots):
+        write_atomic(self.index_path, json.dumps({"snapshots": snapshots}, indent=1))
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest)
+
+    def snapshots(self):
+        """Instantáneas sueltas: lista de {"hash", "time"} de la más antigua a la más reciente"""
+        return self._load()
+
+    def _add(self, snapshots, data, timestamp):
+        if isinstance(data, str):
+            data = data.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        if snapshots and snapshots[-1]["hash"] == digest:
+            return digest
+
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            write_atomic(object_path, data, mode=0o600)
+
+        snapshots.append({"hash": digest, "time": time.time() if timestamp is None else timestamp})
+        return digest
+
+    def save(self, data, timestamp=None):
+        """Guarda una instantánea; devuelve su hash. No duplica la última si no cambió"""
+        snapshots = self._load()
+        digest = self._add(snapshots, data, timestamp)
+        snapshots.sort(key=lambda snapshot: snapshot["time"])
+        self._save(self._prune(snapshots))
+        return digest
+
+    def read(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return f.read()
+
+    def _prune(self, snapshots):
+        """Empaqueta en el archivo las instantáneas fuera de la retención"""
+        cutoff = time.time() - self.keep_days * 86400
+        keep_from = max(0, len(snapshots) - self.keep_count)
+        expired = [snapshot for i, snapshot in enumerate(snapshots)
+                   if i < keep_from or snapshot["time"] < cutoff]
+        # La más reciente se conserva siempre
+        if expired and expired[-1] is snapshots[-1]:
+            expired.pop()
+        if not expired:
+            return snapshots
+
+        # Sin archivo (disco lleno, zip dañado) no se borra nada: se reintenta en la próxima copia
+        if not self._archive(expired):
+            return snapshots
+        kept = [snapshot for snapshot in snapshots if snapshot not in expired]
+
+        referenced = {snapshot["hash"] for snapshot in kept}
+        for snapshot in expired:
+            if snapshot["hash"] not in referenced:
+                try:
+                    os.unlink(self._object_path(snapshot["hash"]))
+                except OSError:
+                    pass
+        return kept
+
+    def _archive(self, snapshots):
+        """Añade las instantáneas al archivo; devuelve False si no se pudo escribir"""
+        names = {}
+        for snapshot in snapshots:
+            stamp = time.strftime("%Y%m%d%H%M%S", time.localtime(snapshot["time"]))
+            names[f"{stamp}-{snapshot['hash'][:12]}"] = snapshot["hash"]
+
+        try:
+            with zipfile.ZipFile(self.archive_path, 'a', zipfile.ZIP_DEFLATED) as archive:
+                existing = set(archive.namelist())
+                for name, digest in names.items():
+                    if name not in existing:
+                        try:
+                            data = self.read(digest)
+                        except FileNotFoundError:
+                            # Objeto ya perdido: no hay nada que guardar
+                            continue
+                        archive.writestr(name, data)
+                total = len(existing | set(names))
+        except (OSError, zipfile.BadZipFile):
+            return False
+
+        if total > self.max_archived:
+            self._trim_archive()
+        return True
+
+    def _trim_archive(self):
+        """Reescribe el archivo conservando solo las instantáneas más recientes"""
+        tmp_path = f"{self.archive_path}.{os.getpid()}.tmp"
+        try:
+            with zipfile.ZipFile(self.archive_path, 'r') as source:
+                names = sorted(source.namelist())[-self.max_archived:]
+                with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as target:
+                    for name in names:
+                        target.writestr(name, source.read(name))
+            os.replace(tmp_path, self.archive_path)
+        except (OSError, zipfile.BadZipFile):
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def restore_previous(self, target_path):
+        """Restaura la instantánea más reciente distinta del contenido actual.
+
+        El contenido actual se guarda antes, de modo que la restauración también se
+        puede deshacer. Devuelve el hash restaurado o None si no hay nada que restaurar.
+        """
+        try:
+            with open(target_path, 'rb') as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+
+        current_digest = hashlib.sha256(current).hexdigest() if current is not None else None
+        for snapshot in reversed(self._load()):
+            if snapshot["hash"] == current_digest:
+                continue
+            data = self.read(snapshot["hash"])
+            if current is not None:
+                self.save(current)
+            write_atomic(target_path, data)
+            return snapshot["hash"]
+        return None
+
+    def migrate_legacy(self, target_path):
+        """Importa las copias <archivo>.bak.* antiguas al almacén y las elimina"""
+        directory = os.path.dirname(target_path)
+        pattern = re.compile(re.escape(os.path.basename(target_path)) + r"\.bak\.[\w.]+$")
+        try:
+            names = [name for name in os.listdir(directory) if pattern.match(name)]
+        except OSError:
+            return 0
+
+        legacy = []
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    legacy.append((os.path.getmtime(path), path, f.read()))
+            except OSError:
+                continue
+
+        if not legacy:
+            return 0
+
+        snapshots = self._load()
+        for mtime, path, data in sorted(legacy):
+            self._add(snapshots, data, mtime)
+        snapshots.sort(key=lambda snapshot: snapshot["time"])
+        self._save(self._prune(snapshots))
+
+        for _, path, _ in legacy:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        return len(legacy)
@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import glob
+import time
+import shutil
+import subprocess
+from collections import namedtuple
+
+from paths import CONFIG_DIR
+from fileutil import write_atomic
+from generations import ACTIVE_CONFIG
+from process_supervisor import get_supervisor
+import polybar_ipc
+
+# Una barra por monitor. Cada monitor tiene un archivo monitors/<monitor>.ini que
+# incluye la configuración activa y define bar/main-<monitor> heredando de bar/main
+# con 'monitor' fijado (más los cambios de monitors.json para ese monitor).
+# Las barras en ejecución se reconocen por su línea de órdenes, así que la interfaz,
+# la línea de órdenes y el vigilante de monitores ven las mismas.
+MONITOR_CONFIG_DIR = os.path.join(CONFIG_DIR, "monitors")
+MONITOR_OVERRIDES = os.path.join(CONFIG_DIR, "monitors.json")
+BAR_NAME = "main"
+READY_TIMEOUT = 3.0
+READY_POLL_INTERVAL = 0.02
+# Estado de los conectores en el kernel: leerlo no lanza ningún proceso
+DRM_STATUS_GLOB = "/sys/class/drm/card*-*/status"
+WATCH_INTERVAL = 2.0
+# Sin /sys/class/drm hay que volver a enumerar con polybar o xrandr: con menos frecuencia
+WATCH_FALLBACK_INTERVAL = 10.0
+
+Monitor = namedtuple("Monitor", ("name", "width", "height", "x", "y", "primary"))
+
+# Estados de una barra recién lanzada
+BAR_READY = "ready"        # su socket IPC ya existe
+BAR_RUNNING = "running"    # sigue en marcha, pero no se pudo confirmar que esté lista
+BAR_FAILED = "failed"      # terminó durante el arranque
+
+class MonitorSource:
+    """Origen de la lista de monitores; las pruebas pueden sustituirlo por StaticMonitorSource"""
+
+    def monitors(self):
+        raise NotImplementedError
+
+class CommandMonitorSource(MonitorSource):
+    """Monitores leídos de la salida de una orden externa"""
+
+    command = ()
+    pattern = None
+
+    def monitors(self):
+        try:
+            output = subprocess.run(self.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    timeout=5).stdout.decode(errors="replace")
+        except (OSError, subprocess.SubprocessError):
+            return []
+        monitors = []
+        for line in output.splitlines():
+            match = self.pattern.match(line)
+            if match:
+                monitors.append(Monitor(match["name"], int(match["width"]), int(match["height"]),
+                                        int(match["x"]), int(match["y"]), bool(match["primary"])))
+        return monitors
+
+class PolybarMonitorSource(CommandMonitorSource):
+    # HDMI-1: 1920x1080+0+0 (primary)
+    command = ("polybar", "--list-monitors")
+    pattern = re.compile(r"^(?P<name>\S+): (?P<width>\d+)x(?P<height>\d+)\+(?P<x>-?\d+)\+(?P<y>-?\d+)"
+                         r"(?P<primary> \(primary\))?")
+
+class XrandrMonitorSource(CommandMonitorSource):
+    # HDMI-1 connected primary 1920x1080+0+0 (normal left inverted...) 527mm x 296mm
+    command = ("xrandr", "--query")
+    pattern = re.compile(r"^(?P<name>\S+) connected(?P<primary> primary)? "
+                         r"(?P<width>\d+)x(?P<height>\d+)\+(?P<x>-?\d+)\+(?P<y>-?\d+)")
+
+class StaticMonitorSource(MonitorSource):
+    """Lista fija de monitores, para pruebas o equipos sin X"""
+
+    def __init__(self, monitors):
+        self._monitors = list(monitors)
+
+    def monitors(self):
+        return list(self._monitors)
+
+def default_monitor_source():
+    return PolybarMonitorSource() if shutil.which("polybar") else XrandrMonitorSource()
+
+def monitor_key(monitor_name):
+    """Nombre del monitor apto para nombres de archivo y de barra"""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", monitor_name)
+
+def drm_connector_state(pattern=DRM_STATUS_GLOB):
+    """Estado de los conectores de vídeo ((ruta, estado), ...), o None si el sistema no lo expone"""
+    state = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, 'r') as f:
+                state.append((path, f.read().strip()))
+        except OSError:
+            continue
+    return tuple(state) or None
+
+class BarOrchestrator:
+    def __init__(self, supervisor=None, source=None, config_path=ACTIVE_CONFIG,
+                 config_dir=MONITOR_CONFIG_DIR, overrides_path=MONITOR_OVERRIDES, ipc_dirs=None):
+        self.supervisor = supervisor or get_supervisor()
+        self.source = source or default_monitor_source()
+        self.config_path = config_path
+        self.config_dir = config_dir
+        self.overrides_path = overrides_path
+        self.ipc_dirs = ipc_dirs
+        self.last_reports = []
+        # Barra sin monitor lanzada por sync() mientras no se podían enumerar
+        self.fallback_pid = None
+
+    def _overrides(self):
+        try:
+            with open(self.overrides_path, 'r') as f:
+                overrides = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return overrides if isinstance(overrides, dict) else {}
+
+    def monitor_config(self, monitor, overrides=None):
+        """Escribe (si cambió) la configuración de la barra de un monitor; devuelve su ruta"""
+        overrides = self._overrides() if overrides is None else overrides
+        lines = [
+            f"; Generado por mabox-panel-selector para el monitor {monitor.name}",
+            f"include-file = {os.path.abspath(self.config_path)}",
+            "",
+            f"[bar/{BAR_NAME}-{monitor_key(monitor.name)}]",
+            f"inherit = bar/{BAR_NAME}",
+            f"monitor = {monitor.name}",
+            # El socket IPC indica que la barra está lista y permite recargarla sin reiniciarla
+            "enable-ipc = true",
+        ]
+        for key, value in (overrides.get(monitor.name) or {}).items():
+            # true/false de JSON como los escribe polybar, no como True/False de Python
+            lines.append(f"{key} = {str(value).lower() if isinstance(value, bool) else value}")
+        text = "\n".join(lines) + "\n"
+
+        path = os.path.join(self.config_dir, f"{monitor_key(monitor.name)}.ini")
+        try:
+            with open(path, 'r') as f:
+                unchanged = f.read() == text
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            write_atomic(path, text)
+        return path
+
+    def _bar_monitor(self, pid):
+        """Monitor de una barra lanzada por el orquestador, o None si no es una de ellas"""
+        try:
+            with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                args = f.read().decode(errors="replace").split("\0")
+        except OSError:
+            return None
+        prefix = os.path.join(self.config_dir, "")
+        for arg in args:
+            if arg.startswith(prefix) and arg.endswith(".ini"):
+                return os.path.basename(arg)[:-len(".ini")]
+        return None
+
+    def running_bars(self):
+        """Barras en ejecución: ({monitor: pid} de las propias, [pid] de las demás)"""
+        bars, unmanaged = {}, []
+        for pid in self.supervisor.running_pids():
+            monitor = self._bar_monitor(pid)
+            if monitor is None:
+                unmanaged.append(pid)
+            else:
+                bars[monitor] = pid
+        return bars, unmanaged
+
+    def start_bars(self, monitors):
+        """Lanza las barras de varios monitores sin esperar a que arranquen"""
+        overrides = self._overrides()
+        started = []
+        for monitor in monitors:
+            args = ["polybar", "--quiet", "--config", self.monitor_config(monitor, overrides),
+                    f"{BAR_NAME}-{monitor_key(monitor.name)}"]
+            env = dict(os.environ, MONITOR=monitor.name)
+            started.append((monitor_key(monitor.name), self.supervisor.start(args, env), time.perf_counter()))
+        return started
+
+    def wait_ready(self, started, timeout=READY_TIMEOUT):
+        """Espera a la vez a todas las barras lanzadas; devuelve un informe por barra"""
+        deadline = time.monotonic() + timeout
+        reports = {}
+        while len(reports) < len(started):
+            sockets = {pid for pid, _ in polybar_ipc.find_ipc_sockets(self.ipc_dirs)}
+            for name, process, start_time in started:
+                if name in reports:
+                    continue
+                if process.poll() is not None:
+                    reports[name] = {"monitor": name, "pid": process.pid, "state": BAR_FAILED,
+                                     "exit_code": process.returncode}
+                elif process.pid in sockets:
+                    reports[name] = {"monitor": name, "pid": process.pid, "state": BAR_READY,
+                                     "ms": round((time.perf_counter() - start_time) * 1000, 1)}
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(READY_POLL_INTERVAL)
+
+        for name, process, _ in started:
+            reports.setdefault(name, {"monitor": name, "pid": process.pid, "state": BAR_RUNNING})
+        return [reports[name] for name, _, _ in started]
+
+    def start(self, monitors=None):
+        """Lanza una barra por monitor sin esperar; el resultado se pasa a wait_ready().
+
+        Si no se puede enumerar ningún monitor se lanza una sola barra como antes.
+        """
+        monitors = self.source.monitors() if monitors is None else monitors
+        if not monitors:
+            return [("", self.supervisor.start(), time.perf_counter())]
+        return self.start_bars(monitors)
+
+    def launch(self, monitors=None):
+        """Lanza una barra por monitor en paralelo; devuelve el informe de cada una"""
+        self.last_reports = self.wait_ready(self.start(monitors))
+        return self.last_reports
+
+    def restart(self):
+        """Sustituye todas las barras por una por monitor; devuelve la latencia en ms"""
+        start_time = time.perf_counter()
+        self.supervisor.stop()
+        self.launch()
+        self.supervisor.last_switch_ms = (time.perf_counter() - start_time) * 1000
+        return self.supervisor.last_switch_ms
+
+    def reload(self):
+        """Recarga la configuración de las barras; devuelve (método, ms).
+
+        Si todas las barras son del orquestador se recargan por IPC y solo se lanzan
+        las de los monitores que no tengan; si no, se reinician todas.
+        """
+        start_time = time.perf_counter()
+        bars, unmanaged = self.running_bars()
+        if bars and not unmanaged and polybar_ipc.send_command("restart"):
+            self.sync()
+            self.supervisor.last_switch_ms = (time.perf_counter() - start_time) * 1000
+            return "ipc", self.supervisor.last_switch_ms
+        return "restart", self.restart()
+
+    def sync(self, monitors=None):
+        """Ajusta las barras a los monitores conectados sin tocar las que siguen igual.
+
+        Devuelve {"started": informes, "stopped": [monitor], "kept": [monitor]}.
+        Si no se puede enumerar ningún monitor (X aún no está listo, o un cambio a
+        medias) no se detiene nada y, como en start(), se lanza una sola barra si no hay ninguna.
+        """
+        monitors = self.source.monitors() if monitors is None else monitors
+        bars, unmanaged = self.running_bars()
+        if not monitors:
+            started = [] if bars or unmanaged else [("", self.supervisor.start(), time.perf_counter())]
+            if started:
+                self.fallback_pid = started[0][1].pid
+            return {"started": self.wait_ready(started) if started else [], "stopped": [], "kept": sorted(bars)}
+        connected = {monitor_key(monitor.name) for monitor in monitors}
+
+        removed = [name for name in bars if name not in connected]
+        stop_pids = [bars[name] for name in removed]
+        if self.fallback_pid in unmanaged:
+            # Ya hay monitores: la barra provisional deja sitio a las de cada monitor
+            stop_pids.append(self.fallback_pid)
+        self.fallback_pid = None
+        if stop_pids:
+            self.supervisor.stop(pids=stop_pids)
+        overrides = self._overrides()
+        for monitor in monitors:
+            # La geometría la sigue polybar; solo se reescribe el archivo si cambió
+            if monitor_key(monitor.name) in bars:
+                self.monitor_config(monitor, overrides)
+
+        started = self.start_bars([monitor for monitor in monitors if monitor_key(monitor.name) not in bars])
+        reports = self.wait_ready(started) if started else []
+        return {"started": reports, "stopped": removed,
+                "kept": [name for name in bars if name in connected]}
+
+    def watch(self, on_change=None, should_stop=lambda: False):
+        """Vigila la conexión de monitores y llama a sync() cuando cambia.
+
+        Solo se lee /sys/class/drm en cada vuelta; los monitores se enumeran de
+        nuevo únicamente cuando cambia algún conector. Una enumeración vacía no
+        cuenta como cambio visto: se vuelve a intentar en la vuelta siguiente.
+        """
+        previous = drm_connector_state()
+        interval = WATCH_INTERVAL if previous is not None else WATCH_FALLBACK_INTERVAL
+        previous_monitors = None if previous is not None else self.source.monitors()
+        while not should_stop():
+            time.sleep(interval)
+            if should_stop():
+                break
+            if previous is not None:
+                state = drm_connector_state()
+                if state == previous:
+                    continue
+                monitors = self.source.monitors()
+                if monitors:
+                    previous = state
+            else:
+                monitors = self.source.monitors()
+                if monitors == previous_monitors:
+                    continue
+                if monitors:
+                    previous_monitors = monitors
+            result = self.sync(monitors)
+            if on_change is not None and (result["started"] or result["stopped"]):
+                on_change(result)
+
+_orchestrator = None
+
+def get_orchestrator():
+    """Orquestador compartido por toda la aplicación"""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = BarOrchestrator()
+    return _orchestrator
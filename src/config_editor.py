@@ -0,0 +1,142 @@
+import re
+
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat
+from PyQt5.QtCore import pyqtSignal
+
+# Estados de bloque del resaltado: los bloques fuera de la vista quedan pendientes
+# y se colorean cuando aparecen al desplazarse
+BLOCK_PENDING = 0
+BLOCK_HIGHLIGHTED = 1
+# Bloques de margen por encima y por debajo de la parte visible
+VISIBLE_MARGIN = 20
+
+SECTION_RE = re.compile(r"^\s*\[[^\]]*\]")
+KEY_RE = re.compile(r"^\s*([^=;#\s][^=]*?)\s*=")
+REFERENCE_RE = re.compile(r"\$\{[^}]*\}")
+COLOR_RE = re.compile(r"#[0-9a-fA-F]{3,8}\b")
+
+def _text_format(color, bold=False):
+    text_format = QTextCharFormat()
+    text_format.setForeground(QColor(color))
+    if bold:
+        text_format.setFontWeight(QFont.Bold)
+    return text_format
+
+class IniHighlighter(QSyntaxHighlighter):
+    """Resaltado de la sintaxis de polybar limitado a los bloques visibles.
+
+    Cada línea se colorea de forma independiente, así que al editar solo se
+    vuelve a procesar la línea cambiada y al cargar un archivo grande solo las
+    que se ven en pantalla.
+    """
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.visible = range(0)
+        self.formats = {
+            "section": _text_format("#5f87d7", bold=True),
+            "key": _text_format("#af5f00"),
+            "comment": _text_format("#808080"),
+            "reference": _text_format("#008787"),
+            "color": _text_format("#870087"),
+        }
+
+    def highlightBlock(self, text):
+        if self.currentBlock().blockNumber() not in self.visible:
+            self.setCurrentBlockState(BLOCK_PENDING)
+            return
+        self.setCurrentBlockState(BLOCK_HIGHLIGHTED)
+
+        stripped = text.lstrip()
+        if stripped.startswith((";", "#")):
+            self.setFormat(0, len(text), self.formats["comment"])
+            return
+        match = SECTION_RE.match(text)
+        if match:
+            self.setFormat(0, match.end(), self.formats["section"])
+            return
+        match = KEY_RE.match(text)
+        if match:
+            self.setFormat(match.start(1), len(match.group(1)), self.formats["key"])
+        for match in REFERENCE_RE.finditer(text):
+            self.setFormat(match.start(), match.end() - match.start(), self.formats["reference"])
+        for match in COLOR_RE.finditer(text):
+            self.setFormat(match.start(), match.end() - match.start(), self.formats["color"])
+
+class ConfigEditor(QPlainTextEdit):
+    """Editor de un archivo de configuración que carga su texto al mostrarse por primera vez.
+
+    loader es una función que devuelve el texto; si falla, el error se muestra
+    como comentario y el editor queda en solo lectura. edited se emite con cada
+    cambio del usuario (no con la carga).
+    """
+
+    edited = pyqtSignal()
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.loaded = False
+        self.setFont(QFont("Monospace", 10))
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.highlighter = IniHighlighter(self.document())
+        self._highlighting = False
+        self._revision = None
+        self.updateRequest.connect(self._highlight_visible)
+
+    def showEvent(self, event):
+        self.ensure_loaded()
+        super().showEvent(event)
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            text = self.loader()
+        except Exception as e:
+            text = f"; {e}"
+            self.setReadOnly(True)
+        self.setPlainText(text)
+        self.document().setModified(False)
+        self._revision = self.document().revision()
+        self.textChanged.connect(self._text_changed)
+
+    def _text_changed(self):
+        # El resaltado también puede avisar de cambios: solo cuentan los del texto
+        revision = self.document().revision()
+        if revision != self._revision:
+            self._revision = revision
+            self.edited.emit()
+
+    def is_modified(self):
+        return self.loaded and self.document().isModified()
+
+    def _visible_range(self):
+        block = self.firstVisibleBlock()
+        first = block.blockNumber()
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        height = self.viewport().height()
+        last = first
+        while block.isValid() and top <= height:
+            top += self.blockBoundingRect(block).height()
+            last = block.blockNumber()
+            block = block.next()
+        return range(max(0, first - VISIBLE_MARGIN), last + VISIBLE_MARGIN + 1)
+
+    def _highlight_visible(self, rect=None, dy=0):
+        # rehighlightBlock vuelve a pedir un repintado: se evita entrar de nuevo
+        if self._highlighting:
+            return
+        self._highlighting = True
+        try:
+            self.highlighter.visible = self._visible_range()
+            block = self.document().findBlockByNumber(self.highlighter.visible.start)
+            while block.isValid() and block.blockNumber() in self.highlighter.visible:
+                if block.userState() != BLOCK_HIGHLIGHTED:
+                    # Sigue por los bloques siguientes mientras cambien de estado
+                    self.highlighter.rehighlightBlock(block)
+                block = block.next()
+        finally:
+            self._highlighting = False
@@ -0,0 +1,30 @@
+import os
+
+def write_atomic(path, data, mode=None):
+    """Escribe un archivo completo mediante un temporal y rename.
+
+    Acepta texto o bytes. Si no se indica mode se conservan los permisos del
+    archivo existente (0644 si no existía).
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    if mode is None:
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except OSError:
+            mode = 0o644
+
+    try:
+        with open(tmp_path, 'wb' if isinstance(data, bytes) else 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
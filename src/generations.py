@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+from paths import CONFIG_DIR
+from fileutil import write_atomic
+
+# Generaciones de la configuración activa de polybar:
+#   ~/.config/polybar/generations/<n>/config   versiones aplicadas
+#   ~/.config/polybar/current -> generations/<n>
+#   ~/.config/polybar/config  -> current/config
+# Cambiar de versión o deshacer solo sustituye el enlace 'current'
+GENERATIONS_DIR = os.path.join(CONFIG_DIR, "generations")
+CURRENT_LINK = os.path.join(CONFIG_DIR, "current")
+ACTIVE_CONFIG = os.path.join(CONFIG_DIR, "config")
+KEEP_GENERATIONS = 10
+
+class GenerationError(Exception):
+    pass
+
+def _replace_symlink(target, link_path):
+    """Crea o sustituye un enlace simbólico de forma atómica"""
+    tmp_path = f"{link_path}.{os.getpid()}.tmp"
+    try:
+        os.unlink(tmp_path)
+    except FileNotFoundError:
+        pass
+    os.symlink(target, tmp_path)
+    os.replace(tmp_path, link_path)
+
+class GenerationStore:
+    def __init__(self, directory=GENERATIONS_DIR, current_link=CURRENT_LINK, config_path=ACTIVE_CONFIG,
+                 keep=KEEP_GENERATIONS):
+        self.directory = directory
+        self.current_link = current_link
+        self.config_path = config_path
+        self.keep = keep
+
+    def _path(self, number):
+        return os.path.join(self.directory, str(number))
+
+    def generations(self):
+        """Números de generación existentes, de la más antigua a la más reciente"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def current(self):
+        try:
+            target = os.readlink(self.current_link)
+        except OSError:
+            return None
+        name = os.path.basename(os.path.normpath(target))
+        return int(name) if name.isdigit() else None
+
+    def info(self, number):
+        """Metadatos de una generación: {"theme", "digest", "time"}"""
+        try:
+            with open(os.path.join(self._path(number), "generation.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _is_managed(self):
+        try:
+            return os.readlink(self.config_path) == self._config_link_target()
+        except OSError:
+            return False
+
+    def _config_link_target(self):
+        return os.path.join(os.path.relpath(self.current_link, os.path.dirname(self.config_path)), "config")
+
+    def _create(self, data, theme):
+        numbers = self.generations()
+        number = numbers[-1] + 1 if numbers else 1
+        tmp_dir = os.path.join(self.directory, f".{number}.{os.getpid()}.tmp")
+        os.makedirs(tmp_dir)
+        try:
+            write_atomic(os.path.join(tmp_dir, "config"), data)
+            write_atomic(os.path.join(tmp_dir, "generation.json"), json.dumps({
+                "theme": theme,
+                "digest": hashlib.sha256(data).hexdigest(),
+                "time": time.time(),
+            }))
+            os.rename(tmp_dir, self._path(number))
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return number
+
+    def _adopt_unmanaged(self):
+        """Guarda como generación una configuración que no apunta al almacén (la de antes
+        de usarlo o una editada a mano), para que no se pierda al activar otra"""
+        if self._is_managed() or not os.path.isfile(self.config_path):
+            return
+        with open(self.config_path, 'rb') as f:
+            data = f.read()
+        self.activate(self._find(data) or self._create(data, None))
+
+    def _find(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        for number in reversed(self.generations()):
+            if self.info(number).get("digest") == digest:
+                return number
+        return None
+
+    def history(self):
+        """Generaciones activadas, de la más antigua a la más reciente"""
+        try:
+            with open(os.path.join(self.directory, "history.json"), 'r') as f:
+                return [number for number in json.load(f) if isinstance(number, int)]
+        except (OSError, ValueError, TypeError):
+            return []
+
+    def _save_history(self, history):
+        write_atomic(os.path.join(self.directory, "history.json"), json.dumps(history[-self.keep * 2:]))
+
+    def activate(self, number, record=True):
+        """Hace activa una generación existente cambiando solo el enlace 'current'"""
+        if not os.path.isdir(self._path(number)):
+            raise GenerationError(f"No existe la generación {number}")
+        _replace_symlink(os.path.relpath(self._path(number), os.path.dirname(self.current_link)), self.current_link)
+        if not self._is_managed():
+            _replace_symlink(self._config_link_target(), self.config_path)
+
+        if record:
+            history = self.history()
+            if not history or history[-1] != number:
+                self._save_history(history + [number])
+
+    def commit(self, data, theme=None):
+        """Activa una configuración; devuelve el número de generación.
+
+        Si el mismo contenido ya se aplicó antes se reutiliza su generación, sin copiar nada.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._adopt_unmanaged()
+            number = self._find(data)
+            if number is None:
+                number = self._create(data, theme)
+            self.activate(number)
+            self.prune()
+        except OSError as e:
+            raise GenerationError(f"No se pudo activar la configuración: {e}") from e
+        return number
+
+    def rollback(self):
+        """Vuelve a la generación activa antes de la actual; devuelve su número o None"""
+        try:
+            self._adopt_unmanaged()
+        except OSError as e:
+            raise GenerationError(f"No se pudo guardar la configuración actual: {e}") from e
+
+        current = self.current()
+        existing = set(self.generations())
+        history = [number for number in self.history() if number in existing]
+        while history and history[-1] == current:
+            history.pop()
+        if not history:
+            return None
+
+        target = history[-1]
+        try:
+            self.activate(target, record=False)
+            # Deshacer otra vez sigue retrocediendo en el historial
+            self._save_history(history)
+        except OSError as e:
+            raise GenerationError(f"No se pudo volver a la generación {target}: {e}") from e
+        return target
+
+    def prune(self):
+        """Elimina las generaciones antiguas por encima de la retención (nunca la activa)"""
+        numbers = self.generations()
+        # Se conservan las más recientes y las últimas activadas, para poder deshacer
+        protected = {self.current()} | set(self.history()[-self.keep:])
+        for number in numbers[:max(0, len(numbers) - self.keep)]:
+            if number not in protected:
+                shutil.rmtree(self._path(number), ignore_errors=True)
@@ -0,0 +1,157 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QPlainTextEdit)
+from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtCore import Qt, QObject, QProcess, QTimer, pyqtSignal
+
+# Tiempo que se espera tras SIGTERM antes de forzar la cancelación
+CANCEL_KILL_DELAY_MS = 2000
+
+class Job(QObject):
+    """Comando externo ejecutado con QProcess sin bloquear el bucle de eventos"""
+
+    # texto recibido, True si viene de stderr
+    output = pyqtSignal(str, bool)
+    # código de salida (-1 si no se pudo iniciar), True si se canceló
+    finished = pyqtSignal(int, bool)
+
+    def __init__(self, program, args=(), parent=None):
+        super().__init__(parent)
+        self.program = program
+        self.args = list(args)
+        self.cancelled = False
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self._read_stdout)
+        self.process.readyReadStandardError.connect(self._read_stderr)
+        self.process.finished.connect(self._process_finished)
+        self.process.errorOccurred.connect(self._process_error)
+
+    def command_line(self):
+        return " ".join([self.program] + self.args)
+
+    def start(self):
+        self.process.start(self.program, self.args)
+
+    def is_running(self):
+        return self.process.state() != QProcess.NotRunning
+
+    def cancel(self):
+        """Pide al proceso que termine y lo mata si no responde"""
+        if not self.is_running():
+            return
+        self.cancelled = True
+        self.process.terminate()
+        QTimer.singleShot(CANCEL_KILL_DELAY_MS, self._kill_if_running)
+
+    def _kill_if_running(self):
+        if self.is_running():
+            self.process.kill()
+
+    def _read_stdout(self):
+        data = bytes(self.process.readAllStandardOutput()).decode(errors="replace")
+        if data:
+            self.output.emit(data, False)
+
+    def _read_stderr(self):
+        data = bytes(self.process.readAllStandardError()).decode(errors="replace")
+        if data:
+            self.output.emit(data, True)
+
+    def _process_finished(self, exit_code, exit_status):
+        if exit_status == QProcess.CrashExit and not self.cancelled:
+            exit_code = exit_code or -1
+        self.finished.emit(exit_code, self.cancelled)
+
+    def _process_error(self, error):
+        # Los fallos durante la ejecución llegan también por finished()
+        if error == QProcess.FailedToStart:
+            self.output.emit(f"No se pudo iniciar {self.program}: {self.process.errorString()}\n", True)
+            self.finished.emit(-1, False)
+
+class JobDialog(QDialog):
+    """Ventana no modal que muestra la salida de un trabajo y permite cancelarlo"""
+
+    def __init__(self, title, job, parent=None, on_finished=None):
+        super().__init__(parent)
+        self.job = job
+        self.job.setParent(self)
+        self.on_finished = on_finished
+        self.errors = []
+        self.setWindowTitle(title)
+        self.setMinimumSize(600, 300)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+
+        layout = QVBoxLayout()
+
+        self.status_label = QLabel(f"Ejecutando: {job.command_line()}")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.output_view = QPlainTextEdit()
+        self.output_view.setReadOnly(True)
+        self.output_view.setMaximumBlockCount(5000)
+        self.output_view.setFont(QFont("Monospace", 9))
+        layout.addWidget(self.output_view)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.job.cancel)
+        button_layout.addWidget(self.cancel_button)
+
+        self.close_button = QPushButton("Cerrar")
+        self.close_button.setEnabled(False)
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.job.output.connect(self.append_output)
+        self.job.finished.connect(self.job_finished)
+
+    def start(self):
+        self.show()
+        self.job.start()
+
+    def append_output(self, text, is_error):
+        if is_error:
+            self.errors.append(text)
+        self.output_view.moveCursor(QTextCursor.End)
+        self.output_view.insertPlainText(text)
+        self.output_view.ensureCursorVisible()
+
+    def error_output(self):
+        return "".join(self.errors).strip()
+
+    def job_finished(self, exit_code, cancelled):
+        self.cancel_button.setEnabled(False)
+        self.close_button.setEnabled(True)
+
+        if cancelled:
+            self.status_label.setText("Cancelado.")
+        elif exit_code == 0:
+            self.status_label.setText("Completado.")
+        else:
+            self.status_label.setText(f"Terminado con errores (código {exit_code}).")
+
+        if self.on_finished is not None:
+            self.on_finished(exit_code, cancelled, self)
+
+    def closeEvent(self, event):
+        # Cerrar la ventana mientras se ejecuta equivale a cancelar
+        if self.job.is_running():
+            self.job.cancel()
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+def run_job(parent, title, program, args=(), on_finished=None):
+    """Lanza un comando en segundo plano mostrando su progreso.
+
+    on_finished(código, cancelado, diálogo) se llama desde el bucle de eventos
+    cuando el proceso termina.
+    """
+    dialog = JobDialog(title, Job(program, args), parent, on_finished)
+    dialog.start()
+    return dialog
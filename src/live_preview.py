@@ -0,0 +1,88 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from preview_render import render_preview, preview_digest, cached_preview, PreviewError
+
+# Espera tras la última edición antes de dibujar la vista previa
+DEBOUNCE_MS = 800
+MAX_RENDERS = 2
+
+class _RenderSignals(QObject):
+    # hash de la configuración, ruta del PNG (vacía si falló), mensaje de error
+    finished = pyqtSignal(str, str, str)
+
+class _RenderJob(QRunnable):
+    """Lanza polybar en una pantalla virtual fuera del hilo de la interfaz"""
+
+    def __init__(self, digest, config_text, signals):
+        super().__init__()
+        self.digest = digest
+        self.config_text = config_text
+        self.signals = signals
+
+    def run(self):
+        try:
+            path, error = render_preview(self.config_text), ""
+        except PreviewError as e:
+            path, error = "", str(e)
+        self.signals.finished.emit(self.digest, path, error)
+
+class LivePreview(QObject):
+    """Vista previa de una configuración que se está editando.
+
+    schedule() recibe una función que devuelve el texto aplanado de la
+    configuración; se llama cuando el usuario deja de editar durante
+    DEBOUNCE_MS. Solo se publica el resultado de la última configuración pedida
+    y una configuración ya dibujada (o dibujándose) no se vuelve a lanzar.
+    """
+
+    preview_ready = pyqtSignal(str)
+    preview_failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(MAX_RENDERS)
+        self.signals = _RenderSignals()
+        self.signals.finished.connect(self._finished)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self._render)
+        self._source = None
+        self._latest = None
+        self._running = set()
+
+    def schedule(self, source):
+        self._source = source
+        self.timer.start()
+
+    def _render(self):
+        try:
+            config_text = self._source()
+        except Exception as e:
+            self._latest = None
+            self.preview_failed.emit(str(e))
+            return
+
+        digest = preview_digest(config_text)
+        self._latest = digest
+        cached = cached_preview(digest)
+        if cached is not None:
+            self.preview_ready.emit(cached)
+        elif digest not in self._running:
+            self._running.add(digest)
+            self.pool.start(_RenderJob(digest, config_text, self.signals))
+
+    def _finished(self, digest, path, error):
+        self._running.discard(digest)
+        if digest != self._latest:
+            return
+        if path:
+            self.preview_ready.emit(path)
+        else:
+            self.preview_failed.emit(error)
+
+    def shutdown(self):
+        """Detiene la espera pendiente y aguarda a que terminen las capturas en curso"""
+        self.timer.stop()
+        self.pool.waitForDone()
@@ -0,0 +1,197 @@
+import os
+import time
+from collections import namedtuple
+
+from overlay import load_theme
+
+# Coste de los módulos de una barra: cuántas veces por segundo despierta polybar por
+# cada módulo y cuántas llamadas al sistema hace en cada actualización (estimación),
+# medición real de las barras en ejecución leyendo /proc y perfil de bajo consumo
+BAR_SECTION = "bar/main"
+MODULE_KEYS = ("modules-left", "modules-center", "modules-right")
+
+# tipo: (clave del intervalo, intervalo predeterminado, llamadas al sistema por actualización)
+POLLED_MODULES = {
+    "internal/cpu": ("interval", 1.0, 4),            # open/read/close de /proc/stat
+    "internal/memory": ("interval", 1.0, 4),         # /proc/meminfo
+    "internal/temperature": ("interval", 1.0, 4),    # /sys/class/thermal/.../temp
+    "internal/date": ("interval", 1.0, 1),           # clock_gettime
+    "internal/network": ("interval", 1.0, 12),       # ioctl, /proc/net/dev y, con ping, más
+    "internal/fs": ("interval", 30.0, 2),            # statvfs por punto de montaje
+    "internal/battery": ("poll-interval", 5.0, 12),  # varios archivos de /sys/class/power_supply
+    "internal/mpd": ("interval", 1.0, 6),            # petición 'status' por el socket de mpd
+    "custom/script": ("interval", 5.0, 150),         # fork + exec + tubería por ejecución
+}
+# Módulos que solo se actualizan por eventos (X11, inotify, pulseaudio...)
+EVENT_MODULES = {
+    "internal/xworkspaces", "internal/xwindow", "internal/xkeyboard", "internal/pulseaudio",
+    "internal/alsa", "internal/backlight", "internal/i3", "internal/bspwm", "internal/tray",
+    "custom/text", "custom/menu", "custom/ipc",
+}
+# Cada actualización que cambia el texto obliga a redibujar la barra (escrituras a X)
+REDRAW_SYSCALLS = 8
+
+# Intervalos "redondos" que usa el perfil de bajo consumo y máximo razonable por tipo
+NICE_INTERVALS = (0.5, 1, 2, 3, 5, 10, 15, 20, 30, 60, 120, 300, 600)
+MAX_INTERVALS = {
+    "internal/cpu": 10, "internal/memory": 30, "internal/temperature": 30, "internal/date": 60,
+    "internal/network": 10, "internal/fs": 600, "internal/battery": 120, "internal/mpd": 5,
+    "custom/script": 600,
+}
+DEFAULT_BUDGET = 1.0
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+ModuleCost = namedtuple("ModuleCost", ("name", "type", "key", "interval", "wakeups", "syscalls", "note"))
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def bar_modules(config, bar=BAR_SECTION):
+    """Nombres de los módulos que usa la barra, en orden y sin repetir"""
+    names = []
+    for key in MODULE_KEYS:
+        for name in (config.resolve(bar, key) or "").split():
+            if name not in names:
+                names.append(name)
+    return names
+
+def module_cost(config, name):
+    """Coste estimado de un módulo de la configuración"""
+    section = f"module/{name}"
+    module_type = config.resolve(section, "type")
+    if module_type is None:
+        return ModuleCost(name, None, None, None, 0.0, 0.0, "módulo no definido")
+
+    if module_type in POLLED_MODULES:
+        key, default, per_update = POLLED_MODULES[module_type]
+        if module_type == "custom/script" and config.resolve(section, "tail") == "true":
+            return ModuleCost(name, module_type, None, None, 0.0, 0.0, "proceso persistente (tail)")
+        interval = _float(config.resolve(section, key)) or default
+        if module_type == "internal/fs":
+            mounts = sum(1 for n in range(32) if config.resolve(section, f"mount-{n}") is not None)
+            per_update *= max(1, mounts)
+        wakeups = 1 / interval if interval > 0 else 0.0
+        return ModuleCost(name, module_type, key, interval, wakeups, wakeups * (per_update + REDRAW_SYSCALLS), "")
+
+    if module_type in EVENT_MODULES:
+        return ModuleCost(name, module_type, None, None, 0.0, 0.0, "por eventos")
+    interval = _float(config.resolve(section, "interval"))
+    if interval:
+        return ModuleCost(name, module_type, "interval", interval, 1 / interval,
+                          (REDRAW_SYSCALLS + 4) / interval, "tipo desconocido: estimación genérica")
+    return ModuleCost(name, module_type, None, None, 0.0, 0.0, "tipo desconocido")
+
+def profile_theme(theme_path):
+    """Coste de los módulos de la barra de un tema: (lista de ModuleCost, totales)"""
+    config = load_theme(theme_path)
+    costs = [module_cost(config, name) for name in bar_modules(config)]
+    return costs, {"wakeups": sum(cost.wakeups for cost in costs),
+                   "syscalls": sum(cost.syscalls for cost in costs)}
+
+def _nice_interval(value):
+    return next((nice for nice in NICE_INTERVALS if nice >= value), NICE_INTERVALS[-1])
+
+def low_power_intervals(costs, budget=DEFAULT_BUDGET):
+    """Intervalos que dejan los despertares por segundo dentro de budget.
+
+    Todos los intervalos de sondeo se alargan por el mismo factor (redondeados a
+    valores 'redondos' y sin pasar del máximo razonable de cada tipo), con el
+    menor factor que cumple el presupuesto. Devuelve ({sección: {clave: valor}},
+    despertares por segundo resultantes); si ni con los máximos se cumple, se
+    devuelven los máximos.
+    """
+    polled = [cost for cost in costs if cost.interval]
+
+    def intervals(factor):
+        return {cost: max(cost.interval, min(MAX_INTERVALS.get(cost.type, NICE_INTERVALS[-1]),
+                                             _nice_interval(cost.interval * factor)))
+                for cost in polled}
+
+    def wakeups(new):
+        return sum(1 / interval for interval in new.values())
+
+    low, high = 1.0, NICE_INTERVALS[-1] / min((cost.interval for cost in polled), default=1)
+    best = intervals(high)
+    if wakeups(intervals(low)) > budget:
+        for _ in range(40):
+            middle = (low + high) / 2
+            candidate = intervals(middle)
+            if wakeups(candidate) <= budget:
+                high, best = middle, candidate
+            else:
+                low = middle
+    else:
+        best = intervals(low)
+
+    changes = {}
+    for cost, interval in best.items():
+        if interval != cost.interval:
+            value = f"{interval:g}"
+            changes.setdefault(f"module/{cost.name}", {})[cost.key] = value
+    return changes, wakeups(best)
+
+def process_snapshot(pid):
+    """Contadores de un proceso: tiempo de CPU (con hijos terminados), RSS y cambios de contexto"""
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        # El nombre va entre paréntesis y puede contener espacios
+        fields = f.read().rpartition(")")[2].split()
+    cpu_ticks = sum(int(value) for value in fields[11:15])
+    rss_kb = 0
+    with open(f"/proc/{pid}/status", 'r') as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+                break
+
+    # polybar usa un hilo por módulo: los despertares se cuentan en todos
+    switches = 0
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        tasks = []
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/status", 'r') as f:
+                for line in f:
+                    if line.startswith("voluntary_ctxt_switches:"):
+                        switches += int(line.split()[1])
+        except OSError:
+            continue
+    return {"time": time.monotonic(), "cpu_ticks": cpu_ticks, "rss_kb": rss_kb, "switches": switches}
+
+def snapshot(pids):
+    """Contadores de varios procesos; los que ya no existen se omiten"""
+    result = {}
+    for pid in pids:
+        try:
+            result[pid] = process_snapshot(pid)
+        except (OSError, ValueError, IndexError):
+            continue
+    return result
+
+def usage(before, after):
+    """Consumo de cada proceso entre dos instantáneas: {pid: {cpu_percent, rss_kb, wakeups}}"""
+    result = {}
+    for pid, end in after.items():
+        start = before.get(pid)
+        if start is None:
+            continue
+        elapsed = end["time"] - start["time"]
+        if elapsed <= 0:
+            continue
+        result[pid] = {
+            "cpu_percent": round((end["cpu_ticks"] - start["cpu_ticks"]) / CLK_TCK / elapsed * 100, 2),
+            "rss_kb": end["rss_kb"],
+            "wakeups": round((end["switches"] - start["switches"]) / elapsed, 2),
+        }
+    return result
+
+def measure(pids, duration=2.0):
+    """Mide el consumo real de los procesos durante duration segundos"""
+    before = snapshot(pids)
+    time.sleep(duration)
+    return usage(before, snapshot(pids))
@@ -0,0 +1,159 @@
+import os
+import json
+import shutil
+
+from paths import THEMES_DIR
+from fileutil import write_atomic
+import polybar_ini
+from polybar_ini import PolybarConfig, Section, Entry
+
+# Temas superpuestos: un tema de usuario que solo guarda las claves cambiadas por
+# sección sobre un tema del sistema. overlay.json contiene
+#   {"base": "<tema del sistema>", "sections": {"<sección>": {"<clave>": "<valor>" | null}}}
+# donde null elimina la clave del tema base. Las actualizaciones del tema base se
+# aplican solas porque la vista combinada se calcula a partir de él.
+OVERLAY_NAME = "overlay.json"
+
+class OverlayError(Exception):
+    pass
+
+# Vistas combinadas: directorio del tema -> (PolybarConfig, directorios de respaldo de los
+# include), válidas mientras no cambie ningún archivo leído (los del tema base y el propio
+# overlay.json) ni aparezca un include que faltaba
+_merged_cache = {}
+
+def is_overlay(theme_path):
+    return os.path.isfile(os.path.join(theme_path, OVERLAY_NAME))
+
+def base_path(base):
+    return base if os.path.isabs(base) else os.path.join(THEMES_DIR, base)
+
+def read_overlay(theme_path):
+    try:
+        with open(os.path.join(theme_path, OVERLAY_NAME), 'r') as f:
+            overlay = json.load(f)
+    except (OSError, ValueError) as e:
+        raise OverlayError(f"No se pudo leer {OVERLAY_NAME}: {e}") from e
+    if not isinstance(overlay.get("base"), str) or not isinstance(overlay.get("sections", {}), dict):
+        raise OverlayError(f"{OVERLAY_NAME} no válido en {theme_path}")
+    return overlay
+
+def _merge(base, overlay, overlay_path):
+    merged = PolybarConfig(overlay_path, base.root)
+    merged.files = dict(base.files)
+    st = os.stat(overlay_path)
+    merged.files[overlay_path] = (st.st_mtime_ns, st.st_size)
+    merged.includes = base.includes
+    merged.missing_includes = base.missing_includes
+    merged.errors = base.errors
+
+    # Las secciones sin cambios se comparten con la configuración base (solo lectura)
+    merged.sections = dict(base.sections)
+    for name, changes in overlay.get("sections", {}).items():
+        section = merged.sections.get(name)
+        if section is None:
+            section = Section(name, overlay_path, 0)
+        else:
+            section = Section(name, section.path, section.line)
+            section.entries = dict(base.sections[name].entries)
+        merged.sections[name] = section
+        for key, value in changes.items():
+            if value is None:
+                section.entries.pop(key, None)
+            else:
+                section.entries[key] = Entry(key, str(value), overlay_path, 0)
+    return merged
+
+def load_overlay_config(theme_path):
+    """Vista combinada (tema base + cambios) de un tema superpuesto, calculada al pedirla"""
+    theme_path = os.path.abspath(theme_path)
+    cached, fallback_dirs = _merged_cache.get(theme_path, (None, ()))
+    if cached is not None and cached.is_current() and polybar_ini._includes_current(cached, fallback_dirs):
+        return cached
+
+    overlay = read_overlay(theme_path)
+    base_dir = base_path(overlay["base"])
+    if not os.path.isdir(base_dir):
+        raise OverlayError(f"No existe el tema base {overlay['base']}")
+    merged = _merge(polybar_ini.load_theme_config(base_dir), overlay,
+                    os.path.join(theme_path, OVERLAY_NAME))
+    _merged_cache[theme_path] = (merged, (base_dir,))
+    return merged
+
+def load_theme(theme_path):
+    """Configuración de cualquier tema: la combinada si es superpuesto y la normal si no"""
+    if is_overlay(theme_path):
+        try:
+            return load_overlay_config(theme_path)
+        except OverlayError as e:
+            raise OSError(str(e)) from e
+    return polybar_ini.load_theme_config(theme_path)
+
+def create_overlay(base_dir, theme_path, overwrite=False):
+    """Crea un tema superpuesto vacío sobre base_dir"""
+    if os.path.exists(theme_path) and not overwrite:
+        raise OverlayError(f"El tema {os.path.basename(theme_path)} ya existe")
+    base = os.path.basename(os.path.normpath(base_dir))
+    if os.path.normpath(base_path(base)) != os.path.normpath(base_dir):
+        base = os.path.abspath(base_dir)
+
+    try:
+        if os.path.exists(theme_path):
+            shutil.rmtree(theme_path)
+        os.makedirs(theme_path)
+        write_atomic(os.path.join(theme_path, OVERLAY_NAME),
+                     json.dumps({"base": base, "sections": {}}, indent=1))
+        with open(os.path.join(theme_path, "README.md"), 'w') as f:
+            f.write(f"# {os.path.basename(theme_path)}\n\nCambios sobre el tema {os.path.basename(base)}.\n")
+    except OSError as e:
+        raise OverlayError(f"No se pudo crear el tema: {e}") from e
+    return theme_path
+
+def delta_from_text(base, text):
+    """Cambios por sección entre la configuración base y un texto editado"""
+    sections = {}
+    current = None
+    for kind, line, a, b in polybar_ini.tokenize_lines(text.splitlines()):
+        if kind == polybar_ini.TOKEN_SECTION:
+            current = sections.setdefault(a, {})
+        elif kind == polybar_ini.TOKEN_ENTRY and current is not None:
+            current[a] = b
+        elif kind in (polybar_ini.TOKEN_INCLUDE_FILE, polybar_ini.TOKEN_INCLUDE_DIRECTORY):
+            raise OverlayError(f"Línea {line}: un tema superpuesto no admite include")
+        else:
+            raise OverlayError(f"Línea {line}: {a}")
+
+    delta = {}
+    for name, entries in sections.items():
+        base_section = base.sections.get(name)
+        for key, value in entries.items():
+            if base_section is None or base_section.get(key) != value:
+                delta.setdefault(name, {})[key] = value
+    for name, section in base.sections.items():
+        for key in section.entries:
+            if key not in sections.get(name, {}):
+                delta.setdefault(name, {})[key] = None
+    return delta
+
+def save_overlay_text(theme_path, text):
+    """Guarda como cambios sobre el tema base la configuración combinada editada"""
+    overlay = read_overlay(theme_path)
+    base = polybar_ini.load_theme_config(base_path(overlay["base"]))
+    overlay["sections"] = delta_from_text(base, text)
+    try:
+        write_atomic(os.path.join(theme_path, OVERLAY_NAME), json.dumps(overlay, indent=1, ensure_ascii=False))
+    except OSError as e:
+        raise OverlayError(f"No se pudo guardar {OVERLAY_NAME}: {e}") from e
+    return overlay["sections"]
+
+def update_overlay(theme_path, changes):
+    """Añade cambios por sección ({sección: {clave: valor | None}}) a un tema superpuesto"""
+    overlay = read_overlay(theme_path)
+    sections = overlay.setdefault("sections", {})
+    for name, entries in changes.items():
+        sections.setdefault(name, {}).update(entries)
+    try:
+        write_atomic(os.path.join(theme_path, OVERLAY_NAME), json.dumps(overlay, indent=1, ensure_ascii=False))
+    except OSError as e:
+        raise OverlayError(f"No se pudo guardar {OVERLAY_NAME}: {e}") from e
+    return sections
@@ -0,0 +1,312 @@
+import os
+import re
+import json
+from collections import namedtuple
+
+from paths import CACHE_DIR
+from fileutil import write_atomic
+import polybar_ini
+from theme_catalog import CONFIG_VARIANTS
+from overlay import OVERLAY_NAME, is_overlay, load_overlay_config, update_overlay, OverlayError
+
+# Paletas de colores de los temas. Cada tema tiene un índice con todos los colores que
+# aparecen en los valores de su configuración (colors.ini, pero también los #hex
+# escritos directamente en modules.ini), con el archivo, la línea, la sección y la
+# clave de cada aparición. El índice se guarda en caché con el estado de los archivos,
+# así que recolorear otra vez no vuelve a analizar nada.
+PALETTE_INDEX = os.path.join(CACHE_DIR, "palette_index.json")
+# Secciones con los colores con nombre (${color.x} en los temas de adi1090x, ${colors.x} en el de polybar)
+COLOR_SECTIONS = ("color", "colors")
+
+# #rgb, #argb, #rrggbb y #aarrggbb, como los acepta polybar
+HEX_RE = re.compile(r"#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})(?![0-9a-zA-Z_-])")
+
+ColorUse = namedtuple("ColorUse", ("path", "line", "section", "key", "colors"))
+
+class PaletteError(Exception):
+    pass
+
+def split_color(text):
+    """(alfa, rgb) de un color en minúsculas y con dos cifras por canal: '#8f2f343f' -> ('8f', '2f343f')"""
+    digits = text[1:].lower()
+    if len(digits) <= 4:
+        digits = "".join(digit * 2 for digit in digits)
+    return (digits[:2], digits[2:]) if len(digits) == 8 else ("", digits)
+
+def format_color(alpha, rgb, like):
+    """Color con el formato de like: cifras cortas si se puede y mayúsculas si like las usa"""
+    digits = alpha + rgb
+    if len(like) <= 5 and all(digits[i] == digits[i + 1] for i in range(0, len(digits), 2)):
+        digits = digits[::2]
+    return f"#{digits.upper()}" if like[1:].isupper() else f"#{digits}"
+
+def theme_files(theme_path):
+    """Archivos de configuración propios del tema (config, config.ini y *.ini)"""
+    try:
+        names = sorted(os.listdir(theme_path))
+    except OSError as e:
+        raise PaletteError(f"No se pudo leer el tema: {e}") from e
+    return [os.path.join(theme_path, name) for name in names
+            if (name in CONFIG_VARIANTS or name.endswith(".ini"))
+            and os.path.isfile(os.path.join(theme_path, name))]
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def _scan_file(path):
+    with open(path, 'r', errors="replace") as f:
+        lines = f.read().splitlines()
+    uses = []
+    section = None
+    for kind, number, a, b in polybar_ini.tokenize_lines(lines):
+        if kind == polybar_ini.TOKEN_SECTION:
+            section = a
+        elif kind == polybar_ini.TOKEN_ENTRY:
+            colors = HEX_RE.findall(b)
+            if colors:
+                uses.append(ColorUse(path, number, section, a, colors))
+    return uses
+
+def _scan_overlay(theme_path):
+    try:
+        config = load_overlay_config(theme_path)
+    except OverlayError as e:
+        raise PaletteError(str(e)) from e
+    uses = []
+    for name, section in config.sections.items():
+        for key, entry in section.entries.items():
+            colors = HEX_RE.findall(entry.value)
+            if colors:
+                uses.append(ColorUse(entry.path, entry.line, name, key, colors))
+    return uses, {path: list(stamp) for path, stamp in config.files.items()}
+
+def _files_current(files):
+    for path, stamp in files.items():
+        try:
+            if _stamp(path) != list(stamp):
+                return False
+        except OSError:
+            return False
+    return True
+
+class PaletteIndex:
+    """Índices de color de varios temas, guardados en un solo archivo de caché"""
+
+    def __init__(self, path=PALETTE_INDEX):
+        self.path = path
+        self.themes = None
+        self.dirty = False
+
+    def _load(self):
+        if self.themes is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self.themes = json.load(f)
+            except (OSError, ValueError):
+                self.themes = {}
+        return self.themes
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            write_atomic(self.path, json.dumps(self.themes))
+        except OSError:
+            pass
+        self.dirty = False
+
+    def uses(self, theme_path):
+        """Apariciones de colores en un tema; solo se analiza si cambió algún archivo"""
+        theme_path = os.path.abspath(theme_path)
+        entry = self._load().get(theme_path)
+        if entry is not None and _files_current(entry["files"]) and \
+                (entry.get("overlay") or sorted(entry["files"]) == theme_files(theme_path)):
+            return [ColorUse(*use) for use in entry["uses"]]
+
+        if is_overlay(theme_path):
+            uses, files = _scan_overlay(theme_path)
+        else:
+            uses, files = [], {}
+            for path in theme_files(theme_path):
+                try:
+                    uses.extend(_scan_file(path))
+                    files[path] = _stamp(path)
+                except OSError as e:
+                    raise PaletteError(f"No se pudo leer {path}: {e}") from e
+        self.update(theme_path, uses, files)
+        return uses
+
+    def update(self, theme_path, uses, files):
+        self._load()[os.path.abspath(theme_path)] = {"files": files, "uses": [list(use) for use in uses],
+                                                    "overlay": is_overlay(theme_path)}
+        self.dirty = True
+
+def color_table(uses):
+    """Tabla de colores del tema: {rgb: {"uses": n, "names": [...], "files": [...], "samples": [...]}}"""
+    table = {}
+    for use in uses:
+        for color in use.colors:
+            alpha, rgb = split_color(color)
+            row = table.setdefault(rgb, {"uses": 0, "names": [], "files": [], "samples": []})
+            row["uses"] += 1
+            if use.section in COLOR_SECTIONS and len(use.colors) == 1 and use.key not in row["names"]:
+                row["names"].append(use.key)
+            name = os.path.basename(use.path)
+            if name not in row["files"]:
+                row["files"].append(name)
+            if color not in row["samples"]:
+                row["samples"].append(color)
+    return dict(sorted(table.items(), key=lambda item: -item[1]["uses"]))
+
+def parse_palette(pairs):
+    """Paleta a partir de parejas 'clave=#color' (p. ej. de la línea de órdenes)"""
+    palette = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep or not key.strip() or not HEX_RE.fullmatch(value.strip()):
+            raise PaletteError(f"Cambio de color no válido: {pair!r} (se espera clave=#rrggbb)")
+        palette[key.strip()] = value.strip()
+    return palette
+
+def load_palette(path):
+    """Lee una paleta: JSON {nombre o #hex: #hex} o un .ini con una sección [color] (como colors.ini)"""
+    try:
+        if path.endswith(".json"):
+            with open(path, 'r') as f:
+                palette = json.load(f)
+            if not isinstance(palette, dict):
+                raise PaletteError(f"{path} debe contener un objeto JSON")
+        else:
+            with open(path, 'r', errors="replace") as f:
+                tokens = polybar_ini.tokenize_lines(f.read().splitlines())
+            palette, section = {}, None
+            for kind, _, a, b in tokens:
+                if kind == polybar_ini.TOKEN_SECTION:
+                    section = a
+                elif kind == polybar_ini.TOKEN_ENTRY and section in COLOR_SECTIONS:
+                    palette[a] = b
+    except (OSError, ValueError) as e:
+        raise PaletteError(f"No se pudo leer la paleta {path}: {e}") from e
+    for value in palette.values():
+        if not isinstance(value, str) or not HEX_RE.fullmatch(value):
+            raise PaletteError(f"Color no válido en la paleta: {value!r}")
+    return palette
+
+def color_mapping(palette):
+    """Cambios de una paleta: {"names": {nombre: color}, "colors": {rgb: color}}, con los colores partidos.
+
+    Las claves de la paleta pueden ser colores (#2f343f), que se cambian en todo
+    el tema, o nombres de la sección [color] (background), que cambian solo esa
+    entrada y con ella todo lo que la usa como ${color.background}.
+    """
+    mapping = {"names": {}, "colors": {}}
+    for key, value in palette.items():
+        if HEX_RE.fullmatch(key):
+            mapping["colors"][split_color(key)[1]] = split_color(value)
+        else:
+            mapping["names"][key] = split_color(value)
+    return mapping
+
+def _use_table(use, mapping):
+    """Tabla rgb -> color nuevo para una aparición"""
+    new = mapping["names"].get(use.key) if use.section in COLOR_SECTIONS else None
+    if new is None:
+        return mapping["colors"]
+    return dict(mapping["colors"], **{split_color(color)[1]: new for color in use.colors})
+
+def _recolor(text, table):
+    def replace(match):
+        alpha, rgb = split_color(match.group(0))
+        new = table.get(rgb)
+        if new is None:
+            return match.group(0)
+        # Si la paleta no da transparencia se conserva la del color original
+        return format_color(new[0] or alpha, new[1], match.group(0))
+    return HEX_RE.sub(replace, text)
+
+def _affected(use, mapping):
+    table = _use_table(use, mapping)
+    return any(split_color(color)[1] in table for color in use.colors)
+
+def _recolor_files(uses, mapping):
+    """Reescribe solo las líneas con colores afectados; devuelve (archivos cambiados, usos nuevos, valores cambiados)"""
+    by_file = {}
+    for use in uses:
+        by_file.setdefault(use.path, []).append(use)
+
+    changed, new_uses, recolored = [], [], 0
+    for path, file_uses in by_file.items():
+        if not any(_affected(use, mapping) for use in file_uses):
+            new_uses.extend(file_uses)
+            continue
+        try:
+            with open(path, 'r', errors="replace") as f:
+                lines = f.read().split("\n")
+        except OSError as e:
+            raise PaletteError(f"No se pudo leer {path}: {e}") from e
+        modified = False
+        for use in file_uses:
+            line = lines[use.line - 1]
+            key, sep, value = line.partition("=")
+            new_value = _recolor(value, _use_table(use, mapping))
+            if new_value != value:
+                lines[use.line - 1] = key + sep + new_value
+                modified = True
+                recolored += 1
+            new_uses.append(use._replace(colors=HEX_RE.findall(new_value)))
+        if modified:
+            try:
+                write_atomic(path, "\n".join(lines))
+            except OSError as e:
+                raise PaletteError(f"No se pudo escribir {path}: {e}") from e
+            changed.append(path)
+    return changed, new_uses, recolored
+
+def _recolor_overlay(theme_path, uses, mapping):
+    """Guarda los valores recoloreados como cambios del tema superpuesto; devuelve (archivos cambiados, valores cambiados)"""
+    changes = {}
+    config = load_overlay_config(theme_path)
+    for use in uses:
+        value = config.sections[use.section].get(use.key)
+        new_value = _recolor(value, _use_table(use, mapping))
+        if new_value != value:
+            changes.setdefault(use.section, {})[use.key] = new_value
+    if not changes:
+        return [], 0
+    try:
+        update_overlay(theme_path, changes)
+    except OverlayError as e:
+        raise PaletteError(str(e)) from e
+    return [os.path.join(theme_path, OVERLAY_NAME)], sum(len(entries) for entries in changes.values())
+
+def apply_palette(theme_paths, palette, index=None):
+    """Aplica una paleta a varios temas de una pasada; devuelve un dict por tema.
+
+    La paleta se prepara una sola vez; cada archivo afectado se lee y se escribe
+    una sola vez, y solo si algún color cambia de verdad. Los temas superpuestos
+    guardan el resultado como cambios en overlay.json. El índice de cada tema se
+    actualiza sin volver a analizarlo.
+    """
+    index = index or PaletteIndex()
+    mapping = color_mapping(palette)
+    results = []
+    for theme_path in (os.path.abspath(path) for path in theme_paths):
+        try:
+            if not os.access(theme_path, os.W_OK):
+                raise PaletteError("No se puede modificar el tema; cree antes una copia propia")
+            uses = index.uses(theme_path)
+            if is_overlay(theme_path):
+                changed, recolored = _recolor_overlay(theme_path, uses, mapping)
+                if changed:
+                    index.update(theme_path, *_scan_overlay(theme_path))
+            else:
+                changed, new_uses, recolored = _recolor_files(uses, mapping)
+                if changed:
+                    index.update(theme_path, new_uses, {path: _stamp(path) for path in theme_files(theme_path)})
+        except (PaletteError, OSError) as e:
+            results.append({"theme": theme_path, "changed": [], "recolored": 0, "error": str(e)})
+            continue
+        results.append({"theme": theme_path, "changed": changed, "recolored": recolored})
+    index.save()
+    return results
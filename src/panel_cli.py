@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""Línea de órdenes del selector de paneles, sin PyQt5.
+
+Ejemplos:
+  mabox-panel-selector list-themes --json
+  mabox-panel-selector apply forest
+  mabox-panel-selector compile shapes
+  mabox-panel-selector switch polybar
+  mabox-panel-selector bars --watch   (una barra por monitor, siguiendo los cambios de monitores)
+  mabox-panel-selector batch manifiesto.json
+  mabox-panel-selector previews --into-theme themes/*   (p. ej. desde el PKGBUILD)
+  mabox-panel-selector profile forest --measure 5 --budget 1
+  mabox-panel-selector scripts serve   (caché de la salida de los módulos custom/script)
+  mabox-panel-selector palette apply --set background=#1e1e2e --set '#EC7875=#f38ba8' user:mio
+  mabox-panel-selector wallpaper user:mio --activate --watch   (colores del fondo de pantalla)
+
+Un manifiesto es un JSON con una lista de operaciones (o {"operations": [...]}),
+p. ej. [{"command": "import", "name": "mio", "source": "/ruta/config"},
+        {"command": "apply", "theme": "user:mio"}]; todas se ejecutan en el
+mismo proceso.
+"""
+
+import os
+import sys
+import json
+import signal
+import inspect
+import argparse
+
+from theme_actions import (ThemeError, default_catalog, find_theme, install_theme_config,
+                           rollback_theme, import_theme, fork_theme, create_overlay, export_theme,
+                           create_low_power_theme)
+from generations import GenerationStore, ACTIVE_CONFIG
+from theme_compiler import compile_theme, CompileError
+from theme_import import verify_theme
+from theme_validator import validate_theme, has_errors, ERROR
+from theme_previews import generate_previews, MAX_WORKERS
+from bar_orchestrator import get_orchestrator
+from module_profiler import profile_theme, measure as measure_usage
+from script_cache import (ScriptCache, ScriptCacheError, load_registry, request as cache_request,
+                          COMMAND_LIST, COMMAND_GET, COMMAND_RELOAD, REPLY_ERROR)
+from palette import PaletteIndex, PaletteError, color_table, load_palette, parse_palette, apply_palette
+from wallpaper_palette import WallpaperError, wallpaper_palette, watch as watch_wallpaper
+from panel_switch import switch_panel, PanelSwitchError, PANELS
+
+class CommandError(Exception):
+    pass
+
+def _theme_info(theme):
+    return {key: theme[key] for key in ("name", "type", "path", "summary") if key in theme}
+
+def _lookup(theme):
+    return find_theme(theme, default_catalog().load())
+
+def _reload(result):
+    orchestrator = get_orchestrator()
+    # Sin barras en ejecución (p. ej. aprovisionamiento sin sesión) no se arranca polybar
+    if orchestrator.supervisor.running_pids():
+        method, elapsed = orchestrator.reload()
+        result["reload"] = {"method": method, "ms": round(elapsed, 1)}
+
+def cmd_list_themes(revalidate=False):
+    themes = default_catalog().load(revalidate=revalidate)
+    return {"themes": [_theme_info(theme) for theme in themes]}
+
+def cmd_validate(themes):
+    results = []
+    for name in [themes] if isinstance(themes, str) else themes:
+        theme = _lookup(name)
+        issues = validate_theme(theme["path"])
+        results.append({
+            "theme": _theme_info(theme),
+            "valid": not has_errors(issues),
+            # Archivos cambiados desde la importación (None si el tema no tiene manifiesto)
+            "modified": verify_theme(theme["path"]),
+            "issues": [{"severity": issue.severity, "message": issue.message,
+                        "path": issue.path, "line": issue.line} for issue in issues],
+        })
+    return {"results": results, "valid": all(result["valid"] for result in results)}
+
+def cmd_apply(theme, force=False, reload=True):
+    found = _lookup(theme)
+    if not force:
+        errors = [str(issue) for issue in validate_theme(found["path"]) if issue.severity == ERROR]
+        if errors:
+            raise CommandError(f"El tema {found['name']} tiene errores (use --force para aplicarlo): "
+                               + "; ".join(errors))
+
+    installed = install_theme_config(found["path"])
+    result = {"theme": _theme_info(found), "config": ACTIVE_CONFIG, "generation": installed["generation"],
+              "compiled": installed["compiled"], "warnings": installed["warnings"], "reload": None}
+    if reload:
+        _reload(result)
+    return result
+
+def cmd_rollback(reload=True):
+    rolled_back = rollback_theme()
+    if rolled_back is None:
+        raise CommandError("No hay ninguna configuración anterior")
+    result = {"generation": rolled_back[0], "theme": rolled_back[1], "reload": None}
+    if reload:
+        _reload(result)
+    return result
+
+def cmd_generations():
+    store = GenerationStore()
+    current = store.current()
+    return {"current": current,
+            "generations": [dict(store.info(number), number=number, current=number == current)
+                            for number in store.generations()]}
+
+def cmd_compile(theme):
+    found = _lookup(theme)
+    return dict(compile_theme(found["path"]), theme=_theme_info(found))
+
+def cmd_switch(panel, default_config=None):
+    if panel not in PANELS:
+        raise CommandError(f"Panel desconocido: {panel}")
+    if default_config:
+        switch_panel(panel, default_config=default_config)
+    else:
+        switch_panel(panel)
+    return {"panel": panel}
+
+def cmd_import(source, name=None, overwrite=False):
+    stats = import_theme(name, source, overwrite=overwrite)
+    return dict(stats, theme=os.path.basename(stats["path"]))
+
+def cmd_fork(theme, name=None, overwrite=False):
+    found = _lookup(theme)
+    stats = fork_theme(found["path"], name, overwrite=overwrite)
+    return dict(stats, theme=os.path.basename(stats["path"]))
+
+def cmd_overlay(theme, name=None, overwrite=False):
+    found = _lookup(theme)
+    path = create_overlay(found["path"], name, overwrite=overwrite)
+    return {"theme": os.path.basename(path), "path": path, "base": _theme_info(found)}
+
+def cmd_export(theme, destination):
+    found = _lookup(theme)
+    return {"theme": _theme_info(found), "archive": export_theme(found["path"], destination)}
+
+def cmd_previews(themes=(), into_theme=False, force=False, jobs=MAX_WORKERS):
+    themes = [themes] if isinstance(themes, str) else themes
+    found = [_lookup(theme) for theme in themes] if themes else default_catalog().load()
+    names = {os.path.abspath(theme["path"]): theme["name"] for theme in found}
+    results = generate_previews(names, workers=jobs, into_theme=into_theme, force=force)
+    failed = sum(1 for result in results if "error" in result)
+    return {"results": [dict(result, name=names[result["theme"]]) for result in results],
+            "generated": sum(1 for result in results if not result["cached"] and "error" not in result),
+            "failed": failed, "valid": failed == 0}
+
+def cmd_bars(restart=False, watch=False):
+    orchestrator = get_orchestrator()
+    monitors = orchestrator.source.monitors()
+    if restart:
+        orchestrator.supervisor.stop()
+        result = {"started": orchestrator.launch(monitors), "stopped": [], "kept": []}
+    else:
+        result = orchestrator.sync(monitors)
+    if watch:
+        def on_change(change):
+            print(format_text(dict(change, command="bars", ok=True)), flush=True)
+        # Al cerrar la sesión llega SIGTERM: se termina limpiamente (código 0)
+        stop = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.append(signum))
+        on_change(result)
+        try:
+            orchestrator.watch(on_change, should_stop=lambda: bool(stop))
+        except KeyboardInterrupt:
+            pass
+        result = {"started": [], "stopped": [], "kept": sorted(orchestrator.running_bars()[0])}
+    return dict(result, monitors=[monitor._asdict() for monitor in monitors],
+                valid=not any(report["state"] == "failed" for report in result["started"]))
+
+def cmd_profile(theme, measure=0.0, budget=None, name=None, overwrite=False):
+    found = _lookup(theme)
+    costs, totals = profile_theme(found["path"])
+    result = {"theme": _theme_info(found), "modules": [cost._asdict() for cost in costs],
+              "wakeups": round(totals["wakeups"], 2), "syscalls": round(totals["syscalls"], 1)}
+    if measure:
+        # Se miden las barras en ejecución, que pueden ser de otro tema que el analizado
+        pids = get_orchestrator().supervisor.running_pids()
+        result["measured"] = {str(pid): value for pid, value in measure_usage(pids, measure).items()}
+    if budget is not None:
+        low_power = create_low_power_theme(found["path"], budget, name, overwrite=overwrite)
+        result["low_power"] = dict(low_power, theme=os.path.basename(low_power["path"]))
+    return result
+
+def cmd_scripts(action="list", key=None):
+    if action == "serve":
+        if not load_registry():
+            return {"action": action, "scripts": 0}
+        cache = ScriptCache()
+        signal.signal(signal.SIGTERM, lambda signum, frame: cache.shutdown())
+        try:
+            count = cache.serve()
+        except KeyboardInterrupt:
+            count = len(cache.scripts)
+        return {"action": action, "scripts": count}
+    if action == "get":
+        if not key:
+            raise CommandError("Falta la clave")
+        reply = cache_request(f"{COMMAND_GET} {key}")
+        if reply is None:
+            raise CommandError("La caché de scripts no está en marcha")
+        if reply.startswith(f"{REPLY_ERROR} "):
+            raise CommandError(reply[len(REPLY_ERROR) + 1:])
+        return {"action": action, "key": key, "output": reply}
+    if action == "reload":
+        return {"action": action, "running": cache_request(COMMAND_RELOAD) is not None}
+    if action != "list":
+        raise CommandError(f"Acción desconocida: {action}")
+    reply = cache_request(COMMAND_LIST)
+    scripts = json.loads(reply) if reply else {key: dict(entry, output=None) for key, entry in load_registry().items()}
+    return {"action": action, "running": reply is not None, "scripts": scripts}
+
+def cmd_palette(action="show", themes=(), palette=None, colors=()):
+    themes = [themes] if isinstance(themes, str) else themes
+    if action == "show":
+        if len(themes) != 1:
+            raise CommandError("Indique un tema")
+        found = _lookup(themes[0])
+        return {"action": action, "theme": _theme_info(found),
+                "colors": color_table(PaletteIndex().uses(found["path"]))}
+    if action != "apply":
+        raise CommandError(f"Acción desconocida: {action}")
+
+    changes = load_palette(palette) if palette else {}
+    changes.update(parse_palette([colors] if isinstance(colors, str) else colors))
+    if not changes:
+        raise CommandError("Indique una paleta o algún cambio con --set")
+    # Sin temas se recolorean todos los del usuario: los del sistema no se pueden modificar
+    found = [_lookup(theme) for theme in themes] if themes else \
+        [theme for theme in default_catalog().load() if theme["type"] == "user"]
+    names = {os.path.abspath(theme["path"]): theme["name"] for theme in found}
+    results = apply_palette(names, changes)
+    return {"action": action, "results": [dict(result, name=names[result["theme"]]) for result in results],
+            "valid": not any("error" in result for result in results)}
+
+def cmd_wallpaper(themes=(), image=None, activate=False, watch=False):
+    themes = [themes] if isinstance(themes, str) else themes
+    found = [_lookup(theme) for theme in themes]
+    if activate and len(found) != 1:
+        raise CommandError("--activate necesita un solo tema")
+    if watch and image:
+        raise CommandError("--watch sigue el fondo de pantalla actual; no se puede usar con --image")
+    names = {os.path.abspath(theme["path"]): theme["name"] for theme in found}
+
+    def update(path):
+        generated = wallpaper_palette(path)
+        result = {"image": generated["image"], "palette": generated["palette"], "method": generated["method"],
+                  "cached": generated["cached"], "results": [], "applied": None}
+        if names:
+            results = apply_palette(names, generated["palette"])
+            result["results"] = [dict(item, name=names[item["theme"]]) for item in results]
+            result["valid"] = not any("error" in item for item in results)
+            if activate and result["valid"]:
+                result["applied"] = cmd_apply(themes[0])
+        return result
+
+    result = update(image)
+    if watch:
+        last = [result]
+        def on_change(path):
+            try:
+                change = last[0] = update(path)
+                change = dict(change, command="wallpaper", ok=change.get("valid", True))
+            except (CommandError, ThemeError, CompileError, WallpaperError, PaletteError, OSError) as e:
+                change = {"command": "wallpaper", "ok": False, "error": str(e)}
+            print(format_text(change), flush=True)
+        # Igual que bars --watch: al cerrar la sesión llega SIGTERM y se termina limpiamente
+        stop = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.append(signum))
+        print(format_text(dict(result, command="wallpaper", ok=True)), flush=True)
+        try:
+            watch_wallpaper(on_change, should_stop=lambda: bool(stop))
+        except KeyboardInterrupt:
+            pass
+        result = last[0]
+    return result
+
+COMMANDS = {
+    "list-themes": cmd_list_themes,
+    "validate": cmd_validate,
+    "apply": cmd_apply,
+    "compile": cmd_compile,
+    "rollback": cmd_rollback,
+    "generations": cmd_generations,
+    "switch": cmd_switch,
+    "import": cmd_import,
+    "fork": cmd_fork,
+    "overlay": cmd_overlay,
+    "export": cmd_export,
+    "previews": cmd_previews,
+    "bars": cmd_bars,
+    "profile": cmd_profile,
+    "scripts": cmd_scripts,
+    "palette": cmd_palette,
+    "wallpaper": cmd_wallpaper,
+}
+
+def run_command(command, **kwargs):
+    """Ejecuta una orden y devuelve su resultado con "ok" y, si falla, "error" """
+    handler = COMMANDS.get(command)
+    try:
+        if handler is None:
+            raise CommandError(f"Orden desconocida: {command}")
+        try:
+            inspect.signature(handler).bind(**kwargs)
+        except TypeError as e:
+            raise CommandError(f"Argumentos no válidos para {command}: {e}") from e
+        result = handler(**kwargs)
+    except (CommandError, ThemeError, CompileError, PanelSwitchError, ScriptCacheError, PaletteError,
+            WallpaperError, OSError) as e:
+        return {"command": command, "ok": False, "error": str(e)}
+
+    result = dict(result, command=command)
+    result["ok"] = result.get("valid", True)
+    return result
+
+def load_manifest(path):
+    try:
+        if path == "-":
+            manifest = json.load(sys.stdin)
+        else:
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"No se pudo leer el manifiesto {path}: {e}") from e
+
+    operations = manifest.get("operations") if isinstance(manifest, dict) else manifest
+    if not isinstance(operations, list) or not all(isinstance(op, dict) and "command" in op for op in operations):
+        raise CommandError("El manifiesto debe ser una lista de operaciones con la clave \"command\"")
+    return operations
+
+def run_batch(operations, stop_on_error=False):
+    results = []
+    for operation in operations:
+        kwargs = {key.replace("-", "_"): value for key, value in operation.items() if key != "command"}
+        result = run_command(operation["command"], **kwargs)
+        results.append(result)
+        if not result["ok"] and stop_on_error:
+            break
+    return {"command": "batch", "results": results, "ok": all(result["ok"] for result in results)}
+
+def format_text(result):
+    """Salida legible para una persona"""
+    if not result["ok"] and "error" in result:
+        return f"Error: {result['error']}"
+
+    command = result["command"]
+    if command == "batch":
+        return "\n".join(f"[{result['command']}] {format_text(result)}" for result in result["results"])
+    if command == "list-themes":
+        return "\n".join(f"{theme['name']}{' (usuario)' if theme['type'] == 'user' else ''}"
+                         f"{' - ' + theme['summary'] if theme['summary'] else ''}" for theme in result["themes"])
+    if command == "validate":
+        lines = []
+        for item in result["results"]:
+            lines.append(f"{item['theme']['name']}: {'válido' if item['valid'] else 'con errores'}")
+            lines.extend(f"  {issue['severity']}: {issue['message']}" for issue in item["issues"])
+            if item["modified"]:
+                lines.append(f"  modificados desde la importación: {', '.join(item['modified'])}")
+        return "\n".join(lines)
+    if command == "apply":
+        text = f"Tema {result['theme']['name']} activado en {result['config']} (generación {result['generation']})"
+        if result["reload"]:
+            text += f"; polybar recargado ({result['reload']['method']}, {result['reload']['ms']} ms)"
+        return "\n".join([text] + [f"  aviso: {warning}" for warning in result["warnings"]])
+    if command == "rollback":
+        text = f"Restaurada la generación {result['generation']}{' (' + result['theme'] + ')' if result['theme'] else ''}"
+        if result["reload"]:
+            text += f"; polybar recargado ({result['reload']['method']}, {result['reload']['ms']} ms)"
+        return text
+    if command == "generations":
+        return "\n".join(f"{'*' if item['current'] else ' '} {item['number']:>4}  {item.get('theme') or '-'}"
+                         for item in result["generations"])
+    if command == "compile":
+        text = (f"Tema {result['theme']['name']} compilado en {result['path']}: "
+                f"{result['source_lines']} líneas -> {result['lines']}{' (en caché)' if result['cached'] else ''}")
+        return "\n".join([text] + [f"  aviso: {warning}" for warning in result["warnings"]])
+    if command == "switch":
+        return f"Panel cambiado a {result['panel']}"
+    if command in ("import", "fork"):
+        return (f"Tema {result['theme']} {'importado' if command == 'import' else 'copiado'} en {result['path']}: "
+                f"{result['files']} archivos, {result['linked']} compartidos, "
+                f"{result['copied']} copiados ({result['bytes_copied']} bytes)")
+    if command == "overlay":
+        return f"Tema {result['theme']} creado en {result['path']} sobre {result['base']['name']}"
+    if command == "export":
+        return f"Tema {result['theme']['name']} exportado a {result['archive']}"
+    if command == "bars":
+        lines = [f"{report['monitor'] or 'barra'}: {report['state']}"
+                 f"{' en ' + str(report['ms']) + ' ms' if 'ms' in report else ''}" for report in result["started"]]
+        lines.extend(f"{name}: detenida (monitor desconectado)" for name in result["stopped"])
+        lines.extend(f"{name}: sin cambios" for name in result["kept"])
+        return "\n".join(lines)
+    if command == "profile":
+        lines = [f"{item['name']:<16} {item['type'] or '-':<22} "
+                 f"{(format(item['interval'], 'g') + ' s') if item['interval'] else item['note']:<24} "
+                 f"{item['wakeups']:>6.2f} desp/s {item['syscalls']:>7.1f} llamadas/s" for item in result["modules"]]
+        lines.append(f"Total estimado: {result['wakeups']} despertares/s, {result['syscalls']} llamadas al sistema/s")
+        for pid, value in result.get("measured", {}).items():
+            lines.append(f"polybar {pid}: {value['cpu_percent']} % CPU, {value['rss_kb']} KiB, "
+                         f"{value['wakeups']} despertares/s medidos")
+        if "measured" in result and not result["measured"]:
+            lines.append("No hay barras en ejecución que medir")
+        if "low_power" in result:
+            low_power = result["low_power"]
+            lines.append(f"Tema {low_power['theme']} creado en {low_power['path']}: "
+                         f"{low_power['wakeups_before']:.2f} -> {low_power['wakeups_after']:.2f} despertares/s")
+            if low_power["wakeups_after"] > low_power["budget"]:
+                lines.append("  No se alcanza el máximo pedido sin pasar de los intervalos razonables de cada módulo")
+        return "\n".join(lines)
+    if command == "scripts":
+        if result["action"] == "get":
+            return result["output"]
+        if result["action"] == "serve":
+            return f"{result['scripts']} órdenes servidas" if result["scripts"] else "No hay órdenes registradas"
+        if result["action"] == "reload":
+            return "Registro releído" if result["running"] else "La caché de scripts no está en marcha"
+        lines = [f"{key}: cada {entry['ttl']:g} s: {entry['command']}"
+                 f"{' -> ' + entry['output'] if entry.get('output') is not None else ''}"
+                 for key, entry in result["scripts"].items()]
+        lines.append("En marcha" if result["running"] else "Sin arrancar")
+        return "\n".join(lines)
+    if command == "palette":
+        if result["action"] == "show":
+            return "\n".join(f"#{rgb}  {row['uses']:>3} usos  {', '.join(row['names']) or '-'}  ({', '.join(row['files'])})"
+                             for rgb, row in result["colors"].items())
+        return "\n".join(f"{item['name']}: " + (f"error: {item['error']}" if "error" in item else
+                         f"{item['recolored']} valores cambiados en {len(item['changed'])} archivos")
+                         for item in result["results"])
+    if command == "wallpaper":
+        lines = [f"{result['image']} ({result['method']}{', en caché' if result['cached'] else ''}):"]
+        lines.extend(f"  {name:<16} {color}" for name, color in result["palette"].items())
+        lines.extend(f"{item['name']}: " + (f"error: {item['error']}" if "error" in item else
+                     f"{item['recolored']} valores cambiados en {len(item['changed'])} archivos")
+                     for item in result["results"])
+        if result["applied"]:
+            lines.append(format_text(dict(result["applied"], command="apply", ok=True)))
+        return "\n".join(lines)
+    if command == "previews":
+        lines = [f"{item['name']}: {'error: ' + item['error'] if 'error' in item else item['path']}"
+                 f"{' (en caché)' if item['cached'] else ''}" for item in result["results"]]
+        lines.append(f"{result['generated']} generadas, {result['failed']} con errores")
+        return "\n".join(lines)
+    return json.dumps(result, ensure_ascii=False)
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Gestión de paneles y temas de polybar sin interfaz gráfica")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="salida en JSON")
+
+    sub = subparsers.add_parser("list-themes", parents=[common], help="lista los temas disponibles")
+    sub.add_argument("--revalidate", action="store_true", help="vuelve a examinar cada directorio de tema")
+
+    sub = subparsers.add_parser("validate", parents=[common], help="valida uno o varios temas")
+    sub.add_argument("themes", nargs="+", metavar="tema")
+
+    sub = subparsers.add_parser("apply", parents=[common], help="instala un tema como configuración activa")
+    sub.add_argument("theme", metavar="tema")
+    sub.add_argument("--force", action="store_true", help="aplica el tema aunque tenga errores")
+    sub.add_argument("--no-reload", dest="reload", action="store_false", help="no recarga polybar")
+
+    sub = subparsers.add_parser("rollback", parents=[common], help="vuelve a la configuración aplicada antes")
+    sub.add_argument("--no-reload", dest="reload", action="store_false", help="no recarga polybar")
+
+    sub = subparsers.add_parser("generations", parents=[common], help="lista las configuraciones aplicadas")
+
+    sub = subparsers.add_parser("compile", parents=[common], help="aplana un tema y sus include en un solo archivo")
+    sub.add_argument("theme", metavar="tema")
+
+    sub = subparsers.add_parser("switch", parents=[common], help="cambia el panel activo")
+    sub.add_argument("panel", choices=PANELS)
+    sub.add_argument("--default-config", metavar="config",
+                     help="configuración de polybar que se activa si no hay ninguna")
+
+    sub = subparsers.add_parser("import", parents=[common],
+                                help="importa un archivo de configuración, un directorio o un .tar/.zip como tema de usuario")
+    sub.add_argument("source", metavar="origen")
+    sub.add_argument("--name", help="nombre del tema (por defecto, el del origen)")
+    sub.add_argument("--overwrite", action="store_true", help="sustituye el tema si ya existe")
+
+    sub = subparsers.add_parser("fork", parents=[common], help="crea una copia de usuario editable de un tema")
+    sub.add_argument("theme", metavar="tema")
+    sub.add_argument("--name", help="nombre de la copia (por defecto, el mismo)")
+    sub.add_argument("--overwrite", action="store_true", help="sustituye la copia si ya existe")
+
+    sub = subparsers.add_parser("overlay", parents=[common],
+                                help="crea un tema de usuario que guarda solo los cambios sobre otro")
+    sub.add_argument("theme", metavar="tema")
+    sub.add_argument("--name", help="nombre del tema nuevo (por defecto, el mismo)")
+    sub.add_argument("--overwrite", action="store_true", help="sustituye el tema si ya existe")
+
+    sub = subparsers.add_parser("export", parents=[common], help="empaqueta un tema en .tar.gz o .zip")
+    sub.add_argument("theme", metavar="tema")
+    sub.add_argument("destination", metavar="destino")
+
+    sub = subparsers.add_parser("previews", parents=[common],
+                                help="genera vistas previas en una pantalla virtual para los temas sin preview.png")
+    sub.add_argument("themes", nargs="*", metavar="tema", help="temas (por defecto, todos)")
+    sub.add_argument("--into-theme", action="store_true", help="copia cada captura como preview.png del tema")
+    sub.add_argument("--force", action="store_true", help="vuelve a dibujar aunque haya una vista previa vigente")
+    sub.add_argument("--jobs", type=int, default=MAX_WORKERS, help="capturas simultáneas")
+
+    sub = subparsers.add_parser("bars", parents=[common],
+                                help="lanza una barra por monitor (solo en los que no tengan)")
+    sub.add_argument("--restart", action="store_true", help="sustituye todas las barras en ejecución")
+    sub.add_argument("--watch", action="store_true",
+                     help="sigue en marcha y ajusta las barras al conectar o desconectar monitores")
+
+    sub = subparsers.add_parser("profile", parents=[common],
+                                help="estima los despertares y llamadas al sistema por segundo de cada módulo")
+    sub.add_argument("theme", metavar="tema")
+    sub.add_argument("--measure", type=float, default=0.0, metavar="SEGUNDOS",
+                     help="mide además la CPU y la memoria reales de las barras en ejecución")
+    sub.add_argument("--budget", type=float, metavar="DESPERTARES",
+                     help="crea un tema de bajo consumo con ese máximo de despertares por segundo")
+    sub.add_argument("--name", help="nombre del tema de bajo consumo (por defecto, <tema>-bajo-consumo)")
+    sub.add_argument("--overwrite", action="store_true", help="sustituye el tema de bajo consumo si ya existe")
+
+    sub = subparsers.add_parser("scripts", parents=[common],
+                                help="caché residente de la salida de los módulos custom/script")
+    sub.add_argument("action", nargs="?", default="list", choices=("list", "serve", "get", "reload"),
+                     metavar="acción", help="list (por defecto), serve, get o reload")
+    sub.add_argument("key", nargs="?", metavar="clave", help="clave para get")
+
+    sub = subparsers.add_parser("palette", parents=[common], help="muestra o cambia los colores de los temas")
+    actions = sub.add_subparsers(dest="action", required=True)
+    action = actions.add_parser("show", parents=[common], help="lista los colores de un tema y dónde se usan")
+    action.add_argument("themes", nargs=1, metavar="tema")
+    action = actions.add_parser("apply", parents=[common], help="aplica una paleta a uno o varios temas")
+    action.add_argument("themes", nargs="*", metavar="tema", help="temas (por defecto, todos los del usuario)")
+    action.add_argument("--palette", metavar="archivo",
+                        help="paleta: JSON {nombre o #color: #color} o un .ini con una sección [color]")
+    action.add_argument("--set", dest="colors", action="append", default=[], metavar="CLAVE=#COLOR",
+                        help="cambia un color con nombre (background) o un valor (#2f343f); se puede repetir")
+
+    sub = subparsers.add_parser("wallpaper", parents=[common],
+                                help="saca una paleta del fondo de pantalla y la aplica a los temas indicados")
+    sub.add_argument("themes", nargs="*", metavar="tema", help="temas que recolorear (sin temas solo se muestra)")
+    sub.add_argument("--image", metavar="imagen", help="imagen (por defecto, el fondo actual de nitrogen o feh)")
+    sub.add_argument("--activate", action="store_true", help="activa el tema recoloreado y recarga polybar")
+    sub.add_argument("--watch", action="store_true",
+                     help="sigue en marcha y vuelve a aplicar la paleta cada vez que cambia el fondo")
+
+    sub = subparsers.add_parser("batch", parents=[common], help="ejecuta las operaciones de un manifiesto JSON ('-' para stdin)")
+    sub.add_argument("manifest", metavar="manifiesto")
+    sub.add_argument("--stop-on-error", action="store_true", help="se detiene en la primera operación fallida")
+    return parser
+
+def main(argv):
+    args = vars(build_parser(os.path.basename(argv[0])).parse_args(argv[1:]))
+    as_json = args.pop("json")
+    command = args.pop("command")
+
+    if command == "batch":
+        try:
+            result = run_batch(load_manifest(args["manifest"]), args["stop_on_error"])
+        except CommandError as e:
+            result = {"command": "batch", "ok": False, "error": str(e)}
+    else:
+        result = run_command(command, **args)
+
+    if as_json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        text = format_text(result)
+        if text:
+            print(text, file=sys.stdout if result["ok"] or "error" not in result else sys.stderr)
+    return 0 if result["ok"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -2,81 +2,82 @@
 
 import os
 import sys
-import subprocess
-import site
-import importlib.util
-
-# Función para verificar si un módulo está instalado
-def is_module_installed(module_name):
-    return importlib.util.find_spec(module_name) is not None
-
-# Función para intentar importar PyQt5 de diferentes maneras
-def import_pyqt5():
-    # Intento 1: Importación directa
-    try:
-        from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                                    QHBoxLayout, QLabel, QPushButton, QRadioButton,
-                                    QButtonGroup, QDialog, QMessageBox, QFrame, QInputDialog, QLineEdit)
-        from PyQt5.QtGui import QIcon, QPixmap, QFont, QPainter, QColor
-        from PyQt5.QtCore import Qt, QProcess
-        return True
-    except ImportError:
-        pass
-
-    # Intento 2: Buscar en rutas adicionales
-    try:
-        site_packages = site.getsitepackages()
-        for path in site_packages:
-            if path not in sys.path:
-                sys.path.append(path)
-
-        from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                                    QHBoxLayout, QLabel, QPushButton, QRadioButton,
-                                    QButtonGroup, QDialog, QMessageBox, QFrame, QInputDialog, QLineEdit)
-        from PyQt5.QtGui import QIcon, QPixmap, QFont, QPainter, QColor
-        from PyQt5.QtCore import Qt, QProcess
-        return True
-    except ImportError:
-        pass
+import time
+import shutil
+
+# Con una orden (list-themes, apply, switch...) se usa la línea de órdenes, sin PyQt5
+if __name__ == "__main__" and len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+    from panel_cli import main as cli_main
+    sys.exit(cli_main(sys.argv))
+
+# --profile-startup: traza de arranque al estilo de -X importtime y salida tras el primer pintado
+PROFILE_STARTUP_FLAG = "--profile-startup"
+PROFILE_STARTUP = PROFILE_STARTUP_FLAG in sys.argv[1:]
+if PROFILE_STARTUP and not sys.flags.importtime and __name__ == "__main__":
+    # Relanzar con -X importtime para que las importaciones aparezcan en la misma traza
+    os.execv(sys.executable, [sys.executable, "-X", "importtime"] + sys.argv)
+
+class StartupTrace:
+    """Fases del arranque en el formato de -X importtime (microsegundos, por stderr)"""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        own = int((now - self.last) * 1e6)
+        cumulative = int((now - self.start) * 1e6)
+        self.last = now
+        print(f"startup time: {own:>9} | {cumulative:>10} | {phase}", file=sys.stderr, flush=True)
+
+STARTUP_TRACE = StartupTrace(PROFILE_STARTUP)
+
+# --daemon: instancia residente que mantiene la ventana construida en segundo plano
+DAEMON_FLAG = "--daemon"
+DAEMON = DAEMON_FLAG in sys.argv[1:]
+if __name__ == "__main__" and not PROFILE_STARTUP:
+    from single_instance import notify_running_instance, COMMAND_SHOW, COMMAND_PING
+    # Si ya hay una instancia residente se le pide que muestre su ventana, sin cargar PyQt5
+    if notify_running_instance(COMMAND_PING if DAEMON else COMMAND_SHOW):
+        sys.exit(0)
+
+def pyqt5_available():
+    """True si PyQt5 se puede importar; lo busca sin cargar Qt"""
+    import importlib.util
 
-    # Intento 3: Buscar en el entorno virtual si existe
     try:
-        venv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'myenv')
-        if os.path.exists(venv_path):
-            venv_site_packages = os.path.join(venv_path, 'lib', 'python3.13', 'site-packages')
-            if os.path.exists(venv_site_packages) and venv_site_packages not in sys.path:
-                sys.path.append(venv_site_packages)
-
-            from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                                        QHBoxLayout, QLabel, QPushButton, QRadioButton,
-                                        QButtonGroup, QDialog, QMessageBox, QFrame, QInputDialog, QLineEdit)
-            from PyQt5.QtGui import QIcon, QPixmap, QFont, QPainter, QColor
-            from PyQt5.QtCore import Qt, QProcess
-            return True
+        return importlib.util.find_spec("PyQt5.QtWidgets") is not None
     except ImportError:
-        pass
+        # Sin el paquete PyQt5 find_spec no puede buscar el submódulo
+        return False
 
-    # Si llegamos aquí, no se pudo importar PyQt5
-    return False
+def install_pyqt5():
+    """Intenta instalar PyQt5 con pacman; devuelve True si después se puede importar"""
+    import subprocess
+    import importlib
 
-# Intentar importar PyQt5
-if not import_pyqt5():
     print("PyQt5 no está instalado. Intentando instalar...")
     try:
         subprocess.run(["sudo", "pacman", "-S", "--noconfirm", "python-pyqt5"], check=True)
-        if not import_pyqt5():
-            print("No se pudo instalar PyQt5. Por favor, instálalo manualmente con 'sudo pacman -S python-pyqt5'")
-            sys.exit(1)
-    except subprocess.CalledProcessError:
-        print("No se pudo instalar PyQt5. Por favor, instálalo manualmente con 'sudo pacman -S python-pyqt5'")
-        sys.exit(1)
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    importlib.invalidate_caches()
+    return pyqt5_available()
+
+if not pyqt5_available() and not install_pyqt5():
+    print("No se pudo instalar PyQt5. Por favor, instálalo manualmente con 'sudo pacman -S python-pyqt5'")
+    sys.exit(1)
 
-# Ahora que PyQt5 está importado, podemos importar los módulos específicos
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QLabel, QPushButton, QRadioButton,
-                            QButtonGroup, QDialog, QMessageBox, QFrame, QInputDialog, QLineEdit)
-from PyQt5.QtGui import QIcon, QPixmap, QFont, QPainter, QColor
-from PyQt5.QtCore import Qt, QProcess
+                            QButtonGroup, QMessageBox, QFrame)
+from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtCore import Qt, QProcess, QObject, QEvent, QTimer
+
+STARTUP_TRACE.mark("PyQt5")
 
 # Determinar las rutas correctas según la instalación
 if os.path.exists("/usr/share/mabox-panel-selector"):
@@ -92,8 +93,6 @@ THEMES_DIR = os.path.join(BASE_DIR, "themes")
 TINT2_PREVIEW = os.path.join(RESOURCES_DIR, "tint2_preview.png")
 POLYBAR_PREVIEW = os.path.join(RESOURCES_DIR, "polybar_preview.png")
 TINT2_CONFIG_PATH = "/usr/bin/tint2conf"
-SWITCH_POLYBAR_SCRIPT = os.path.join(BASE_DIR, "switch_to_polybar.sh")
-RESTORE_TINT2_SCRIPT = os.path.join(BASE_DIR, "restore_tint2.sh")
 
 # Crear imágenes de vista previa genéricas si no existen
 def create_generic_preview_images():
@@ -141,14 +140,11 @@ def create_generic_image(path, text, size, color):
             f.write("")
 
 class PanelSelector(QMainWindow):
-    def __init__(self):
+    def __init__(self, show=True):
         super().__init__()
-        self.initUI()
-
-    def initUI(self):
-        # Crear imágenes de vista previa si no existen
-        create_generic_preview_images()
+        self.initUI(show)
 
+    def initUI(self, show=True):
         # Configuración de la ventana principal
         self.setWindowTitle("Selector de Paneles - Mabox Linux")
         self.setGeometry(100, 100, 600, 400)
@@ -185,14 +181,10 @@ class PanelSelector(QMainWindow):
         tint2_layout = QVBoxLayout(tint2_widget)
 
         # Vista previa de Tint2
-        tint2_preview_label = QLabel()
-        if os.path.exists(TINT2_PREVIEW) and os.path.getsize(TINT2_PREVIEW) > 0:
-            tint2_pixmap = QPixmap(TINT2_PREVIEW)
-            tint2_preview_label.setPixmap(tint2_pixmap.scaled(200, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else:
-            tint2_preview_label.setText("Vista previa no disponible")
-        tint2_preview_label.setAlignment(Qt.AlignCenter)
-        tint2_layout.addWidget(tint2_preview_label)
+        self.tint2_preview_label = QLabel()
+        self.tint2_preview_label.setMinimumSize(200, 150)
+        self.tint2_preview_label.setAlignment(Qt.AlignCenter)
+        tint2_layout.addWidget(self.tint2_preview_label)
 
         # Radio button para Tint2
         self.tint2_radio = QRadioButton("Tint2")
@@ -223,14 +215,10 @@ class PanelSelector(QMainWindow):
         polybar_layout = QVBoxLayout(polybar_widget)
 
         # Vista previa de Polybar
-        polybar_preview_label = QLabel()
-        if os.path.exists(POLYBAR_PREVIEW) and os.path.getsize(POLYBAR_PREVIEW) > 0:
-            polybar_pixmap = QPixmap(POLYBAR_PREVIEW)
-            polybar_preview_label.setPixmap(polybar_pixmap.scaled(200, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else:
-            polybar_preview_label.setText("Vista previa no disponible")
-        polybar_preview_label.setAlignment(Qt.AlignCenter)
-        polybar_layout.addWidget(polybar_preview_label)
+        self.polybar_preview_label = QLabel()
+        self.polybar_preview_label.setMinimumSize(200, 150)
+        self.polybar_preview_label.setAlignment(Qt.AlignCenter)
+        polybar_layout.addWidget(self.polybar_preview_label)
 
         # Radio button para Polybar
         self.polybar_radio = QRadioButton("Polybar")
@@ -261,12 +249,16 @@ class PanelSelector(QMainWindow):
         # Botones de acción
         buttons_layout = QHBoxLayout()
 
+        self.restore_backup_btn = QPushButton("Restaurar autostart anterior")
+        self.restore_backup_btn.clicked.connect(self.restore_previous_autostart)
+
         self.apply_btn = QPushButton("Aplicar")
         self.apply_btn.clicked.connect(self.apply_panel)
 
         self.close_btn = QPushButton("Cerrar")
         self.close_btn.clicked.connect(self.close)
 
+        buttons_layout.addWidget(self.restore_backup_btn)
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.apply_btn)
         buttons_layout.addWidget(self.close_btn)
@@ -276,8 +268,21 @@ class PanelSelector(QMainWindow):
         # Seleccionar Tint2 por defecto (es el panel predeterminado de Mabox)
         self.tint2_radio.setChecked(True)
 
-        # Mostrar la ventana
-        self.show()
+        # Mostrar la ventana; las vistas previas (y PIL, si hay que generarlas) se cargan después
+        if show:
+            self.show()
+        QTimer.singleShot(0, self.load_previews)
+
+    def load_previews(self):
+        # Crear imágenes de vista previa si no existen
+        create_generic_preview_images()
+        for label, path in ((self.tint2_preview_label, TINT2_PREVIEW),
+                            (self.polybar_preview_label, POLYBAR_PREVIEW)):
+            pixmap = QPixmap(path) if os.path.exists(path) and os.path.getsize(path) > 0 else QPixmap()
+            if pixmap.isNull():
+                label.setText("Vista previa no disponible")
+            else:
+                label.setPixmap(pixmap.scaled(200, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
 
     def configure_tint2(self):
         if not os.path.exists(TINT2_CONFIG_PATH):
@@ -292,67 +297,62 @@ class PanelSelector(QMainWindow):
 
     def configure_polybar(self):
         # Verificar si polybar está instalado
-        try:
-            result = subprocess.run(["which", "polybar"], capture_output=True, text=True)
-            if result.returncode != 0:
-                reply = QMessageBox.question(
-                    self,
-                    "Polybar no encontrado",
-                    "Polybar no está instalado. ¿Deseas instalarlo ahora?",
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.Yes
-                )
-
-                if reply == QMessageBox.Yes:
-                    self.install_polybar()
-                else:
-                    return
-
-            # Importar el módulo de configuración de polybar
-            try:
-                from polybar_config import PolybarConfigDialog
-                dialog = PolybarConfigDialog()
-                dialog.exec_()
-            except ImportError as e:
-                QMessageBox.critical(self, "Error", f"No se pudo cargar el configurador de Polybar: {str(e)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al verificar Polybar: {str(e)}")
-
-    def install_polybar(self):
-        try:
-            msg = QMessageBox()
-            msg.setWindowTitle("Instalando Polybar")
-            msg.setText("Instalando Polybar. Esto puede tardar unos minutos...")
-            msg.setStandardButtons(QMessageBox.NoButton)
-            msg.show()
-            QApplication.processEvents()
-
-            process = subprocess.run(["sudo", "pacman", "-S", "--noconfirm", "polybar"], check=True)
+        if shutil.which("polybar") is None:
+            reply = QMessageBox.question(
+                self,
+                "Polybar no encontrado",
+                "Polybar no está instalado. ¿Deseas instalarlo ahora?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.Yes
+            )
+
+            if reply == QMessageBox.Yes:
+                self.install_polybar(then=self.open_polybar_config)
+            return
 
-            msg.close()
+        self.open_polybar_config()
 
+    def open_polybar_config(self):
+        # Importar el módulo de configuración de polybar
+        try:
+            from polybar_config import PolybarConfigDialog
+            # La ventana se muestra sola; se guarda la referencia para que no se destruya
+            self.polybar_config_window = PolybarConfigDialog()
+        except ImportError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo cargar el configurador de Polybar: {str(e)}")
+
+    def install_polybar(self, then=None):
+        def finished(exit_code, cancelled, dialog):
+            if cancelled:
+                return
+            if exit_code != 0:
+                QMessageBox.critical(self, "Error de instalación",
+                                     f"No se pudo instalar Polybar: {dialog.error_output() or exit_code}")
+                return
+
+            dialog.close()
             QMessageBox.information(self, "Instalación completada", "Polybar se ha instalado correctamente.")
 
             # Crear configuración inicial si no existe
             self.create_initial_polybar_config()
 
-        except subprocess.CalledProcessError as e:
-            QMessageBox.critical(self, "Error de instalación", f"No se pudo instalar Polybar: {str(e)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error durante la instalación: {str(e)}")
+            if then is not None:
+                then()
+
+        from job_runner import run_job
+
+        run_job(self, "Instalando Polybar", "sudo", ["pacman", "-S", "--noconfirm", "polybar"], finished)
 
     def create_initial_polybar_config(self):
-        try:
-            # Crear directorio de configuración si no existe
-            config_dir = os.path.expanduser("~/.config/polybar")
-            os.makedirs(config_dir, exist_ok=True)
+        from generations import GenerationStore
 
-            # Copiar configuración predeterminada si existe en el paquete
+        try:
+            # Activar la configuración predeterminada si existe en el paquete; la
+            # anterior queda guardada como generación y se puede recuperar
             default_config = os.path.join(THEMES_DIR, "default", "config.ini")
             if os.path.exists(default_config):
-                with open(default_config, 'r') as src:
-                    with open(os.path.join(config_dir, "config"), 'w') as dst:
-                        dst.write(src.read())
+                with open(default_config, 'rb') as src:
+                    GenerationStore().commit(src.read(), theme="default")
                 QMessageBox.information(self, "Configuración creada", "Se ha creado una configuración inicial para Polybar.")
         except Exception as e:
             QMessageBox.warning(self, "Advertencia", f"No se pudo crear la configuración inicial: {str(e)}")
@@ -369,6 +369,57 @@ class PanelSelector(QMainWindow):
         elif selected_id == 2:  # Polybar
             self.switch_to_polybar()
 
+    def run_panel_switch(self, panel, success_message, error_message):
+        """Cambia el panel con el motor en Python (sin scripts de bash) en segundo plano.
+
+        Detener el panel anterior y esperar a las barras nuevas lleva varios
+        segundos, así que se hace con 'panel_cli.py switch' mediante job_runner.
+        """
+        def finished(exit_code, cancelled, dialog):
+            self.apply_btn.setEnabled(True)
+            if cancelled:
+                return
+            if exit_code != 0:
+                error = dialog.error_output().removeprefix("Error: ")
+                QMessageBox.critical(self, "Error", f"{error_message}: {error or exit_code}")
+                return
+
+            dialog.close()
+            QMessageBox.information(self, "Éxito", success_message)
+
+        from job_runner import run_job
+
+        cli = os.path.join(BASE_DIR, "panel_cli.py")
+        default_config = os.path.join(THEMES_DIR, "default", "config.ini")
+        self.apply_btn.setEnabled(False)
+        run_job(self, "Cambiando de panel", sys.executable,
+                [cli, "switch", panel, "--default-config", default_config], finished)
+
+    def restore_previous_autostart(self):
+        from panel_switch import restore_previous_autostart, PanelSwitchError
+
+        reply = QMessageBox.question(
+            self,
+            "Restaurar autostart",
+            "¿Deseas restaurar la versión anterior del autostart de Openbox?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            restored = restore_previous_autostart()
+        except PanelSwitchError as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+
+        if restored:
+            QMessageBox.information(self, "Éxito", "Se ha restaurado la versión anterior del autostart.")
+        else:
+            QMessageBox.information(self, "Sin copias", "No hay ninguna copia anterior del autostart.")
+
     def restore_tint2(self):
         reply = QMessageBox.question(
             self,
@@ -379,24 +430,8 @@ class PanelSelector(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            try:
-                if not os.path.exists(RESTORE_TINT2_SCRIPT):
-                    QMessageBox.critical(self, "Error", f"No se encontró el script {RESTORE_TINT2_SCRIPT}")
-                    return
-
-                # Hacer el script ejecutable si no lo es
-                if not os.access(RESTORE_TINT2_SCRIPT, os.X_OK):
-                    subprocess.run(["chmod", "+x", RESTORE_TINT2_SCRIPT], check=True)
-
-                # Ejecutar el script directamente (sin sudo)
-                process = subprocess.run([RESTORE_TINT2_SCRIPT], capture_output=True, text=True)
-
-                if process.returncode == 0:
-                    QMessageBox.information(self, "Éxito", "Tint2 ha sido restaurado como el panel predeterminado.")
-                else:
-                    QMessageBox.critical(self, "Error", f"No se pudo restaurar Tint2: {process.stderr}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error al restaurar Tint2: {str(e)}")
+            self.run_panel_switch("tint2", "Tint2 ha sido restaurado como el panel predeterminado.",
+                                  "No se pudo restaurar Tint2")
 
     def switch_to_polybar(self):
         reply = QMessageBox.question(
@@ -407,41 +442,42 @@ class PanelSelector(QMainWindow):
             QMessageBox.Yes
         )
 
-        if reply == QMessageBox.Yes:
-            try:
-                # Verificar si polybar está instalado
-                result = subprocess.run(["which", "polybar"], capture_output=True, text=True)
-                if result.returncode != 0:
-                    reply = QMessageBox.question(
-                        self,
-                        "Polybar no encontrado",
-                        "Polybar no está instalado. ¿Deseas instalarlo ahora?",
-                        QMessageBox.Yes | QMessageBox.No,
-                        QMessageBox.Yes
-                    )
-
-                    if reply == QMessageBox.Yes:
-                        self.install_polybar()
-                    else:
-                        return
-
-                if not os.path.exists(SWITCH_POLYBAR_SCRIPT):
-                    QMessageBox.critical(self, "Error", f"No se encontró el script {SWITCH_POLYBAR_SCRIPT}")
-                    return
-
-                # Hacer el script ejecutable si no lo es
-                if not os.access(SWITCH_POLYBAR_SCRIPT, os.X_OK):
-                    subprocess.run(["chmod", "+x", SWITCH_POLYBAR_SCRIPT], check=True)
-
-                # Ejecutar el script directamente (sin sudo)
-                process = subprocess.run([SWITCH_POLYBAR_SCRIPT], capture_output=True, text=True)
-
-                if process.returncode == 0:
-                    QMessageBox.information(self, "Éxito", "Polybar ha sido establecido como el panel predeterminado.")
-                else:
-                    QMessageBox.critical(self, "Error", f"No se pudo establecer Polybar: {process.stderr}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error al cambiar a Polybar: {str(e)}")
+        if reply != QMessageBox.Yes:
+            return
+
+        def run_switch():
+            self.run_panel_switch("polybar", "Polybar ha sido establecido como el panel predeterminado.",
+                                  "No se pudo establecer Polybar")
+
+        # Verificar si polybar está instalado
+        if shutil.which("polybar") is None:
+            reply = QMessageBox.question(
+                self,
+                "Polybar no encontrado",
+                "Polybar no está instalado. ¿Deseas instalarlo ahora?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.Yes
+            )
+
+            if reply == QMessageBox.Yes:
+                self.install_polybar(then=run_switch)
+            return
+
+        run_switch()
+
+class FirstPaintWatcher(QObject):
+    """Anota en la traza el primer pintado de la ventana y cierra la aplicación"""
+
+    def __init__(self, trace):
+        super().__init__()
+        self.trace = trace
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            QApplication.instance().removeEventFilter(self)
+            self.trace.mark("primer pintado")
+            QTimer.singleShot(0, QApplication.quit)
+        return False
 
 if __name__ == "__main__":
     # Verificar si se está ejecutando como root
@@ -449,6 +485,25 @@ if __name__ == "__main__":
         print("Este programa no debe ejecutarse como root.")
         sys.exit(1)
 
-    app = QApplication(sys.argv)
+    STARTUP_TRACE.mark("módulos")
+    app = QApplication([arg for arg in sys.argv if arg not in (PROFILE_STARTUP_FLAG, DAEMON_FLAG)])
+    STARTUP_TRACE.mark("QApplication")
+
+    if DAEMON and not PROFILE_STARTUP:
+        from resident import ResidentInstance
+
+        # Cerrar la ventana solo la oculta; el proceso sigue esperando órdenes
+        app.setQuitOnLastWindowClosed(False)
+        resident = ResidentInstance(lambda: PanelSelector(show=False))
+        if not resident.listen():
+            print(f"No se pudo crear el socket de la instancia residente: {resident.server.errorString()}")
+            sys.exit(1)
+        resident.prebuild()
+        sys.exit(app.exec_())
+
+    if PROFILE_STARTUP:
+        watcher = FirstPaintWatcher(STARTUP_TRACE)
+        app.installEventFilter(watcher)
     window = PanelSelector()
-    sys.exit(app.exec_())
\ No newline at end of file
+    STARTUP_TRACE.mark("ventana creada")
+    sys.exit(app.exec_())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import shutil
+import signal
+import subprocess
+
+from paths import HOME, CONFIG_DIR, THEMES_DIR
+from fileutil import write_atomic
+from backup_store import BackupStore
+from generations import GenerationStore, GenerationError
+from process_supervisor import find_processes, command_lines, get_supervisor
+from bar_orchestrator import get_orchestrator
+
+AUTOSTART_FILE = os.path.join(HOME, ".config", "openbox", "autostart")
+DEFAULT_POLYBAR_CONFIG = os.path.join(THEMES_DIR, "default", "config.ini")
+
+# Bloque del autostart gestionado por el selector
+STANZA_BEGIN = "# >>> mabox-panel-selector >>>"
+STANZA_END = "# <<< mabox-panel-selector <<<"
+# Una barra por monitor, vigilando la conexión de monitores, y la caché de scripts de los
+# módulos (termina sola si no hay órdenes registradas); sin el selector, una sola barra.
+# if/else y no '|| polybar main': si bars --watch falla no debe quedar otra barra suelta
+POLYBAR_LAUNCH = ("[ -x /usr/bin/polybar ] && if [ -x /usr/bin/mabox-panel-selector ]; "
+                  "then mabox-panel-selector scripts serve & mabox-panel-selector bars --watch; "
+                  "else polybar main; fi &")
+# Prefijo de las líneas de tint2 desactivadas por el selector
+DISABLED_PREFIX = "#mabox-panel-selector# "
+
+# Línea que lanza tint2 (o un envoltorio como tint2-session), no una simple ruta que lo mencione
+TINT2_LAUNCH_RE = re.compile(r"(?:^|[\s;&|(])(?:\S*/)?[\w-]*tint2[\w-]*(?=[\s;&|)]|$)")
+# Líneas que añadían los antiguos scripts de bash (activas o comentadas por ellos)
+LEGACY_POLYBAR_RE = re.compile(r"^#*\s*(?:Polybar|\[ -x /usr/bin/polybar \] && polybar main &)\s*$")
+
+PANELS = ("polybar", "tint2")
+
+# Servicios de polybar que lanza el bloque del autostart: se detienen al volver a tint2
+SELECTOR_SCRIPTS = ("mabox-panel-selector", "panel_selector.py", "panel_cli.py")
+POLYBAR_SERVICES = (("bars", "--watch"), ("scripts", "serve"))
+
+class PanelSwitchError(Exception):
+    pass
+
+def is_tint2_launch(line):
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#") and bool(TINT2_LAUNCH_RE.search(stripped))
+
+def _commented_tint2_launch(line):
+    """Devuelve la orden si la línea es un lanzamiento de tint2 comentado con '#'"""
+    stripped = line.strip()
+    if not stripped.startswith("#") or stripped.startswith(DISABLED_PREFIX.strip()):
+        return None
+    command = stripped.lstrip("#").strip()
+    return command if is_tint2_launch(command) else None
+
+def toggle_autostart(text, panel):
+    """Devuelve el autostart con el panel indicado activado.
+
+    Solo se tocan las líneas que lanzan tint2 (marcadas con DISABLED_PREFIX al
+    desactivarlas) y el bloque gestionado; el resto del archivo se conserva tal
+    cual. Aplicar dos veces el mismo panel no produce cambios.
+    """
+    if panel not in PANELS:
+        raise PanelSwitchError(f"Panel desconocido: {panel}")
+
+    lines = text.splitlines()
+    body = []
+    in_stanza = False
+
+    for line in lines:
+        if line.strip() == STANZA_BEGIN:
+            in_stanza = True
+            continue
+        if line.strip() == STANZA_END:
+            in_stanza = False
+            continue
+        if in_stanza or LEGACY_POLYBAR_RE.match(line.strip()):
+            continue
+        body.append(line)
+
+    # Restos de los antiguos scripts: lanzamientos de tint2 comentados con un simple '#'
+    has_managed = any(line.startswith(DISABLED_PREFIX) for line in body)
+    has_active = any(is_tint2_launch(line) for line in body)
+
+    result = []
+    for line in body:
+        if panel == "polybar":
+            if is_tint2_launch(line):
+                line = DISABLED_PREFIX + line
+        else:
+            if line.startswith(DISABLED_PREFIX):
+                line = line[len(DISABLED_PREFIX):]
+            elif not has_managed and not has_active:
+                command = _commented_tint2_launch(line)
+                if command is not None:
+                    line = command
+        result.append(line)
+
+    # Quitar líneas en blanco finales antes de añadir el bloque
+    while result and not result[-1].strip():
+        result.pop()
+
+    if panel == "polybar":
+        if result:
+            result.append("")
+        result.extend([STANZA_BEGIN, POLYBAR_LAUNCH, STANZA_END])
+
+    return "\n".join(result) + "\n" if result else ""
+
+def autostart_backups(path=AUTOSTART_FILE):
+    """Almacén de copias de seguridad del autostart"""
+    return BackupStore(os.path.join(os.path.dirname(path), "autostart-backups"))
+
+def restore_previous_autostart(path=AUTOSTART_FILE):
+    """Restaura la versión anterior del autostart; devuelve False si no hay ninguna"""
+    store = autostart_backups(path)
+    try:
+        store.migrate_legacy(path)
+        return store.restore_previous(path) is not None
+    except OSError as e:
+        raise PanelSwitchError(f"No se pudo restaurar {path}: {e}") from e
+
+def update_autostart(panel, path=AUTOSTART_FILE):
+    """Activa el panel en el autostart de Openbox; devuelve True si el archivo cambió"""
+    try:
+        with open(path, 'r') as f:
+            text = f.read()
+    except FileNotFoundError as e:
+        raise PanelSwitchError(f"No se encontró el autostart de Openbox en {path}") from e
+    except OSError as e:
+        raise PanelSwitchError(f"No se pudo leer {path}: {e}") from e
+
+    new_text = toggle_autostart(text, panel)
+    if new_text == text:
+        return False
+
+    try:
+        if text:
+            store = autostart_backups(path)
+            # Las copias autostart.bak.<fecha> de versiones anteriores pasan al almacén
+            store.migrate_legacy(path)
+            store.save(text)
+        write_atomic(path, new_text)
+    except OSError as e:
+        raise PanelSwitchError(f"No se pudo escribir {path}: {e}") from e
+    return True
+
+def ensure_polybar_config(default_config=DEFAULT_POLYBAR_CONFIG):
+    """Copia la configuración predeterminada si el usuario no tiene ninguna"""
+    config_file = os.path.join(CONFIG_DIR, "config")
+    if os.path.exists(config_file) or not os.path.exists(default_config):
+        return
+    with open(default_config, 'rb') as f:
+        data = f.read()
+    try:
+        GenerationStore().commit(data, theme="default")
+    except GenerationError as e:
+        raise OSError(str(e)) from e
+
+def _terminate(name):
+    for pid in find_processes(name):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+def is_polybar_service(args):
+    """True si la línea de órdenes es 'mabox-panel-selector bars --watch' o 'scripts serve'"""
+    for i, arg in enumerate(args):
+        if os.path.basename(arg) in SELECTOR_SCRIPTS:
+            rest = args[i + 1:]
+            return any(rest[:1] == [command] and all(option in rest for option in options)
+                       for command, *options in POLYBAR_SERVICES)
+    return False
+
+def stop_polybar_services():
+    """Detiene el vigilante de monitores y la caché de scripts; devuelve sus PIDs.
+
+    Sin ellos, al conectar un monitor bars --watch volvería a lanzar polybar
+    junto a tint2. Ambos terminan limpiamente con SIGTERM.
+    """
+    pids = [pid for pid, args in command_lines().items() if pid != os.getpid() and is_polybar_service(args)]
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    return pids
+
+def _spawn(command):
+    try:
+        return subprocess.Popen(command, start_new_session=True, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+
+def switch_panel(panel, autostart=AUTOSTART_FILE, default_config=DEFAULT_POLYBAR_CONFIG, reconfigure=True):
+    """Cambia el panel activo.
+
+    Edita el autostart, detiene el panel anterior con señales (sin killall) y lanza
+    el nuevo (polybar: una barra por monitor) junto con 'openbox --reconfigure' en
+    paralelo.
+    """
+    if panel == "polybar" and shutil.which("polybar") is None:
+        raise PanelSwitchError("Polybar no está instalado.")
+
+    update_autostart(panel, autostart)
+
+    supervisor = get_supervisor()
+    started = []
+    if panel == "polybar":
+        try:
+            ensure_polybar_config(default_config)
+        except OSError as e:
+            raise PanelSwitchError(f"No se pudo crear la configuración de polybar: {e}") from e
+        _terminate("tint2")
+        started = get_orchestrator().start()
+    else:
+        stop_polybar_services()
+        _terminate("polybar")
+        if _spawn(["tint2"]) is None:
+            raise PanelSwitchError("No se pudo iniciar tint2.")
+
+    openbox = _spawn(["openbox", "--reconfigure"]) if reconfigure else None
+
+    if panel == "tint2":
+        # Esperar a que polybar termine mientras tint2 y openbox arrancan
+        supervisor.stop(timeout=2.0)
+    else:
+        get_orchestrator().wait_ready(started)
+    if openbox is not None:
+        try:
+            openbox.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+def main(argv):
+    if len(argv) != 2 or argv[1] not in PANELS:
+        print(f"Uso: {os.path.basename(argv[0])} polybar|tint2", file=sys.stderr)
+        return 2
+
+    try:
+        switch_panel(argv[1])
+    except PanelSwitchError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if argv[1] == "polybar":
+        print("Configuración cambiada correctamente. Polybar ha sido iniciado.")
+    else:
+        print("Configuración cambiada correctamente. Tint2 ha sido restaurado.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,9 @@
+import os
+
+# Rutas compartidas por la interfaz gráfica y los módulos sin PyQt5
+HOME = os.path.expanduser("~")
+CONFIG_DIR = os.path.join(HOME, ".config", "polybar")
+THEMES_DIR = "/usr/share/mabox-panel-selector/themes"
+USER_THEMES_DIR = os.path.join(CONFIG_DIR, "themes")
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(HOME, ".cache"),
+                         "mabox-panel-selector")
@@ -2,38 +2,128 @@
 
 import os
 import sys
-import json
-import shutil
-import subprocess
 
 try:
     from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                                QHBoxLayout, QLabel, QPushButton, QListWidget,
-                                QListWidgetItem, QSplitter, QTextEdit, QFileDialog,
-                                QMessageBox, QTabWidget, QScrollArea, QFrame,
-                                QDialog, QLineEdit, QFormLayout, QComboBox)
-    from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor, QTextCursor
-    from PyQt5.QtCore import Qt, QSize, QProcess, QTimer
+                                QHBoxLayout, QLabel, QPushButton, QListView,
+                                QSplitter, QTextEdit, QFileDialog,
+                                QMessageBox, QTabWidget, QFrame,
+                                QDialog, QLineEdit, QFormLayout, QTableWidget,
+                                QTableWidgetItem, QDoubleSpinBox, QHeaderView, QColorDialog)
+    from PyQt5.QtGui import QPixmap, QFont, QColor, QTextCursor
+    from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 except ImportError:
     print("PyQt5 no está instalado. Intentando instalar...")
     os.system("sudo pacman -S --noconfirm python-pyqt5")
     try:
         from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                                    QHBoxLayout, QLabel, QPushButton, QListWidget,
-                                    QListWidgetItem, QSplitter, QTextEdit, QFileDialog,
-                                    QMessageBox, QTabWidget, QScrollArea, QFrame,
-                                    QDialog, QLineEdit, QFormLayout, QComboBox)
-        from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor, QTextCursor
-        from PyQt5.QtCore import Qt, QSize, QProcess, QTimer
+                                    QHBoxLayout, QLabel, QPushButton, QListView,
+                                    QSplitter, QTextEdit, QFileDialog,
+                                    QMessageBox, QTabWidget, QFrame,
+                                    QDialog, QLineEdit, QFormLayout, QTableWidget,
+                                    QTableWidgetItem, QDoubleSpinBox, QHeaderView, QColorDialog)
+        from PyQt5.QtGui import QPixmap, QFont, QColor, QTextCursor
+        from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
     except ImportError:
         print("No se pudo instalar PyQt5. Por favor, instálalo manualmente con 'sudo pacman -S python-pyqt5'")
         sys.exit(1)
 
-# Rutas
-HOME = os.path.expanduser("~")
-CONFIG_DIR = os.path.join(HOME, ".config", "polybar")
-THEMES_DIR = "/usr/share/mabox-panel-selector/themes"
-USER_THEMES_DIR = os.path.join(CONFIG_DIR, "themes")
+from paths import HOME, USER_THEMES_DIR
+from theme_catalog import ThemeCatalog
+from thumbnails import ThumbnailCache, ICON_SIZE, PANE_SIZE
+from theme_model import ThemeListModel
+from theme_validator import validate_theme, has_errors
+from bar_orchestrator import get_orchestrator
+from fileutil import write_atomic
+from theme_actions import (ThemeError, theme_config_path, install_theme_config, rollback_theme, import_theme,
+                           create_overlay, create_low_power_theme, LOW_POWER_SUFFIX, fork_theme, default_catalog,
+                           THEME_ROOTS)
+from theme_import import archive_theme_name
+from theme_compiler import flatten, flatten_theme
+from overlay import OVERLAY_NAME, is_overlay, load_overlay_config, save_overlay_text
+from config_editor import ConfigEditor
+from live_preview import LivePreview
+from preview_render import missing_tools
+from theme_previews import theme_preview
+from palette import PaletteIndex, PaletteError, color_table, split_color, load_palette, apply_palette
+from wallpaper_palette import WallpaperError, wallpaper_palette
+from module_profiler import profile_theme, snapshot, usage, DEFAULT_BUDGET
+from script_cache import (convert_exec_lines, load_registry as load_script_registry, register as register_scripts,
+                          notify_service, ScriptCacheError)
+
+# Número máximo de problemas de validación que se muestran al usuario
+MAX_SHOWN_ISSUES = 12
+# Duración de la medición del consumo real de las barras
+MEASURE_MS = 3000
+
+def confirm_valid_theme(parent, theme_path, theme_name):
+    """Valida el tema antes de tocar polybar; devuelve True si se puede continuar"""
+    issues = validate_theme(theme_path)
+    if not has_errors(issues):
+        return True
+
+    details = "\n".join(str(issue) for issue in issues[:MAX_SHOWN_ISSUES])
+    if len(issues) > MAX_SHOWN_ISSUES:
+        details += f"\n... y {len(issues) - MAX_SHOWN_ISSUES} más"
+
+    reply = QMessageBox.question(parent, "Tema con errores",
+                                f"El tema {theme_name} tiene errores que impedirían iniciar polybar:\n\n"
+                                f"{details}\n\n¿Desea aplicarlo de todas formas?",
+                                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+    return reply == QMessageBox.Yes
+
+class _ReloadSignals(QObject):
+    # método, milisegundos, error ("" si no hubo)
+    finished = pyqtSignal(str, float, str)
+
+class _ReloadJob(QRunnable):
+    """Recarga las barras fuera del hilo de la interfaz: reiniciarlas espera a que arranquen"""
+
+    def __init__(self, signals):
+        super().__init__()
+        self.signals = signals
+
+    def run(self):
+        try:
+            method, elapsed = get_orchestrator().reload()
+            error = ""
+        except OSError as e:
+            method, elapsed, error = "", 0.0, str(e)
+        try:
+            self.signals.finished.emit(method, elapsed, error)
+        except RuntimeError:
+            # La ventana se cerró mientras tanto
+            pass
+
+# Un solo hilo: dos recargas seguidas no se pisan
+_reload_pool = None
+
+def restart_polybar(parent):
+    """Recarga polybar (por IPC o reiniciándolo) en segundo plano y muestra la latencia del cambio"""
+    global _reload_pool
+    if _reload_pool is None:
+        _reload_pool = QThreadPool()
+        _reload_pool.setMaxThreadCount(1)
+
+    window = parent if isinstance(parent, QMainWindow) else parent.parent()
+    if isinstance(window, QMainWindow):
+        window.statusBar().showMessage("Recargando polybar...")
+
+    signals = _ReloadSignals(parent)
+
+    def finished(method, elapsed, error):
+        signals.deleteLater()
+        if error:
+            QMessageBox.warning(parent, "Error", f"No se pudo iniciar polybar: {error}")
+            return
+        if isinstance(window, QMainWindow):
+            action = "recargado por IPC" if method == "ipc" else "reiniciado"
+            bars = len(get_orchestrator().running_bars()[0])
+            monitors = f" en {bars} monitores" if bars > 1 else ""
+            window.statusBar().showMessage(f"Polybar {action}{monitors} en {elapsed:.0f} ms", 5000)
+
+    signals.finished.connect(finished)
+    _reload_pool.start(_ReloadJob(signals))
 
 class ThemePreviewDialog(QDialog):
     def __init__(self, theme_path, parent=None):
@@ -46,9 +136,9 @@ class ThemePreviewDialog(QDialog):
 
         # Imagen de vista previa
         preview_label = QLabel()
-        preview_path = os.path.join(theme_path, "preview.png")
+        preview_path = theme_preview(theme_path)
 
-        if os.path.exists(preview_path):
+        if preview_path:
             pixmap = QPixmap(preview_path)
             preview_label.setPixmap(pixmap.scaled(780, 300, Qt.KeepAspectRatio))
         else:
@@ -88,43 +178,40 @@ class ThemePreviewDialog(QDialog):
         """Aplica el tema seleccionado"""
         theme_name = os.path.basename(self.theme_path)
 
-        # Asegurarse de que el directorio de configuración existe
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-
-        # Crear enlace simbólico al tema actual
-        current_link = os.path.join(CONFIG_DIR, "current")
-        config_file = os.path.join(CONFIG_DIR, "config")
-
         # Buscar el archivo de configuración en el tema
-        theme_config = os.path.join(self.theme_path, "config")
-        if not os.path.exists(theme_config):
-            theme_config = os.path.join(self.theme_path, "config.ini")
-            if not os.path.exists(theme_config):
-                QMessageBox.warning(self, "Error", f"No se encontró un archivo de configuración en el tema {theme_name}")
-                return
+        try:
+            theme_config_path(self.theme_path)
+        except ThemeError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        # Validar antes de sustituir la configuración actual
+        if not confirm_valid_theme(self, self.theme_path, theme_name):
+            return
 
         # Copiar la configuración al directorio principal
         try:
-            shutil.copy(theme_config, config_file)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"No se pudo copiar la configuración: {str(e)}")
+            installed = install_theme_config(self.theme_path)
+        except ThemeError as e:
+            QMessageBox.warning(self, "Error", str(e))
             return
+        warnings = "".join(f"\n\nAviso: {warning}" for warning in installed["warnings"])
 
         # Preguntar si se desea aplicar ahora
         reply = QMessageBox.question(self, "Aplicar tema",
-                                    f"El tema {theme_name} ha sido seleccionado.\n"
+                                    f"El tema {theme_name} ha sido seleccionado.{warnings}\n\n"
                                     "¿Desea aplicarlo ahora?",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
 
         if reply == QMessageBox.Yes:
-            # Matar instancias existentes de polybar
-            subprocess.run(["killall", "-q", "polybar"])
-
-            # Esperar a que se cierren y lanzar polybar
-            QTimer.singleShot(500, lambda: subprocess.Popen(["polybar", "main"]))
+            restart_polybar(self)
 
         self.accept()
 
+def read_text(path):
+    with open(path, 'r', errors="replace") as f:
+        return f.read()
+
 class EditThemeDialog(QDialog):
     def __init__(self, theme_path, parent=None):
         super().__init__(parent)
@@ -138,27 +225,49 @@ class EditThemeDialog(QDialog):
         # Pestañas para diferentes archivos de configuración
         self.tabs = QTabWidget()
 
-        # Añadir pestañas para cada archivo de configuración
-        config_files = ["config", "colors.ini", "modules.ini"]
+        # Añadir pestañas para cada archivo de configuración; el texto se lee al abrir cada pestaña
+        config_files = ["config.ini" if os.path.exists(os.path.join(theme_path, "config.ini"))
+                        and not os.path.exists(os.path.join(theme_path, "config")) else "config",
+                        "colors.ini", "modules.ini", "user_modules.ini"]
         self.editors = {}
+        # Órdenes de los módulos convertidos a la caché de scripts, que se registran al guardar
+        self.cached_scripts = {}
+
+        # Un tema superpuesto se edita como configuración combinada y se guarda como cambios
+        self.overlay = is_overlay(theme_path)
+        if self.overlay:
+            config_files = []
+            self._add_editor(OVERLAY_NAME, "config (sobre el tema base)",
+                             lambda: flatten(load_overlay_config(theme_path)))
 
         for file in config_files:
             file_path = os.path.join(theme_path, file)
             if os.path.exists(file_path):
-                editor = QTextEdit()
-                editor.setFont(QFont("Monospace", 10))
-
-                with open(file_path, 'r') as f:
-                    editor.setText(f.read())
+                self._add_editor(file, file, lambda file_path=file_path: read_text(file_path))
 
-                self.editors[file] = editor
-                self.tabs.addTab(editor, file)
+        layout.addWidget(self.tabs, 1)
 
-        layout.addWidget(self.tabs)
+        # Vista previa de los cambios sin guardar, dibujada en una pantalla virtual
+        self.preview_label = QLabel("La vista previa aparecerá al editar el tema")
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.setMinimumHeight(60)
+        self.preview_label.setFrameShape(QFrame.StyledPanel)
+        layout.addWidget(self.preview_label)
+        self.live_preview = LivePreview(self)
+        self.live_preview.preview_ready.connect(self.show_preview)
+        self.live_preview.preview_failed.connect(
+            lambda message: self.preview_label.setText(f"Vista previa no disponible: {message}"))
 
         # Botones
         button_layout = QHBoxLayout()
 
+        cache_button = QPushButton("Usar caché de scripts")
+        cache_button.setToolTip("Los módulos custom/script leen su salida de la caché residente "
+                                "en lugar de lanzar la orden en cada intervalo")
+        cache_button.clicked.connect(self.convert_scripts)
+        button_layout.addWidget(cache_button)
+        button_layout.addStretch()
+
         cancel_button = QPushButton("Cancelar")
         cancel_button.clicked.connect(self.reject)
         button_layout.addWidget(cancel_button)
@@ -170,13 +279,81 @@ class EditThemeDialog(QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
+    def _add_editor(self, file, title, loader):
+        editor = ConfigEditor(loader)
+        editor.edited.connect(lambda: self.live_preview.schedule(self.preview_text))
+        index = self.tabs.addTab(editor, title)
+        # Las pestañas con cambios sin guardar se marcan con un asterisco
+        editor.document().modificationChanged.connect(
+            lambda modified: self.tabs.setTabText(index, f"{title} *" if modified else title))
+        self.editors[file] = editor
+
+    def preview_text(self):
+        """Configuración aplanada con el texto actual de los editores"""
+        if self.overlay:
+            return self.editors[OVERLAY_NAME].toPlainText()
+        overrides = {os.path.join(self.theme_path, file): editor.toPlainText()
+                     for file, editor in self.editors.items() if editor.is_modified()}
+        return flatten_theme(self.theme_path, overrides)
+
+    def show_preview(self, path):
+        pixmap = QPixmap(path)
+        self.preview_label.setPixmap(pixmap.scaledToWidth(self.preview_label.width() - 4, Qt.SmoothTransformation))
+
+    def convert_scripts(self):
+        """Convierte las líneas 'exec =' de los módulos custom/script para que lean la caché"""
+        try:
+            registry = load_script_registry()
+        except ScriptCacheError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        converted = updated = 0
+        for editor in self.editors.values():
+            editor.ensure_loaded()
+            if editor.isReadOnly():
+                continue
+            text, entries = convert_exec_lines(editor.toPlainText(), {**registry, **self.cached_scripts})
+            if text == editor.toPlainText():
+                continue
+            # Se sustituye con el cursor para que el cambio se pueda deshacer
+            cursor = QTextCursor(editor.document())
+            cursor.select(QTextCursor.Document)
+            cursor.insertText(text)
+            self.cached_scripts.update(entries)
+            converted += len(entries)
+            updated += 1
+
+        if converted:
+            QMessageBox.information(self, "Caché de scripts",
+                                   f"{converted} módulos convertidos. Se registrarán en la caché al guardar.")
+        elif updated:
+            QMessageBox.information(self, "Caché de scripts",
+                                   "Módulos ya convertidos actualizados para no bloquearse si la caché no está en marcha.")
+        else:
+            QMessageBox.information(self, "Caché de scripts",
+                                   "No hay módulos custom/script que convertir (los que usan 'tail' "
+                                   "o %tokens% de polybar se dejan como están).")
+
+    def done(self, result):
+        self.live_preview.shutdown()
+        super().done(result)
+
     def save_changes(self):
         """Guarda los cambios en los archivos de configuración"""
         try:
             for file, editor in self.editors.items():
-                file_path = os.path.join(self.theme_path, file)
-                with open(file_path, 'w') as f:
-                    f.write(editor.toPlainText())
+                # Solo se reescriben los archivos modificados, y con rename: los que siguen
+                # compartidos con el tema original (enlace o reflink) no se tocan
+                if not editor.is_modified():
+                    continue
+                if self.overlay:
+                    save_overlay_text(self.theme_path, editor.toPlainText())
+                else:
+                    write_atomic(os.path.join(self.theme_path, file), editor.toPlainText())
+            if self.cached_scripts:
+                register_scripts(self.cached_scripts)
+                notify_service()
 
             QMessageBox.information(self, "Cambios guardados",
                                    f"Los cambios en el tema {self.theme_name} han sido guardados.")
@@ -184,6 +361,335 @@ class EditThemeDialog(QDialog):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"No se pudieron guardar los cambios: {str(e)}")
 
+def profile_summary(theme_path):
+    """Resumen del coste estimado de los módulos de un tema para el panel de descripción"""
+    try:
+        costs, totals = profile_theme(theme_path)
+    except OSError:
+        return ""
+    polled = sum(1 for cost in costs if cost.interval)
+    return (f"Consumo estimado: {totals['wakeups']:.2f} despertares/s y "
+            f"{totals['syscalls']:.0f} llamadas al sistema/s ({polled} de {len(costs)} módulos por sondeo)")
+
+class _ProfileSignals(QObject):
+    # ruta del tema, resumen, error
+    finished = pyqtSignal(str, str, str)
+
+class _ProfileSummaryJob(QRunnable):
+    """Calcula el resumen de consumo fuera del hilo de la interfaz: analiza todo el tema"""
+
+    def __init__(self, theme_path, signals):
+        super().__init__()
+        self.theme_path = theme_path
+        self.signals = signals
+
+    def run(self):
+        try:
+            summary, error = profile_summary(self.theme_path), ""
+        except Exception as e:
+            # Un tema mal formado no debe dejar el resumen pendiente para siempre
+            summary, error = "", str(e) or type(e).__name__
+        try:
+            self.signals.finished.emit(self.theme_path, summary, error)
+        except RuntimeError:
+            # La ventana se cerró mientras tanto
+            pass
+
+class ModuleProfileDialog(QDialog):
+    """Coste de cada módulo de un tema, consumo real de las barras y versión de bajo consumo"""
+
+    COLUMNS = ("Módulo", "Tipo", "Intervalo", "Despertares/s", "Llamadas/s")
+
+    def __init__(self, theme_path, parent=None):
+        super().__init__(parent)
+        self.theme_path = theme_path
+        self.created = False
+        self.setWindowTitle(f"Consumo de {os.path.basename(theme_path)}")
+        self.setMinimumSize(700, 450)
+
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.total_label = QLabel()
+        layout.addWidget(self.total_label)
+        self.measure_label = QLabel("Mida las barras en ejecución para ver su consumo real.")
+        self.measure_label.setWordWrap(True)
+        layout.addWidget(self.measure_label)
+
+        # Versión de bajo consumo
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("Máximo de despertares por segundo:"))
+        self.budget_spin = QDoubleSpinBox()
+        self.budget_spin.setRange(0.01, 100)
+        self.budget_spin.setSingleStep(0.25)
+        self.budget_spin.setValue(DEFAULT_BUDGET)
+        budget_layout.addWidget(self.budget_spin)
+        self.low_power_btn = QPushButton("Crear versión de bajo consumo")
+        self.low_power_btn.clicked.connect(self.create_low_power)
+        budget_layout.addWidget(self.low_power_btn)
+        layout.addLayout(budget_layout)
+
+        # Botones
+        button_layout = QHBoxLayout()
+        self.measure_btn = QPushButton("Medir barras en ejecución")
+        self.measure_btn.clicked.connect(self.start_measure)
+        button_layout.addWidget(self.measure_btn)
+        button_layout.addStretch()
+        close_button = QPushButton("Cerrar")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.load_profile()
+
+    def load_profile(self):
+        try:
+            costs, totals = profile_theme(self.theme_path)
+        except OSError as e:
+            self.total_label.setText(f"No se pudo analizar el tema: {e}")
+            self.low_power_btn.setEnabled(False)
+            return
+
+        self.table.setRowCount(len(costs))
+        for row, cost in enumerate(costs):
+            interval = f"{cost.interval:g} s" if cost.interval else cost.note
+            values = (cost.name, cost.type or "-", interval, f"{cost.wakeups:.2f}", f"{cost.syscalls:.1f}")
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 3:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.total_label.setText(f"Total estimado: {totals['wakeups']:.2f} despertares/s, "
+                                 f"{totals['syscalls']:.0f} llamadas al sistema/s")
+
+    def start_measure(self):
+        """Toma dos muestras de /proc separadas por MEASURE_MS sin bloquear la ventana"""
+        pids = get_orchestrator().supervisor.running_pids()
+        if not pids:
+            self.measure_label.setText("No hay ninguna barra en ejecución.")
+            return
+        self.measure_btn.setEnabled(False)
+        self.measure_label.setText(f"Midiendo durante {MEASURE_MS // 1000} segundos...")
+        before = snapshot(pids)
+        QTimer.singleShot(MEASURE_MS, lambda: self.finish_measure(pids, before))
+
+    def finish_measure(self, pids, before):
+        self.measure_btn.setEnabled(True)
+        results = usage(before, snapshot(pids))
+        if not results:
+            self.measure_label.setText("Las barras terminaron durante la medición.")
+            return
+        # Las barras en ejecución usan la configuración activa, que puede ser de otro tema
+        lines = [f"polybar {pid}: {value['cpu_percent']:.2f} % CPU, {value['rss_kb'] / 1024:.1f} MiB, "
+                 f"{value['wakeups']:.1f} despertares/s" for pid, value in sorted(results.items())]
+        self.measure_label.setText("Consumo real de las barras en ejecución (configuración activa):\n"
+                                   + "\n".join(lines))
+
+    def create_low_power(self):
+        """Crea un tema superpuesto con los intervalos alargados hasta el máximo elegido"""
+        name = os.path.basename(os.path.normpath(self.theme_path)) + LOW_POWER_SUFFIX
+        overwrite = False
+        if os.path.exists(os.path.join(USER_THEMES_DIR, name)):
+            reply = QMessageBox.question(self, "Tema existente",
+                                         f"Ya existe un tema con el nombre '{name}'. ¿Desea sobrescribirlo?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.No:
+                return
+            overwrite = True
+
+        try:
+            result = create_low_power_theme(self.theme_path, self.budget_spin.value(), name, overwrite=overwrite)
+        except ThemeError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        self.created = True
+        QMessageBox.information(self, "Tema de bajo consumo",
+                                f"Tema {os.path.basename(result['path'])} creado: "
+                                f"{result['wakeups_before']:.2f} -> {result['wakeups_after']:.2f} despertares/s.")
+
+class PaletteDialog(QDialog):
+    """Colores de un tema (con nombre y literales) y aplicación de una paleta a uno o a todos los temas"""
+
+    COLUMNS = ("", "Color", "Usos", "Nombres", "Archivos", "Nuevo")
+
+    def __init__(self, theme_path, parent=None):
+        super().__init__(parent)
+        self.theme_path = theme_path
+        self.theme_name = os.path.basename(theme_path)
+        self.index = PaletteIndex()
+        # Cambios elegidos: {nombre o #color: #color nuevo}
+        self.changes = {}
+        self.applied = False
+        self.setWindowTitle(f"Colores de {self.theme_name}")
+        self.setMinimumSize(750, 500)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Haga doble clic en un color para cambiarlo en todo el tema:"))
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.cellDoubleClicked.connect(self.choose_color)
+        layout.addWidget(self.table)
+
+        # Botones
+        button_layout = QHBoxLayout()
+        load_button = QPushButton("Cargar paleta...")
+        load_button.setToolTip("JSON {nombre o #color: #color} o un colors.ini de otro tema")
+        load_button.clicked.connect(self.load_palette_file)
+        button_layout.addWidget(load_button)
+        wallpaper_button = QPushButton("Del fondo de pantalla")
+        wallpaper_button.setToolTip("Colores sacados del fondo de pantalla actual (nitrogen o feh)")
+        wallpaper_button.clicked.connect(self.load_wallpaper_palette)
+        button_layout.addWidget(wallpaper_button)
+        button_layout.addStretch()
+
+        self.apply_btn = QPushButton("Aplicar a este tema")
+        self.apply_btn.clicked.connect(self.apply_to_theme)
+        button_layout.addWidget(self.apply_btn)
+        self.apply_all_btn = QPushButton("Aplicar a todos mis temas")
+        self.apply_all_btn.clicked.connect(self.apply_to_user_themes)
+        button_layout.addWidget(self.apply_all_btn)
+
+        close_button = QPushButton("Cerrar")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.load_colors()
+
+    def load_colors(self):
+        try:
+            self.colors = color_table(self.index.uses(self.theme_path))
+        except PaletteError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            self.colors = {}
+        self.index.save()
+
+        self.table.setRowCount(len(self.colors))
+        for row, (rgb, info) in enumerate(self.colors.items()):
+            swatch = QTableWidgetItem()
+            swatch.setBackground(QColor(f"#{rgb}"))
+            self.table.setItem(row, 0, swatch)
+            values = (", ".join(info["samples"]), str(info["uses"]), ", ".join(info["names"]) or "-",
+                      ", ".join(info["files"]))
+            for column, value in enumerate(values, 1):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+            self._show_change(row)
+        self.update_buttons()
+
+    def _change_for(self, rgb):
+        """Color nuevo elegido para una fila, por su valor o por alguno de sus nombres"""
+        for key, value in self.changes.items():
+            if key.startswith("#"):
+                matches = split_color(key)[1] == rgb
+            else:
+                matches = key in self.colors[rgb]["names"]
+            if matches:
+                return value
+        return None
+
+    def _show_change(self, row):
+        rgb = list(self.colors)[row]
+        new = self._change_for(rgb)
+        item = QTableWidgetItem(new or "")
+        if new:
+            item.setBackground(QColor(f"#{split_color(new)[1]}"))
+        self.table.setItem(row, 5, item)
+
+    def update_buttons(self):
+        self.apply_btn.setEnabled(bool(self.changes))
+        self.apply_all_btn.setEnabled(bool(self.changes))
+
+    def choose_color(self, row, column):
+        rgb = list(self.colors)[row]
+        color = QColorDialog.getColor(QColor(f"#{rgb}"), self, f"Sustituir #{rgb}")
+        if not color.isValid():
+            return
+        self.changes[f"#{rgb}"] = color.name()
+        self._show_change(row)
+        self.update_buttons()
+
+    def load_palette_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Cargar paleta", HOME,
+                                              "Paletas (*.json *.ini);;Todos los archivos (*)")
+        if not path:
+            return
+        try:
+            self.changes.update(load_palette(path))
+        except PaletteError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self._show_changes()
+
+    def load_wallpaper_palette(self):
+        try:
+            self.changes.update(wallpaper_palette()["palette"])
+        except WallpaperError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self._show_changes()
+
+    def _show_changes(self):
+        for row in range(self.table.rowCount()):
+            self._show_change(row)
+        self.update_buttons()
+
+    def apply_to_theme(self):
+        theme_path = self.theme_path
+        if not os.access(theme_path, os.W_OK):
+            reply = QMessageBox.question(self, "Tema del sistema",
+                                         "Este es un tema del sistema. ¿Desea crear una copia propia con los colores nuevos?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if reply == QMessageBox.No:
+                return
+            if os.path.exists(os.path.join(USER_THEMES_DIR, self.theme_name)):
+                QMessageBox.warning(self, "Error", f"Ya existe un tema propio llamado '{self.theme_name}'.")
+                return
+            try:
+                theme_path = fork_theme(theme_path)["path"]
+            except ThemeError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+            self.applied = True
+            # A partir de aquí se edita la copia: sus colores son los que se muestran
+            self.theme_path = theme_path
+            self.setWindowTitle(f"Colores de {self.theme_name} (tema propio)")
+        self._apply([theme_path])
+
+    def apply_to_user_themes(self):
+        themes = [theme["path"] for theme in default_catalog().load() if theme["type"] == "user"]
+        if not themes:
+            QMessageBox.information(self, "Colores", "No tiene temas propios.")
+            return
+        self._apply(themes)
+
+    def _apply(self, theme_paths):
+        results = apply_palette(theme_paths, self.changes, self.index)
+        self.applied = True
+        errors = [f"{os.path.basename(result['theme'])}: {result['error']}" for result in results if "error" in result]
+        files = sum(len(result["changed"]) for result in results)
+        values = sum(result["recolored"] for result in results)
+        message = f"{values} colores cambiados en {files} archivos de {len(results)} temas."
+        if errors:
+            QMessageBox.warning(self, "Colores", message + "\n\n" + "\n".join(errors))
+        else:
+            QMessageBox.information(self, "Colores", message)
+        self.changes = {}
+        self.load_colors()
+
 class ImportThemeDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -200,13 +706,16 @@ class ImportThemeDialog(QDialog):
 
         self.config_path = QLineEdit()
         self.config_path.setReadOnly(True)
-        browse_button = QPushButton("Examinar...")
+        browse_button = QPushButton("Archivo...")
         browse_button.clicked.connect(self.browse_config)
+        browse_dir_button = QPushButton("Directorio...")
+        browse_dir_button.clicked.connect(self.browse_directory)
 
         config_layout = QHBoxLayout()
         config_layout.addWidget(self.config_path)
         config_layout.addWidget(browse_button)
-        form_layout.addRow("Archivo de configuración:", config_layout)
+        config_layout.addWidget(browse_dir_button)
+        form_layout.addRow("Configuración, tema o archivo:", config_layout)
 
         layout.addLayout(form_layout)
 
@@ -226,10 +735,22 @@ class ImportThemeDialog(QDialog):
 
     def browse_config(self):
         """Abre un diálogo para seleccionar el archivo de configuración"""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Seleccionar archivo de configuración",
-                                                 HOME, "Archivos de configuración (*.ini *.conf config)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Seleccionar archivo de configuración o tema comprimido",
+                                                 HOME, "Configuración o tema (*.ini *.conf config *.tar *.tar.gz *.tgz *.tar.xz *.zip)")
         if file_path:
-            self.config_path.setText(file_path)
+            self.set_source(file_path)
+
+    def browse_directory(self):
+        """Abre un diálogo para seleccionar un directorio de tema"""
+        directory = QFileDialog.getExistingDirectory(self, "Seleccionar directorio del tema", HOME)
+        if directory:
+            self.set_source(directory)
+
+    def set_source(self, path):
+        self.config_path.setText(path)
+        # Los temas completos proponen su propio nombre
+        if not self.name_edit.text().strip() and (os.path.isdir(path) or not path.endswith((".ini", ".conf", "config"))):
+            self.name_edit.setText(archive_theme_name(path))
 
     def import_theme(self):
         """Importa el tema seleccionado"""
@@ -241,44 +762,42 @@ class ImportThemeDialog(QDialog):
             return
 
         if not config_path or not os.path.exists(config_path):
-            QMessageBox.warning(self, "Error", "Debe seleccionar un archivo de configuración válido.")
+            QMessageBox.warning(self, "Error", "Debe seleccionar una configuración, un directorio o un archivo de tema válido.")
             return
 
-        # Asegurarse de que el directorio de temas de usuario existe
-        os.makedirs(USER_THEMES_DIR, exist_ok=True)
-
-        # Crear directorio para el tema
         theme_dir = os.path.join(USER_THEMES_DIR, name)
-
+        overwrite = False
         if os.path.exists(theme_dir):
             reply = QMessageBox.question(self, "Tema existente",
                                         f"El tema {name} ya existe. ¿Desea sobrescribirlo?",
                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.No:
                 return
-            else:
-                shutil.rmtree(theme_dir)
+            overwrite = True
 
         try:
-            # Crear directorio
-            os.makedirs(theme_dir, exist_ok=True)
-
-            # Copiar archivo de configuración
-            shutil.copy(config_path, os.path.join(theme_dir, "config"))
-
-            # Crear README.md
-            with open(os.path.join(theme_dir, "README.md"), 'w') as f:
-                f.write(f"# {name}\n\nTema personalizado para Polybar.\n")
+            import_theme(name, config_path, overwrite=overwrite)
+        except ThemeError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
 
-            QMessageBox.information(self, "Tema importado",
-                                   f"El tema {name} ha sido importado correctamente.")
-            self.accept()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"No se pudo importar el tema: {str(e)}")
+        QMessageBox.information(self, "Tema importado",
+                               f"El tema {name} ha sido importado correctamente.")
+        self.accept()
 
 class PolybarConfigDialog(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.catalog = ThemeCatalog(THEME_ROOTS)
+        self.thumbnails = ThumbnailCache(parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.thumbnail_ready)
+        self.theme_model = ThemeListModel(self.thumbnails, self)
+        self.theme_model.generated_previews_ready.connect(self.generated_previews_ready)
+        # Resúmenes de consumo por ruta del tema, calculados en segundo plano (None mientras tanto)
+        self.profile_summaries = {}
+        self.theme_description = ""
+        self.profile_signals = _ProfileSignals(self)
+        self.profile_signals.finished.connect(self.profile_summary_ready)
         self.initUI()
 
     def initUI(self):
@@ -317,22 +836,31 @@ class PolybarConfigDialog(QMainWindow):
         left_layout = QVBoxLayout(left_panel)
 
         # Lista de temas
-        self.theme_list = QListWidget()
-        self.theme_list.setIconSize(QSize(64, 64))
-        self.theme_list.itemDoubleClicked.connect(self.preview_theme)
+        self.theme_list = QListView()
+        self.theme_list.setModel(self.theme_model)
+        self.theme_list.setIconSize(ICON_SIZE)
+        self.theme_list.setUniformItemSizes(True)
+        self.theme_list.setEditTriggers(QListView.NoEditTriggers)
+        self.theme_list.doubleClicked.connect(self.preview_theme)
+        self.theme_list.selectionModel().selectionChanged.connect(self.theme_selected)
         left_layout.addWidget(self.theme_list)
 
         # Botones para la lista de temas
         theme_buttons = QHBoxLayout()
 
         self.refresh_btn = QPushButton("Actualizar")
-        self.refresh_btn.clicked.connect(self.load_themes)
+        self.refresh_btn.clicked.connect(lambda: self.load_themes(revalidate=True))
         theme_buttons.addWidget(self.refresh_btn)
 
         self.import_btn = QPushButton("Importar")
         self.import_btn.clicked.connect(self.import_theme)
         theme_buttons.addWidget(self.import_btn)
 
+        self.generate_previews_btn = QPushButton("Generar vistas previas")
+        self.generate_previews_btn.setToolTip("Dibuja en segundo plano los temas que no tienen vista previa")
+        self.generate_previews_btn.clicked.connect(self.generate_previews)
+        theme_buttons.addWidget(self.generate_previews_btn)
+
         left_layout.addLayout(theme_buttons)
 
         # Panel derecho: Vista previa y acciones
@@ -365,6 +893,18 @@ class PolybarConfigDialog(QMainWindow):
         self.edit_btn.setEnabled(False)
         action_buttons.addWidget(self.edit_btn)
 
+        self.palette_btn = QPushButton("Colores")
+        self.palette_btn.setToolTip("Colores del tema y cambio de paleta")
+        self.palette_btn.clicked.connect(self.palette_selected_theme)
+        self.palette_btn.setEnabled(False)
+        action_buttons.addWidget(self.palette_btn)
+
+        self.profile_btn = QPushButton("Consumo")
+        self.profile_btn.setToolTip("Coste de los módulos del tema y versión de bajo consumo")
+        self.profile_btn.clicked.connect(self.profile_selected_theme)
+        self.profile_btn.setEnabled(False)
+        action_buttons.addWidget(self.profile_btn)
+
         self.apply_btn = QPushButton("Aplicar")
         self.apply_btn.clicked.connect(self.apply_selected_theme)
         self.apply_btn.setEnabled(False)
@@ -382,6 +922,11 @@ class PolybarConfigDialog(QMainWindow):
         # Botones inferiores
         bottom_buttons = QHBoxLayout()
 
+        self.rollback_btn = QPushButton("Deshacer último tema")
+        self.rollback_btn.clicked.connect(self.rollback_theme)
+        bottom_buttons.addWidget(self.rollback_btn)
+        bottom_buttons.addStretch()
+
         self.close_btn = QPushButton("Cerrar")
         self.close_btn.clicked.connect(self.close)
         bottom_buttons.addWidget(self.close_btn)
@@ -402,97 +947,55 @@ class PolybarConfigDialog(QMainWindow):
         frame_geometry.moveCenter(screen_center)
         self.move(frame_geometry.topLeft())
 
-    def load_themes(self):
-        """Carga los temas disponibles"""
-        self.theme_list.clear()
-        self.themes = []
-
-        # Asegurarse de que los directorios existen
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-        os.makedirs(USER_THEMES_DIR, exist_ok=True)
-
-        # Cargar temas del sistema
-        if os.path.exists(THEMES_DIR):
-            for item in os.listdir(THEMES_DIR):
-                theme_dir = os.path.join(THEMES_DIR, item)
-                if os.path.isdir(theme_dir):
-                    config_file = os.path.join(theme_dir, "config")
-                    if not os.path.exists(config_file):
-                        config_file = os.path.join(theme_dir, "config.ini")
-
-                    if os.path.exists(config_file):
-                        self.themes.append({
-                            "name": item,
-                            "path": theme_dir,
-                            "type": "system"
-                        })
-
-        # Cargar temas del usuario
-        if os.path.exists(USER_THEMES_DIR):
-            for item in os.listdir(USER_THEMES_DIR):
-                theme_dir = os.path.join(USER_THEMES_DIR, item)
-                if os.path.isdir(theme_dir):
-                    config_file = os.path.join(theme_dir, "config")
-                    if not os.path.exists(config_file):
-                        config_file = os.path.join(theme_dir, "config.ini")
-
-                    if os.path.exists(config_file):
-                        self.themes.append({
-                            "name": item + " (usuario)",
-                            "path": theme_dir,
-                            "type": "user"
-                        })
-
-        # Añadir temas a la lista
-        for theme in sorted(self.themes, key=lambda x: x["name"]):
-            item = QListWidgetItem(theme["name"])
-
-            # Añadir icono si hay una vista previa
-            preview_path = os.path.join(theme["path"], "preview.png")
-            if os.path.exists(preview_path):
-                item.setIcon(QIcon(preview_path))
-
-            # Guardar la ruta del tema como dato
-            item.setData(Qt.UserRole, theme["path"])
-
-            self.theme_list.addItem(item)
-
-        # Deshabilitar botones si no hay temas
-        has_themes = len(self.themes) > 0
-        self.preview_btn.setEnabled(False)
-        self.edit_btn.setEnabled(False)
-        self.apply_btn.setEnabled(False)
+    def load_themes(self, revalidate=False):
+        """Carga los temas disponibles desde el catálogo"""
+        if revalidate:
+            self.thumbnails.clear()
 
-        # Conectar selección
-        self.theme_list.itemSelectionChanged.connect(self.theme_selected)
+        self.themes = self.catalog.load(revalidate=revalidate)
+        self.theme_model.set_themes(self.themes)
+        # Los temas pueden haber cambiado (edición, paleta, bajo consumo): se recalcula al seleccionarlos
+        self.profile_summaries = {}
+
+        # Deshabilitar botones hasta que se seleccione un tema
+        self.theme_selected()
+
+    def selected_theme(self):
+        """Devuelve el tema seleccionado en la lista, o None"""
+        indexes = self.theme_list.selectionModel().selectedIndexes()
+        if not indexes:
+            return None
+        return self.theme_model.theme(indexes[0])
 
     def theme_selected(self):
         """Maneja la selección de un tema"""
-        selected_items = self.theme_list.selectedItems()
+        theme = self.selected_theme()
 
-        if selected_items:
-            theme_path = selected_items[0].data(Qt.UserRole)
-            theme_name = selected_items[0].text()
+        if theme:
+            theme_path = theme["path"]
+            theme_name = self.theme_model.display_name(theme)
 
             # Mostrar vista previa
-            preview_path = os.path.join(theme_path, "preview.png")
-            if os.path.exists(preview_path):
-                pixmap = QPixmap(preview_path)
-                self.preview_label.setPixmap(pixmap.scaled(580, 180, Qt.KeepAspectRatio))
-            else:
-                self.preview_label.setText("Vista previa no disponible")
+            self.show_preview(theme)
 
-            # Mostrar descripción
+            # Mostrar descripción y el consumo estimado de sus módulos
             readme_path = os.path.join(theme_path, "README.md")
             if os.path.exists(readme_path):
                 with open(readme_path, 'r') as f:
-                    self.theme_desc.setText(f.read())
+                    description = f.read()
             else:
-                self.theme_desc.setText(f"Tema: {theme_name}\n\nNo hay descripción disponible para este tema.")
+                description = f"Tema: {theme_name}\n\nNo hay descripción disponible para este tema."
+            self.theme_description = description
+            if theme_path not in self.profile_summaries:
+                self.profile_summaries[theme_path] = None
+                QThreadPool.globalInstance().start(_ProfileSummaryJob(theme_path, self.profile_signals))
+            self.show_description(self.profile_summaries[theme_path])
 
             # Habilitar botones
             self.preview_btn.setEnabled(True)
             self.edit_btn.setEnabled(True)
+            self.palette_btn.setEnabled(True)
+            self.profile_btn.setEnabled(True)
             self.apply_btn.setEnabled(True)
         else:
             self.preview_label.setText("Seleccione un tema para ver la vista previa")
@@ -501,34 +1004,96 @@ class PolybarConfigDialog(QMainWindow):
             # Deshabilitar botones
             self.preview_btn.setEnabled(False)
             self.edit_btn.setEnabled(False)
+            self.palette_btn.setEnabled(False)
+            self.profile_btn.setEnabled(False)
             self.apply_btn.setEnabled(False)
 
-    def preview_theme(self, item):
+    def show_description(self, summary):
+        description = self.theme_description
+        self.theme_desc.setText(f"{description.rstrip()}\n\n{summary}" if summary else description)
+
+    def profile_summary_ready(self, theme_path, summary, error):
+        # Un resultado de antes de recargar la lista puede estar desfasado
+        if self.profile_summaries.get(theme_path, "") is not None:
+            return
+        if error:
+            summary = f"No se pudo estimar el consumo: {error}"
+        self.profile_summaries[theme_path] = summary
+        theme = self.selected_theme()
+        if theme and theme["path"] == theme_path:
+            self.show_description(summary)
+
+    def show_preview(self, theme):
+        preview_path = self.theme_model.preview_path(theme)
+        if preview_path:
+            pixmap = self.thumbnails.get(preview_path, PANE_SIZE)
+            if pixmap is not None:
+                self.preview_label.setPixmap(pixmap)
+            else:
+                self.preview_label.setText("Cargando vista previa...")
+        else:
+            self.preview_label.setText("Vista previa no disponible")
+
+    def generated_previews_ready(self):
+        """Las capturas generadas se resuelven en segundo plano: se actualiza el panel si hace falta"""
+        theme = self.selected_theme()
+        if theme and not theme["preview"]:
+            self.show_preview(theme)
+
+    def thumbnail_ready(self, preview_path, width, height):
+        """Coloca en el panel la vista previa generada en segundo plano"""
+        if (width, height) != (PANE_SIZE.width(), PANE_SIZE.height()):
+            return
+
+        theme = self.selected_theme()
+        if theme and self.theme_model.preview_path(theme) == preview_path:
+            self.preview_label.setPixmap(self.thumbnails.get(preview_path, PANE_SIZE))
+
+    def generate_previews(self):
+        """Genera las vistas previas que faltan en otro proceso, sin bloquear la ventana"""
+        missing = missing_tools()
+        if missing:
+            QMessageBox.warning(self, "Vista previa",
+                                f"Para generar vistas previas hace falta instalar: {', '.join(missing)}")
+            return
+
+        def finished(exit_code, cancelled, dialog):
+            self.generate_previews_btn.setEnabled(True)
+            if not cancelled:
+                self.load_themes()
+
+        self.generate_previews_btn.setEnabled(False)
+        from job_runner import run_job
+        run_job(self, "Generando vistas previas", sys.executable,
+                [os.path.join(os.path.dirname(os.path.abspath(__file__)), "panel_cli.py"), "previews"], finished)
+
+    def preview_theme(self, index):
         """Muestra una vista previa del tema seleccionado"""
-        theme_path = item.data(Qt.UserRole)
+        theme_path = index.data(ThemeListModel.PathRole)
         dialog = ThemePreviewDialog(theme_path, self)
         dialog.exec_()
 
     def preview_selected_theme(self):
         """Muestra una vista previa del tema seleccionado"""
-        selected_items = self.theme_list.selectedItems()
+        theme = self.selected_theme()
 
-        if selected_items:
-            theme_path = selected_items[0].data(Qt.UserRole)
+        if theme:
+            theme_path = theme["path"]
             dialog = ThemePreviewDialog(theme_path, self)
             dialog.exec_()
 
     def edit_selected_theme(self):
         """Edita el tema seleccionado"""
-        selected_items = self.theme_list.selectedItems()
+        theme = self.selected_theme()
 
-        if selected_items:
-            theme_path = selected_items[0].data(Qt.UserRole)
+        if theme:
+            theme_path = theme["path"]
 
             # Verificar si es un tema del sistema
             if theme_path.startswith("/usr/"):
                 reply = QMessageBox.question(self, "Tema del sistema",
-                                           "Este es un tema del sistema. ¿Desea crear una copia en su directorio personal para editarlo?",
+                                           "Este es un tema del sistema. ¿Desea crear un tema propio basado en él para editarlo?\n"
+                                           "Solo se guardarán sus cambios; las actualizaciones del tema original se aplicarán solas.",
                                            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
 
                 if reply == QMessageBox.Yes:
@@ -536,19 +1101,22 @@ class PolybarConfigDialog(QMainWindow):
                     theme_name = os.path.basename(theme_path)
                     user_theme_path = os.path.join(USER_THEMES_DIR, theme_name)
 
+                    overwrite = False
                     if os.path.exists(user_theme_path):
-                        overwrite = QMessageBox.question(self, "Tema existente",
+                        reply = QMessageBox.question(self, "Tema existente",
                                                       f"Ya existe un tema con el nombre '{theme_name}' en su directorio personal. ¿Desea sobrescribirlo?",
                                                       QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
-                        if overwrite == QMessageBox.No:
+                        if reply == QMessageBox.No:
                             return
+                        overwrite = True
 
-                        # Eliminar tema existente
-                        shutil.rmtree(user_theme_path)
-
-                    # Copiar tema
-                    shutil.copytree(theme_path, user_theme_path)
+                    # Crear el tema superpuesto (solo guarda las claves cambiadas)
+                    try:
+                        create_overlay(theme_path, theme_name, overwrite=overwrite)
+                    except ThemeError as e:
+                        QMessageBox.warning(self, "Error", str(e))
+                        return
 
                     # Abrir editor con la copia
                     dialog = EditThemeDialog(user_theme_path, self)
@@ -562,44 +1130,77 @@ class PolybarConfigDialog(QMainWindow):
                 if dialog.exec_() == QDialog.Accepted:
                     self.load_themes()
 
+    def palette_selected_theme(self):
+        """Muestra los colores del tema seleccionado"""
+        theme = self.selected_theme()
+
+        if theme:
+            dialog = PaletteDialog(theme["path"], self)
+            dialog.exec_()
+            if dialog.applied:
+                self.load_themes()
+
+    def profile_selected_theme(self):
+        """Muestra el coste de los módulos del tema seleccionado"""
+        theme = self.selected_theme()
+
+        if theme:
+            dialog = ModuleProfileDialog(theme["path"], self)
+            dialog.exec_()
+            if dialog.created:
+                self.load_themes()
+
     def apply_selected_theme(self):
         """Aplica el tema seleccionado"""
-        selected_items = self.theme_list.selectedItems()
+        theme = self.selected_theme()
 
-        if selected_items:
-            theme_path = selected_items[0].data(Qt.UserRole)
-            theme_name = selected_items[0].text()
-
-            # Asegurarse de que el directorio de configuración existe
-            os.makedirs(CONFIG_DIR, exist_ok=True)
+        if theme:
+            theme_path = theme["path"]
+            theme_name = self.theme_model.display_name(theme)
 
             # Buscar el archivo de configuración en el tema
-            config_file = os.path.join(theme_path, "config")
-            if not os.path.exists(config_file):
-                config_file = os.path.join(theme_path, "config.ini")
-                if not os.path.exists(config_file):
-                    QMessageBox.warning(self, "Error", f"No se encontró un archivo de configuración en el tema {theme_name}")
-                    return
+            try:
+                theme_config_path(theme_path)
+            except ThemeError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+
+            # Validar antes de sustituir la configuración actual
+            if not confirm_valid_theme(self, theme_path, theme_name):
+                return
 
             # Copiar la configuración al directorio principal
             try:
-                shutil.copy(config_file, os.path.join(CONFIG_DIR, "config"))
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"No se pudo copiar la configuración: {str(e)}")
+                installed = install_theme_config(theme_path)
+            except ThemeError as e:
+                QMessageBox.warning(self, "Error", str(e))
                 return
+            warnings = "".join(f"\n\nAviso: {warning}" for warning in installed["warnings"])
 
             # Preguntar si se desea aplicar ahora
             reply = QMessageBox.question(self, "Aplicar tema",
-                                        f"El tema {theme_name} ha sido seleccionado.\n"
+                                        f"El tema {theme_name} ha sido seleccionado.{warnings}\n\n"
                                         "¿Desea aplicarlo ahora?",
                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
 
             if reply == QMessageBox.Yes:
-                # Matar instancias existentes de polybar
-                subprocess.run(["killall", "-q", "polybar"])
+                restart_polybar(self)
+
+    def rollback_theme(self):
+        """Vuelve a la configuración que estaba activa antes del último cambio"""
+        try:
+            rolled_back = rollback_theme()
+        except ThemeError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        if rolled_back is None:
+            QMessageBox.information(self, "Sin cambios", "No hay ninguna configuración anterior.")
+            return
 
-                # Esperar a que se cierren y lanzar polybar
-                QTimer.singleShot(500, lambda: subprocess.Popen(["polybar", "main"]))
+        number, theme_name = rolled_back
+        self.statusBar().showMessage(f"Restaurada la configuración {number} ({theme_name or 'sin tema'})", 5000)
+        restart_polybar(self)
 
     def import_theme(self):
         """Importa un nuevo tema"""
@@ -0,0 +1,355 @@
+import os
+import re
+import glob
+
+# Analizador del dialecto INI de polybar:
+# - comentarios solo en líneas que empiezan por ';' o '#'
+# - include-file / include-directory en cualquier punto del archivo
+# - referencias ${sección.clave}, ${self.clave}, ${root.clave}, ${env:VAR}, ${xrdb:...}, ${file:...}
+# - herencia de secciones con 'inherit'
+
+REFERENCE_RE = re.compile(r"\$\{([^{}]*)\}")
+MAX_REFERENCE_DEPTH = 16
+
+# Tipos de token de un archivo analizado
+TOKEN_SECTION = 0
+TOKEN_ENTRY = 1
+TOKEN_INCLUDE_FILE = 2
+TOKEN_INCLUDE_DIRECTORY = 3
+TOKEN_ERROR = 4
+
+class Entry:
+    __slots__ = ("key", "value", "path", "line")
+
+    def __init__(self, key, value, path, line):
+        self.key = key
+        self.value = value
+        self.path = path
+        self.line = line
+
+    def __repr__(self):
+        return f"Entry({self.key!r}, {self.value!r})"
+
+class Section:
+    __slots__ = ("name", "entries", "path", "line")
+
+    def __init__(self, name, path, line):
+        self.name = name
+        self.entries = {}
+        self.path = path
+        self.line = line
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        return entry.value if entry is not None else default
+
+    def __repr__(self):
+        return f"Section({self.name!r}, {len(self.entries)} claves)"
+
+class Include:
+    __slots__ = ("target", "resolved", "path", "line", "directory")
+
+    def __init__(self, target, resolved, path, line, directory=False):
+        self.target = target
+        self.resolved = resolved
+        self.path = path
+        self.line = line
+        # True para include-directory
+        self.directory = directory
+
+class PolybarConfig:
+    """Modelo de una configuración de polybar con todos sus archivos incluidos"""
+
+    __slots__ = ("path", "root", "sections", "files", "includes", "missing_includes", "errors")
+
+    def __init__(self, path, root="bar/main"):
+        self.path = path
+        # Sección a la que apuntan las referencias ${root.clave}
+        self.root = root
+        self.sections = {}
+        # Archivos leídos: ruta -> (mtime_ns, tamaño)
+        self.files = {}
+        self.includes = []
+        self.missing_includes = []
+        # Líneas no válidas: (ruta, línea, mensaje)
+        self.errors = []
+
+    def section(self, name):
+        return self.sections.get(name)
+
+    def get(self, section_name, key, default=None):
+        """Valor sin resolver de una clave, siguiendo 'inherit'"""
+        entry = self.lookup(section_name, key)
+        return entry.value if entry is not None else default
+
+    def lookup(self, section_name, key):
+        """Busca la entrada de una clave en una sección o en sus secciones heredadas"""
+        seen = set()
+        while section_name is not None and section_name not in seen:
+            seen.add(section_name)
+            section = self.sections.get(section_name)
+            if section is None:
+                return None
+            entry = section.entries.get(key)
+            if entry is not None:
+                return entry
+            section_name = section.get("inherit")
+        return None
+
+    def resolve(self, section_name, key, default=None):
+        """Valor de una clave con las referencias ${...} resueltas"""
+        entry = self.lookup(section_name, key)
+        if entry is None:
+            return default
+        value, _ = self.resolve_value(section_name, entry.value)
+        return value
+
+    def resolve_value(self, section_name, value, _depth=0):
+        """Resuelve las referencias de un valor.
+
+        Devuelve (valor, referencias sin resolver). Las referencias que no se pueden
+        resolver y no tienen valor por defecto se dejan tal cual en el resultado.
+        """
+        unresolved = []
+
+        def replace(match):
+            resolved = self._resolve_reference(section_name, match.group(1), _depth)
+            if resolved is None:
+                unresolved.append(match.group(0))
+                return match.group(0)
+            return resolved
+
+        if "${" not in value:
+            return value, unresolved
+        return REFERENCE_RE.sub(replace, value), unresolved
+
+    def _resolve_reference(self, section_name, reference, depth):
+        if depth >= MAX_REFERENCE_DEPTH:
+            return None
+
+        # Valor por defecto tras el primer ':' (salvo en env/xrdb/file, que usan el segundo)
+        kind, sep, rest = reference.partition(":")
+        if sep and kind in ("env", "xrdb", "file"):
+            name, has_fallback, fallback = rest.partition(":")
+            if kind == "xrdb":
+                # Los recursos X solo se conocen en tiempo de ejecución
+                return fallback
+            if kind == "env":
+                value = os.environ.get(name)
+            else:
+                try:
+                    with open(os.path.expanduser(name), 'r') as f:
+                        value = f.read().strip()
+                except OSError:
+                    value = None
+            if value is None:
+                return fallback if has_fallback else None
+            return value
+
+        target, has_fallback, fallback = reference.partition(":")
+        ref_section, dot, ref_key = target.rpartition(".")
+        if not dot:
+            return fallback if has_fallback else None
+        if ref_section == "self":
+            ref_section = section_name
+        elif ref_section == "root":
+            ref_section = self.root
+
+        entry = self.lookup(ref_section, ref_key)
+        if entry is None:
+            return fallback if has_fallback else None
+
+        value, unresolved = self.resolve_value(ref_section, entry.value, depth + 1)
+        if unresolved:
+            return fallback if has_fallback else None
+        return value
+
+    def iter_references(self):
+        """Recorre todas las referencias: (sección, entrada, referencia, resuelta)"""
+        for section in self.sections.values():
+            for entry in section.entries.values():
+                if "${" not in entry.value:
+                    continue
+                for match in REFERENCE_RE.finditer(entry.value):
+                    resolved = self._resolve_reference(section.name, match.group(1), 0)
+                    yield section, entry, match.group(0), resolved is not None
+
+    def is_current(self):
+        """Comprueba si ningún archivo leído ha cambiado en disco"""
+        for path, key in self.files.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            if (st.st_mtime_ns, st.st_size) != key:
+                return False
+        return True
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+def tokenize_lines(lines):
+    """Convierte las líneas de un archivo en tokens (tipo, línea, a, b)"""
+    tokens = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line[0] in ";#":
+            continue
+
+        if line[0] == "[":
+            if line[-1] != "]":
+                tokens.append((TOKEN_ERROR, number, "Sección mal formada", line))
+            else:
+                tokens.append((TOKEN_SECTION, number, line[1:-1].strip(), None))
+            continue
+
+        key, sep, value = line.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            tokens.append((TOKEN_ERROR, number, "Línea sin '='", line))
+            continue
+
+        value = _unquote(value.strip())
+        if key == "include-file":
+            tokens.append((TOKEN_INCLUDE_FILE, number, value, None))
+        elif key == "include-directory":
+            tokens.append((TOKEN_INCLUDE_DIRECTORY, number, value, None))
+        else:
+            tokens.append((TOKEN_ENTRY, number, key, value))
+    return tokens
+
+# Caché de archivos analizados: ruta -> ((mtime_ns, tamaño), tokens)
+_file_cache = {}
+# Caché de configuraciones completas: (ruta, directorios alternativos) -> PolybarConfig
+_config_cache = {}
+
+def parse_file(path):
+    """Devuelve (clave de validación, tokens) de un archivo, reutilizando la caché por mtime"""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached
+
+    with open(path, 'r', errors="replace") as f:
+        cached = (key, tokenize_lines(f))
+    _file_cache[path] = cached
+    return cached
+
+def resolve_include_path(target, including_path, fallback_dirs=()):
+    """Resuelve la ruta de un include-file.
+
+    Las rutas relativas se resuelven respecto al archivo que las incluye. Las
+    absolutas (p. ej. ~/.config/polybar/<tema>/colors.ini en los temas de
+    adi1090x) se buscan antes por su nombre en fallback_dirs, el directorio del
+    tema: una copia vieja en ~/.config no debe tapar el archivo del tema. La
+    ruta escrita se usa solo si el tema no tiene ese archivo.
+    """
+    path = os.path.expandvars(os.path.expanduser(target))
+    absolute = os.path.isabs(path)
+    if not absolute:
+        path = os.path.join(os.path.dirname(including_path), path)
+    path = os.path.normpath(path)
+
+    candidates = [os.path.join(directory, os.path.basename(path)) for directory in fallback_dirs]
+    candidates.insert(len(candidates) if absolute else 0, path)
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def _assemble(config, path, fallback_dirs, stack, current, overrides):
+    if path in overrides:
+        # Texto aún sin guardar: nunca coincide con el disco, así que no se reutiliza
+        key, tokens = (None, None), tokenize_lines(overrides[path].splitlines())
+    else:
+        key, tokens = parse_file(path)
+    config.files[path] = key
+    stack.append(path)
+
+    for kind, line, a, b in tokens:
+        if kind == TOKEN_ENTRY:
+            if current is None:
+                config.errors.append((path, line, f"Clave '{a}' fuera de una sección"))
+            else:
+                current.entries[a] = Entry(a, b, path, line)
+        elif kind == TOKEN_SECTION:
+            current = config.sections.get(a)
+            if current is None:
+                current = Section(a, path, line)
+                config.sections[a] = current
+        elif kind == TOKEN_INCLUDE_FILE:
+            target = resolve_include_path(a, path, fallback_dirs)
+            include = Include(a, target, path, line)
+            config.includes.append(include)
+            if target is None:
+                config.missing_includes.append(include)
+            elif target in stack:
+                config.errors.append((path, line, f"Inclusión recursiva de {a}"))
+            else:
+                current = _assemble(config, target, fallback_dirs, stack, current, overrides)
+        elif kind == TOKEN_INCLUDE_DIRECTORY:
+            directory = _include_directory(a, path)
+            include = Include(a, directory if os.path.isdir(directory) else None, path, line, directory=True)
+            config.includes.append(include)
+            if include.resolved is None:
+                config.missing_includes.append(include)
+                continue
+            for target in sorted(glob.glob(os.path.join(directory, "*"))):
+                if os.path.isfile(target) and target not in stack:
+                    current = _assemble(config, target, fallback_dirs, stack, current, overrides)
+        else:
+            config.errors.append((path, line, f"{a}: {b}"))
+
+    stack.pop()
+    return current
+
+def _include_directory(target, including_path):
+    directory = os.path.expandvars(os.path.expanduser(target))
+    if not os.path.isabs(directory):
+        directory = os.path.join(os.path.dirname(including_path), directory)
+    return directory
+
+def _includes_current(config, fallback_dirs):
+    """Los include siguen apuntando a los mismos archivos (uno que faltaba puede haber aparecido)"""
+    for include in config.includes:
+        if include.directory:
+            directory = _include_directory(include.target, include.path)
+            if (directory if os.path.isdir(directory) else None) != include.resolved:
+                return False
+        elif resolve_include_path(include.target, include.path, fallback_dirs) != include.resolved:
+            return False
+    return True
+
+def load_config(path, fallback_dirs=(), overrides=None):
+    """Carga una configuración de polybar con todos sus include.
+
+    El resultado se guarda en caché y se reutiliza mientras ninguno de los
+    archivos leídos cambie en disco. overrides ({ruta: texto}) sustituye el
+    contenido de algunos archivos, p. ej. los que se están editando; esas
+    configuraciones no se guardan en caché.
+    """
+    path = os.path.abspath(path)
+    overrides = {os.path.abspath(name): text for name, text in (overrides or {}).items()}
+    cache_key = (path, tuple(fallback_dirs))
+    cached = _config_cache.get(cache_key)
+    if not overrides and cached is not None and cached.is_current() and _includes_current(cached, fallback_dirs):
+        return cached
+
+    config = PolybarConfig(path)
+    _assemble(config, path, tuple(fallback_dirs), [], None, overrides)
+    if not overrides:
+        _config_cache[cache_key] = config
+    return config
+
+def load_theme_config(theme_path, config_name=None, overrides=None):
+    """Carga la configuración de un tema resolviendo sus include dentro del propio tema"""
+    if config_name is None:
+        config_name = "config" if os.path.exists(os.path.join(theme_path, "config")) else "config.ini"
+    return load_config(os.path.join(theme_path, config_name), fallback_dirs=(theme_path,), overrides=overrides)
+
+def clear_cache():
+    _file_cache.clear()
+    _config_cache.clear()
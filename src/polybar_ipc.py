@@ -0,0 +1,134 @@
+import os
+import re
+import socket
+import struct
+import tempfile
+
+# Protocolo IPC de polybar >= 3.6: cabecera "polyipc" + versión + tamaño + tipo, y el mensaje
+MAGIC = b"polyipc"
+VERSION = 0
+HEADER = struct.Struct("=7sBIB")
+
+TYPE_OK = 0
+TYPE_CMD = 1
+TYPE_ACTION = 2
+TYPE_ERR = 255
+
+SOCKET_RE = re.compile(r"^ipc\.(\d+)\.sock$")
+LEGACY_FIFO_RE = re.compile(r"^polybar_mqueue\.(\d+)$")
+
+class IPCError(Exception):
+    pass
+
+def socket_dirs():
+    """Directorios donde polybar crea sus sockets IPC"""
+    dirs = []
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        dirs.append(os.path.join(runtime_dir, "polybar"))
+    dirs.append(os.path.join(tempfile.gettempdir(), f"polybar-{os.getuid()}"))
+    return dirs
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return False
+    return True
+
+def find_ipc_sockets(dirs=None):
+    """Sockets IPC de las barras en ejecución: lista de (pid, ruta)"""
+    sockets = []
+    for directory in socket_dirs() if dirs is None else dirs:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            match = SOCKET_RE.match(name)
+            if match and _pid_alive(int(match.group(1))):
+                sockets.append((int(match.group(1)), os.path.join(directory, name)))
+    return sockets
+
+def find_legacy_fifos():
+    """Colas de mensajes de polybar < 3.6: lista de (pid, ruta)"""
+    fifos = []
+    directory = tempfile.gettempdir()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return fifos
+    for name in names:
+        match = LEGACY_FIFO_RE.match(name)
+        if match and _pid_alive(int(match.group(1))):
+            fifos.append((int(match.group(1)), os.path.join(directory, name)))
+    return fifos
+
+def encode_message(msg_type, payload):
+    data = payload.encode()
+    return HEADER.pack(MAGIC, VERSION, len(data), msg_type) + data
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise IPCError("Conexión cerrada por polybar")
+        data += chunk
+    return data
+
+def read_message(sock):
+    """Lee un mensaje completo; devuelve (tipo, texto)"""
+    magic, version, size, msg_type = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise IPCError("Respuesta IPC no válida")
+    return msg_type, _recv_exact(sock, size).decode(errors="replace")
+
+def send_message(socket_path, msg_type, payload, timeout=1.0):
+    """Envía un mensaje al socket de una barra y devuelve el texto de la respuesta"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(encode_message(msg_type, payload))
+            reply_type, reply = read_message(sock)
+    except OSError as e:
+        raise IPCError(f"No se pudo comunicar con {socket_path}: {e}") from e
+
+    if reply_type != TYPE_OK:
+        raise IPCError(reply or "polybar rechazó el mensaje")
+    return reply
+
+def send_command(command, timeout=1.0):
+    """Envía un comando (restart, quit, hide...) a todas las barras con enable-ipc.
+
+    Devuelve el número de barras que lo aceptaron; 0 si no hay ninguna con IPC.
+    """
+    sockets = find_ipc_sockets()
+    if not sockets:
+        # polybar < 3.6: se escribe en la cola de mensajes sin pasar por polybar-msg
+        delivered = 0
+        for _, fifo in find_legacy_fifos():
+            try:
+                fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                continue
+            try:
+                os.write(fd, f"cmd:{command}".encode())
+                delivered += 1
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        return delivered
+
+    delivered = 0
+    for _, socket_path in sockets:
+        try:
+            send_message(socket_path, TYPE_CMD, command, timeout)
+            delivered += 1
+        except IPCError:
+            continue
+    return delivered
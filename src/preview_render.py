@@ -0,0 +1,155 @@
+import os
+import re
+import select
+import shutil
+import hashlib
+import tempfile
+import subprocess
+
+from paths import CACHE_DIR
+from fileutil import write_atomic
+
+# Vistas previas de configuraciones sin tocar la barra real: polybar se lanza en una
+# pantalla X virtual (Xvfb) con la configuración aplanada y se captura la pantalla.
+# Las capturas se guardan por el hash de la configuración.
+PREVIEWS_DIR = os.path.join(CACHE_DIR, "live_previews")
+PREVIEW_SCREEN = (1280, 120)
+MAX_CACHED_PREVIEWS = 64
+RENDER_VERSION = 1
+# Tiempo que se deja a polybar para dibujar la barra antes de la captura
+SETTLE_SECONDS = 1.0
+DISPLAY_TIMEOUT = 5
+# Órdenes de captura por orden de preferencia; {output} es el PNG de salida
+CAPTURE_COMMANDS = (
+    ("import", "-window", "root", "{output}"),
+    ("scrot", "--overwrite", "{output}"),
+)
+
+BAR_SECTION_RE = re.compile(r"^\s*\[bar/([^\]]+)\]", re.MULTILINE)
+
+class PreviewError(Exception):
+    pass
+
+def preview_digest(config_text):
+    key = f"{RENDER_VERSION}\0{PREVIEW_SCREEN[0]}x{PREVIEW_SCREEN[1]}\0{config_text}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def cached_preview(digest, cache_dir=PREVIEWS_DIR):
+    path = os.path.join(cache_dir, f"{digest}.png")
+    return path if os.path.exists(path) else None
+
+def missing_tools():
+    """Programas necesarios que no están instalados"""
+    missing = [name for name in ("Xvfb", "polybar") if shutil.which(name) is None]
+    if not any(shutil.which(command[0]) for command in CAPTURE_COMMANDS):
+        missing.append(" o ".join(command[0] for command in CAPTURE_COMMANDS))
+    return missing
+
+def _start_display():
+    """Lanza Xvfb en el primer número de pantalla libre; devuelve (proceso, ':n')"""
+    read_fd, write_fd = os.pipe()
+    try:
+        process = subprocess.Popen(
+            ["Xvfb", "-displayfd", str(write_fd), "-nolisten", "tcp",
+             "-screen", "0", f"{PREVIEW_SCREEN[0]}x{PREVIEW_SCREEN[1]}x24"],
+            pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        os.close(write_fd)
+
+    try:
+        # Xvfb escribe el número de pantalla cuando ya acepta conexiones
+        ready, _, _ = select.select([read_fd], [], [], DISPLAY_TIMEOUT)
+        number = os.read(read_fd, 16).decode().strip() if ready else ""
+    finally:
+        os.close(read_fd)
+    if not number.isdigit():
+        _stop(process)
+        raise PreviewError("No se pudo iniciar la pantalla virtual (Xvfb)")
+    return process, f":{number}"
+
+def _stop(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+def _capture(env, output):
+    for command in CAPTURE_COMMANDS:
+        if shutil.which(command[0]) is None:
+            continue
+        args = [arg.format(output=output) for arg in command]
+        result = subprocess.run(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=10)
+        if result.returncode == 0 and os.path.exists(output):
+            return
+        raise PreviewError(f"{command[0]} falló: {result.stderr.decode(errors='replace').strip()}")
+    raise PreviewError("No hay ninguna orden de captura instalada")
+
+def _prune(cache_dir, keep):
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".png")]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+def render_preview(config_text, cache_dir=PREVIEWS_DIR, keep=MAX_CACHED_PREVIEWS):
+    """Dibuja una configuración de polybar en una pantalla virtual; devuelve la ruta del PNG.
+
+    Si la misma configuración ya se dibujó se devuelve la captura guardada; se
+    conservan las keep capturas más recientes (todas con keep=None). Puede
+    ejecutarse en varios hilos a la vez: cada llamada usa su propia pantalla.
+    """
+    digest = preview_digest(config_text)
+    cached = cached_preview(digest, cache_dir)
+    if cached is not None:
+        return cached
+
+    missing = missing_tools()
+    if missing:
+        raise PreviewError(f"Falta {', '.join(missing)} para la vista previa")
+    match = BAR_SECTION_RE.search(config_text)
+    if match is None:
+        raise PreviewError("La configuración no define ninguna barra")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="preview-") as tmp:
+        config_path = os.path.join(tmp, "config")
+        write_atomic(config_path, config_text)
+        display, name = _start_display()
+        bar = None
+        try:
+            env = dict(os.environ, DISPLAY=name)
+            bar = subprocess.Popen(["polybar", "--quiet", "--config", config_path, match.group(1)],
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            try:
+                bar.wait(timeout=SETTLE_SECONDS)
+            except subprocess.TimeoutExpired:
+                pass
+            if bar.poll() is not None:
+                error = bar.stderr.read().decode(errors="replace").strip().splitlines()
+                raise PreviewError(f"polybar terminó: {error[-1] if error else bar.returncode}")
+
+            output = os.path.join(tmp, "preview.png")
+            _capture(env, output)
+            path = os.path.join(cache_dir, f"{digest}.png")
+            # Primero junto al destino (puede ser otro sistema de archivos) y luego con rename
+            shutil.move(output, f"{path}.{os.getpid()}.{display.pid}.tmp")
+            os.replace(f"{path}.{os.getpid()}.{display.pid}.tmp", path)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise PreviewError(f"No se pudo generar la vista previa: {e}") from e
+        finally:
+            if bar is not None:
+                _stop(bar)
+                bar.stderr.close()
+            _stop(display)
+
+    if keep is not None:
+        _prune(cache_dir, keep)
+    return path
@@ -0,0 +1,201 @@
+import os
+import time
+import select
+import signal
+import subprocess
+
+import polybar_ipc
+
+POLYBAR_COMMAND = ("polybar", "main")
+
+def find_processes(name, uid=None):
+    """PIDs de los procesos del usuario con el nombre dado, leyendo /proc (sin killall/pgrep)"""
+    if uid is None:
+        uid = os.getuid()
+    pids = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        proc_dir = os.path.join("/proc", entry)
+        try:
+            if os.stat(proc_dir).st_uid != uid:
+                continue
+            with open(os.path.join(proc_dir, "comm"), 'r') as f:
+                if f.read().strip() == name:
+                    pids.append(int(entry))
+        except OSError:
+            continue
+    return pids
+
+def command_lines(uid=None):
+    """Línea de órdenes de cada proceso del usuario: {pid: [argumentos]}"""
+    if uid is None:
+        uid = os.getuid()
+    result = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return result
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        proc_dir = os.path.join("/proc", entry)
+        try:
+            if os.stat(proc_dir).st_uid != uid:
+                continue
+            with open(os.path.join(proc_dir, "cmdline"), 'rb') as f:
+                args = f.read().split(b"\0")
+        except OSError:
+            continue
+        result[int(entry)] = [arg.decode(errors="replace") for arg in args if arg]
+    return result
+
+def _pidfd_open(pid):
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class PolybarSupervisor:
+    """Arranca y detiene polybar esperando la salida de los procesos por eventos.
+
+    La espera usa pidfd (Linux >= 5.3) o waitpid para los procesos propios, de modo
+    que la nueva barra se lanza en cuanto la anterior termina, sin esperas fijas.
+    """
+
+    def __init__(self, command=POLYBAR_COMMAND):
+        self.command = list(command)
+        self.name = os.path.basename(self.command[0])
+        # Procesos lanzados por este supervisor: pid -> Popen
+        self.processes = {}
+        # Duración del último cambio completo (detener + lanzar) en milisegundos
+        self.last_switch_ms = None
+
+    def _reap(self):
+        for pid, process in list(self.processes.items()):
+            if process.poll() is not None:
+                del self.processes[pid]
+
+    def running_pids(self):
+        """PIDs de las barras en ejecución, lanzadas o no por este supervisor"""
+        self._reap()
+        pids = set(self.processes)
+        pids.update(find_processes(self.name))
+        return sorted(pids)
+
+    def _wait_for_exit(self, pids, timeout):
+        """Espera a que terminen los procesos; devuelve los que siguen vivos"""
+        deadline = time.monotonic() + timeout
+        poller = select.poll()
+        fds = {}
+        pending = set()
+
+        for pid in pids:
+            fd = _pidfd_open(pid)
+            if fd is None:
+                if _alive(pid):
+                    pending.add(pid)
+                continue
+            fds[fd] = pid
+            poller.register(fd, select.POLLIN)
+
+        try:
+            while fds:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for fd, _ in poller.poll(remaining * 1000):
+                    poller.unregister(fd)
+                    os.close(fd)
+                    fds.pop(fd, None)
+
+            # Sin pidfd: waitpid para los hijos propios y comprobación corta para el resto
+            for pid in list(pending):
+                process = self.processes.get(pid)
+                while time.monotonic() < deadline:
+                    if process is not None:
+                        try:
+                            process.wait(max(0, deadline - time.monotonic()))
+                        except subprocess.TimeoutExpired:
+                            pass
+                    if not _alive(pid) or (process is not None and process.poll() is not None):
+                        pending.discard(pid)
+                        break
+                    if process is None:
+                        time.sleep(0.005)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+        self._reap()
+        return set(fds.values()) | pending
+
+    def stop(self, timeout=2.0, pids=None):
+        """Detiene las instancias de polybar indicadas, o todas (SIGTERM y, si no responden, SIGKILL)"""
+        pids = self.running_pids() if pids is None else list(pids)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        survivors = self._wait_for_exit(pids, timeout)
+        for pid in survivors:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if survivors:
+            self._wait_for_exit(survivors, 0.5)
+
+    def start(self, args=None, env=None):
+        """Lanza una barra y la registra como propia"""
+        command = self.command if args is None else list(args)
+        process = subprocess.Popen(command, env=env, start_new_session=True,
+                                   stdin=subprocess.DEVNULL)
+        self.processes[process.pid] = process
+        return process
+
+    def restart(self, args=None, env=None):
+        """Sustituye las barras en ejecución por una nueva; devuelve la latencia en ms"""
+        start_time = time.perf_counter()
+        self.stop()
+        self.start(args, env)
+        self.last_switch_ms = (time.perf_counter() - start_time) * 1000
+        return self.last_switch_ms
+
+    def reload(self):
+        """Recarga la configuración de las barras.
+
+        Si las barras tienen enable-ipc se les pide un 'restart' por IPC, que conserva
+        el proceso y evita el parpadeo; si no, se reinician. Devuelve (método, ms).
+        """
+        start_time = time.perf_counter()
+        if polybar_ipc.send_command("restart"):
+            self.last_switch_ms = (time.perf_counter() - start_time) * 1000
+            return "ipc", self.last_switch_ms
+        return "restart", self.restart()
+
+_supervisor = None
+
+def get_supervisor():
+    """Supervisor compartido por toda la aplicación"""
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = PolybarSupervisor()
+    return _supervisor
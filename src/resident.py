@@ -0,0 +1,97 @@
+import gc
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPixmapCache
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer
+from PyQt5.QtNetwork import QLocalServer
+
+from single_instance import socket_path, COMMAND_SHOW, COMMAND_PING, REPLY_OK
+
+# Minutos con la ventana oculta antes de liberarla
+IDLE_TIMEOUT_MINUTES = 30
+
+class ResidentInstance(QObject):
+    """Instancia única en segundo plano que mantiene la ventana construida.
+
+    Escucha en un QLocalServer; la orden "show" de otra invocación muestra la
+    ventana al instante. Si la ventana pasa idle_minutes oculta se destruye para
+    liberar memoria y se vuelve a construir en la siguiente petición.
+    """
+
+    def __init__(self, window_factory, idle_minutes=IDLE_TIMEOUT_MINUTES, parent=None):
+        super().__init__(parent)
+        self.window_factory = window_factory
+        self.window = None
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._accept)
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(int(idle_minutes * 60 * 1000))
+        self.idle_timer.timeout.connect(self.release_window)
+
+    def listen(self):
+        """Empieza a escuchar; devuelve False si no se pudo crear el socket"""
+        path = socket_path()
+        # Quien llega aquí ya comprobó que no responde nadie: el socket, si existe, está huérfano
+        QLocalServer.removeServer(path)
+        return self.server.listen(path)
+
+    def prebuild(self):
+        """Construye la ventana sin mostrarla"""
+        if self.window is None:
+            self.window = self.window_factory()
+            self.window.installEventFilter(self)
+        if not self.window.isVisible():
+            self.idle_timer.start()
+        return self.window
+
+    def show_window(self):
+        window = self.prebuild()
+        self.idle_timer.stop()
+        window.setWindowState(window.windowState() & ~Qt.WindowMinimized)
+        window.show()
+        window.raise_()
+        window.activateWindow()
+
+    def release_window(self):
+        # No se libera nada mientras quede alguna ventana a la vista (p. ej. el configurador)
+        if any(widget.isVisible() for widget in QApplication.topLevelWidgets()):
+            self.idle_timer.start()
+            return
+        if self.window is None:
+            return
+        self.window.removeEventFilter(self)
+        self.window.deleteLater()
+        self.window = None
+        QPixmapCache.clear()
+        # deleteLater se completa en la siguiente vuelta del bucle de eventos
+        QTimer.singleShot(0, gc.collect)
+
+    def eventFilter(self, obj, event):
+        if obj is self.window:
+            if event.type() == QEvent.Hide:
+                self.idle_timer.start()
+            elif event.type() == QEvent.Show:
+                self.idle_timer.stop()
+        return False
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.readyRead.connect(lambda connection=connection: self._read_command(connection))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def _read_command(self, connection):
+        if not connection.canReadLine():
+            return
+        command = bytes(connection.readLine()).decode(errors="replace").strip()
+        if command == COMMAND_SHOW:
+            self.show_window()
+        elif command != COMMAND_PING:
+            connection.disconnectFromServer()
+            return
+        connection.write(f"{REPLY_OK}\n".encode())
+        connection.flush()
+        connection.disconnectFromServer()
@@ -0,0 +1,384 @@
+import os
+import re
+import sys
+import json
+import stat
+import fcntl
+import time
+import shlex
+import errno
+import select
+import socket
+import tempfile
+import threading
+import subprocess
+import socketserver
+
+from paths import CONFIG_DIR
+from fileutil import write_atomic
+import polybar_ini
+
+# Caché residente de la salida de los módulos custom/script. Cada orden registrada se
+# ejecuta una vez por TTL, y solo mientras alguien la lee; el resultado se sirve
+#  - por un FIFO por clave, que el módulo lee con 'tail = true' y 'exec = cat <fifo>':
+#    polybar no lanza nada más y solo despierta cuando la salida cambia,
+#  - y por un socket Unix con órdenes de una línea ("get <clave>", "list", "reload", "ping").
+REGISTRY_PATH = os.path.join(CONFIG_DIR, "script_cache.json")
+RUNTIME_NAME = "mabox-panel-selector-scripts"
+SOCKET_NAME = "cache.sock"
+LOCK_NAME = "cache.lock"
+DEFAULT_TTL = 5.0
+MIN_TTL = 0.5
+COMMAND_TIMEOUT = 30.0
+
+COMMAND_GET = "get"
+COMMAND_LIST = "list"
+COMMAND_RELOAD = "reload"
+COMMAND_PING = "ping"
+REPLY_OK = "ok"
+REPLY_ERROR = "error"
+
+# Marca de las líneas convertidas: el FIFO, y la orden original si el servicio no está en marcha.
+# El servicio mantiene un flock sobre LOCK_NAME mientras vive; el núcleo lo suelta aunque muera
+# con SIGKILL, así que un FIFO huérfano no deja al módulo bloqueado en cat para siempre
+CONVERTED_EXEC = "! flock -n {lock} true 2>/dev/null && cat {fifo} 2>/dev/null || sh -c {command}"
+CONVERTED_RE = re.compile(r"^(! flock -n \S+ true 2>/dev/null && )?cat \S+ 2>/dev/null \|\| sh -c ")
+# Formato anterior, sin comprobar el servicio: se actualiza al convertir
+LEGACY_EXEC_RE = re.compile(r"^cat (\S+) 2>/dev/null \|\| sh -c (.*)$")
+
+class ScriptCacheError(Exception):
+    pass
+
+def runtime_dir():
+    """Directorio de los FIFO y del socket del usuario actual"""
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if directory and os.path.isdir(directory):
+        return os.path.join(directory, RUNTIME_NAME)
+    return os.path.join(tempfile.gettempdir(), f"{RUNTIME_NAME}-{os.getuid()}")
+
+def socket_path(directory=None):
+    return os.path.join(directory or runtime_dir(), SOCKET_NAME)
+
+def lock_path(directory=None):
+    return os.path.join(directory or runtime_dir(), LOCK_NAME)
+
+def fifo_path(key, directory=None):
+    return os.path.join(directory or runtime_dir(), f"{key}.fifo")
+
+def cache_key(name):
+    """Nombre de módulo apto como clave y nombre de archivo"""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", name) or "script"
+
+def load_registry(path=REGISTRY_PATH):
+    """Órdenes registradas: {clave: {"command": orden, "ttl": segundos}}"""
+    try:
+        with open(path, 'r') as f:
+            registry = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ScriptCacheError(f"No se pudo leer {path}: {e}") from e
+    if not isinstance(registry, dict):
+        raise ScriptCacheError(f"{path} no es válido")
+    return {key: entry for key, entry in registry.items()
+            if isinstance(entry, dict) and isinstance(entry.get("command"), str)}
+
+def register(entries, path=REGISTRY_PATH):
+    """Añade o sustituye órdenes en el registro ({clave: {"command", "ttl"}})"""
+    registry = load_registry(path)
+    registry.update(entries)
+    try:
+        write_atomic(path, json.dumps(registry, indent=1, ensure_ascii=False))
+    except OSError as e:
+        raise ScriptCacheError(f"No se pudo guardar {path}: {e}") from e
+    return registry
+
+def last_line(output):
+    """Como polybar con los scripts sin 'tail': se muestra la última línea no vacía"""
+    lines = [line for line in output.splitlines() if line.strip()]
+    return lines[-1] if lines else ""
+
+class CachedScript:
+    """Orden registrada con su última salida; refresh() la ejecuta una sola vez aunque la pidan varios"""
+
+    def __init__(self, key, command, ttl):
+        self.key = key
+        self.command = command
+        self.ttl = max(MIN_TTL, float(ttl or DEFAULT_TTL))
+        self.output = None
+        self.updated = None
+        self.removed = False
+        self.lock = threading.Lock()
+
+    def expired(self, now):
+        return self.updated is None or now - self.updated >= self.ttl
+
+    def refresh(self, clock):
+        with self.lock:
+            # Otro hilo pudo actualizarla mientras se esperaba el cerrojo
+            if not self.expired(clock()):
+                return self.output
+            try:
+                result = subprocess.run(self.command, shell=True, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                                        timeout=COMMAND_TIMEOUT)
+                self.output = last_line(result.stdout.decode(errors="replace"))
+            except (OSError, subprocess.SubprocessError):
+                self.output = self.output or ""
+            self.updated = clock()
+            return self.output
+
+    def get(self, clock):
+        return self.refresh(clock) if self.expired(clock()) else self.output
+
+class ScriptCache:
+    """Servicio de la caché: un hilo por FIFO (bloqueado mientras no hay lector) y el socket"""
+
+    def __init__(self, registry_path=REGISTRY_PATH, directory=None, clock=time.monotonic):
+        self.registry_path = registry_path
+        self.directory = directory or runtime_dir()
+        self.clock = clock
+        self.scripts = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.lock_fd = None
+
+    def reload(self):
+        """Aplica el registro: crea los FIFO nuevos y retira las claves eliminadas o cambiadas"""
+        registry = {cache_key(key): entry for key, entry in load_registry(self.registry_path).items()}
+        with self.lock:
+            for key, script in list(self.scripts.items()):
+                entry = registry.get(key)
+                if entry is None or entry["command"] != script.command:
+                    self._remove(key)
+                else:
+                    script.ttl = max(MIN_TTL, float(entry.get("ttl") or DEFAULT_TTL))
+            for key, entry in registry.items():
+                if key not in self.scripts:
+                    self._add(key, entry)
+        return len(self.scripts)
+
+    def _add(self, key, entry):
+        script = CachedScript(key, entry["command"], entry.get("ttl"))
+        path = fifo_path(key, self.directory)
+        try:
+            if not stat.S_ISFIFO(os.lstat(path).st_mode):
+                os.unlink(path)
+                os.mkfifo(path, 0o600)
+        except FileNotFoundError:
+            os.mkfifo(path, 0o600)
+        self.scripts[key] = script
+        threading.Thread(target=self._feed, args=(script, path), daemon=True).start()
+
+    def _remove(self, key):
+        script = self.scripts.pop(key)
+        script.removed = True
+        path = fifo_path(key, self.directory)
+        # Un lector momentáneo desbloquea el open() del hilo, que ve la clave retirada y termina
+        try:
+            os.close(os.open(path, os.O_RDONLY | os.O_NONBLOCK))
+        except OSError:
+            pass
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _feed(self, script, path):
+        """Escribe la salida en el FIFO mientras haya un lector, solo cuando cambia"""
+        while not script.removed:
+            try:
+                # Bloquea sin consumir nada hasta que un módulo abre el FIFO
+                fd = os.open(path, os.O_WRONLY)
+            except OSError:
+                return
+            if script.removed:
+                os.close(fd)
+                return
+            poller = select.poll()
+            # Sin eventos pedidos, poll solo avisa de POLLERR: el lector cerró el FIFO
+            poller.register(fd, 0)
+            written = None
+            try:
+                while not script.removed:
+                    output = script.get(self.clock)
+                    if output != written:
+                        os.write(fd, f"{output}\n".encode())
+                        written = output
+                    wait = max(0.0, script.ttl - (self.clock() - script.updated))
+                    if poller.poll(wait * 1000):
+                        break
+            except OSError as e:
+                if e.errno not in (errno.EPIPE, errno.EAGAIN):
+                    raise
+            finally:
+                os.close(fd)
+
+    def get(self, key):
+        script = self.scripts.get(key)
+        if script is None:
+            raise ScriptCacheError(f"Clave desconocida: {key}")
+        return script.get(self.clock)
+
+    def handle(self, line):
+        """Respuesta (una línea) a una orden del socket"""
+        command, _, argument = line.strip().partition(" ")
+        try:
+            if command == COMMAND_GET:
+                return self.get(argument.strip())
+            if command == COMMAND_LIST:
+                return json.dumps({key: {"command": script.command, "ttl": script.ttl, "output": script.output}
+                                   for key, script in self.scripts.items()}, ensure_ascii=False)
+            if command == COMMAND_RELOAD:
+                self.reload()
+                return REPLY_OK
+            if command == COMMAND_PING:
+                return REPLY_OK
+        except ScriptCacheError as e:
+            return f"{REPLY_ERROR} {e}"
+        return f"{REPLY_ERROR} Orden desconocida: {command}"
+
+    def serve(self):
+        """Prepara los FIFO y atiende el socket hasta shutdown(); devuelve el número de órdenes"""
+        if request(COMMAND_PING, directory=self.directory) == REPLY_OK:
+            raise ScriptCacheError("La caché de scripts ya está en marcha")
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self.lock_fd = os.open(lock_path(self.directory), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+            raise ScriptCacheError("La caché de scripts ya está en marcha")
+        # Los FIFO que queden de una ejecución anterior bloquearían a sus lectores
+        for name in os.listdir(self.directory):
+            if name.endswith(".fifo") or name == SOCKET_NAME:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        count = self.reload()
+
+        cache = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline().decode(errors="replace")
+                self.wfile.write(f"{cache.handle(line)}\n".encode())
+
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path(self.directory), Handler)
+        self.server.daemon_threads = True
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.close()
+        return count
+
+    def shutdown(self):
+        """Detiene serve() desde otro hilo"""
+        if self.server is not None:
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def close(self):
+        with self.lock:
+            for key in list(self.scripts):
+                self._remove(key)
+        try:
+            os.unlink(socket_path(self.directory))
+        except OSError:
+            pass
+        # Al final: mientras haya FIFO, los módulos deben ver el servicio vivo
+        if self.lock_fd is not None:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+def request(command, directory=None, timeout=COMMAND_TIMEOUT):
+    """Envía una orden al servicio; devuelve la respuesta o None si no está en marcha"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path(directory))
+            sock.sendall(f"{command}\n".encode())
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                reply += chunk
+    except OSError:
+        return None
+    return reply.decode(errors="replace").rstrip("\n")
+
+def convert_exec_lines(text, registry=None, directory=None):
+    """Convierte los módulos custom/script de un texto para que lean la caché.
+
+    Cada 'exec =' sin 'tail' pasa a leer el FIFO de su clave (con la orden
+    original como alternativa si el servicio no está en marcha) y se añade
+    'tail = true'. Las órdenes con %tokens% de polybar no se convierten, y
+    las ya convertidas con el formato anterior solo se actualizan.
+    Devuelve (texto nuevo, {clave: {"command", "ttl"}}) con lo que hay que registrar.
+    """
+    registry = load_registry() if registry is None else registry
+    lines = text.splitlines()
+    modules = {}
+    current = None
+    for kind, number, a, b in polybar_ini.tokenize_lines(lines):
+        if kind == polybar_ini.TOKEN_SECTION:
+            current = modules.setdefault(a, {}) if a.startswith("module/") else None
+        elif kind == polybar_ini.TOKEN_ENTRY and current is not None:
+            current[a] = (number, b)
+
+    replacements = {}
+    insertions = {}
+    entries = {}
+    for section, values in modules.items():
+        if values.get("type", (0, ""))[1] != "custom/script" or "exec" not in values:
+            continue
+        number, command = values["exec"]
+        indent = lines[number - 1][:len(lines[number - 1]) - len(lines[number - 1].lstrip())]
+        legacy = LEGACY_EXEC_RE.match(command)
+        if legacy:
+            replacements[number] = f"{indent}exec = " + CONVERTED_EXEC.format(
+                lock=shlex.quote(lock_path(os.path.dirname(shlex.split(legacy.group(1))[0]))),
+                fifo=legacy.group(1), command=legacy.group(2))
+            continue
+        if values.get("tail", (0, "false"))[1] == "true" or "%" in command or CONVERTED_RE.match(command):
+            continue
+
+        key = cache_key(section[len("module/"):])
+        base, suffix = key, 2
+        while (registry.get(key, {}).get("command") not in (None, command)
+               or entries.get(key, {}).get("command") not in (None, command)):
+            key, suffix = f"{base}-{suffix}", suffix + 1
+        interval = values.get("interval", (0, None))[1]
+        try:
+            ttl = float(interval) if interval else DEFAULT_TTL
+        except ValueError:
+            ttl = DEFAULT_TTL
+        entries[key] = {"command": command, "ttl": ttl}
+
+        replacements[number] = f"{indent}exec = " + CONVERTED_EXEC.format(
+            lock=shlex.quote(lock_path(directory)), fifo=shlex.quote(fifo_path(key, directory)),
+            command=shlex.quote(command))
+        if "tail" in values:
+            replacements[values["tail"][0]] = f"{indent}tail = true"
+        else:
+            insertions[number] = f"{indent}tail = true"
+
+    result = []
+    for number, line in enumerate(lines, 1):
+        result.append(replacements.get(number, line))
+        if number in insertions:
+            result.append(insertions[number])
+    new_text = "\n".join(result) + ("\n" if text.endswith("\n") else "")
+    return new_text, entries
+
+def notify_service(directory=None):
+    """Hace que el servicio relea el registro, arrancándolo si no está en marcha"""
+    if request(COMMAND_RELOAD, directory=directory) == REPLY_OK:
+        return False
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), "panel_cli.py")
+    subprocess.Popen([sys.executable, cli, "scripts", "serve"], stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    return True
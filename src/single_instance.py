@@ -0,0 +1,36 @@
+import os
+import socket
+import tempfile
+
+# Cliente de la instancia residente (--daemon); no importa PyQt5 para que una
+# segunda invocación pueda avisar a la primera sin pagar su arranque
+SOCKET_NAME = "mabox-panel-selector.sock"
+
+# Órdenes del protocolo: una línea por conexión, respondida con "ok"
+COMMAND_SHOW = "show"
+COMMAND_PING = "ping"
+REPLY_OK = "ok"
+
+def socket_path():
+    """Ruta del socket local de la instancia residente del usuario actual"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join(tempfile.gettempdir(), f"mabox-panel-selector-{os.getuid()}.sock")
+
+def notify_running_instance(command=COMMAND_SHOW, timeout=2.0):
+    """Envía una orden a la instancia residente; devuelve True si la atendió"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path())
+            sock.sendall(f"{command}\n".encode())
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = sock.recv(64)
+                if not chunk:
+                    break
+                reply += chunk
+    except OSError:
+        return False
+    return reply.decode(errors="replace").strip() == REPLY_OK
@@ -0,0 +1,196 @@
+import os
+import tarfile
+import zipfile
+import tempfile
+
+from paths import THEMES_DIR, USER_THEMES_DIR
+from fileutil import write_atomic
+from generations import GenerationStore, GenerationError
+from theme_import import import_tree, fork_theme as fork_tree, is_archive, archive_theme_name, ThemeImportError
+from theme_catalog import ThemeCatalog, CONFIG_VARIANTS
+from theme_compiler import compile_theme, CompileError
+from overlay import (OVERLAY_NAME, is_overlay, create_overlay as create_overlay_dir, OverlayError, read_overlay,
+                     base_path, update_overlay)
+from module_profiler import profile_theme, low_power_intervals, DEFAULT_BUDGET
+
+# Operaciones sobre temas compartidas por la interfaz gráfica y la línea de órdenes
+THEME_ROOTS = [(THEMES_DIR, "system"), (USER_THEMES_DIR, "user")]
+LOW_POWER_SUFFIX = "-bajo-consumo"
+
+class ThemeError(Exception):
+    pass
+
+def default_catalog():
+    return ThemeCatalog(THEME_ROOTS)
+
+def find_theme(name, themes):
+    """Busca un tema por nombre, 'user:nombre', 'system:nombre' o ruta.
+
+    Si hay un tema de usuario y otro del sistema con el mismo nombre, gana el
+    del usuario (suele ser una copia editada).
+    """
+    if os.sep in name and os.path.isdir(name):
+        return {"name": os.path.basename(os.path.normpath(name)), "path": os.path.abspath(name), "type": "path"}
+
+    theme_type, _, theme_name = name.rpartition(":")
+    matches = [theme for theme in themes
+               if theme["name"] == theme_name and (not theme_type or theme["type"] == theme_type)]
+    if not matches:
+        raise ThemeError(f"No existe el tema {name}")
+    matches.sort(key=lambda theme: theme["type"] != "user")
+    return matches[0]
+
+def theme_config_path(theme_path):
+    """Archivo de configuración principal de un tema"""
+    for variant in CONFIG_VARIANTS + (OVERLAY_NAME,):
+        config_file = os.path.join(theme_path, variant)
+        if os.path.exists(config_file):
+            return config_file
+    raise ThemeError(f"No se encontró un archivo de configuración en el tema {os.path.basename(theme_path)}")
+
+def install_theme_config(theme_path, store=None, compiled=True):
+    """Activa la configuración del tema como nueva generación.
+
+    Con compiled=True se instala el tema compilado (un solo archivo con los include
+    resueltos); si no se puede compilar se usa la configuración tal cual y se avisa.
+    Devuelve {"generation", "compiled", "warnings"}.
+    """
+    config_file = theme_config_path(theme_path)
+    installed = {"compiled": False, "warnings": []}
+    if compiled or is_overlay(theme_path):
+        try:
+            result = compile_theme(theme_path)
+            config_file = result["path"]
+            installed = {"compiled": True, "warnings": result["warnings"]}
+        except CompileError as e:
+            # Un tema superpuesto no tiene una configuración propia que copiar
+            if is_overlay(theme_path):
+                raise ThemeError(f"No se pudo combinar el tema con su base: {e}") from e
+            installed["warnings"].append(f"No se pudo compilar el tema ({e}); se instala la configuración sin compilar")
+    try:
+        with open(config_file, 'rb') as f:
+            data = f.read()
+        generation = (store or GenerationStore()).commit(data, theme=os.path.basename(os.path.normpath(theme_path)))
+    except (OSError, GenerationError) as e:
+        raise ThemeError(f"No se pudo activar la configuración: {e}") from e
+    return dict(installed, generation=generation)
+
+def rollback_theme(store=None):
+    """Vuelve a la configuración activa anterior; devuelve (generación, tema) o None"""
+    store = store or GenerationStore()
+    try:
+        number = store.rollback()
+    except GenerationError as e:
+        raise ThemeError(str(e)) from e
+    return None if number is None else (number, store.info(number).get("theme"))
+
+def _check_name(name):
+    if not name or os.sep in name or name.startswith("."):
+        raise ThemeError(f"Nombre de tema no válido: {name!r}")
+
+def import_theme(name, source, overwrite=False, themes_dir=USER_THEMES_DIR):
+    """Crea un tema de usuario a partir de un archivo de configuración, un directorio
+    de tema o un archivo .tar/.zip; devuelve las estadísticas de la importación.
+
+    Los archivos que no cambian respecto a la importación anterior o al tema del
+    sistema del mismo nombre no se vuelven a copiar.
+    """
+    name = name or archive_theme_name(source)
+    _check_name(name)
+    if not os.path.exists(source):
+        raise ThemeError(f"No existe {source}")
+
+    theme_dir = os.path.join(themes_dir, name)
+    if os.path.exists(theme_dir) and not overwrite:
+        raise ThemeError(f"El tema {name} ya existe")
+    base_dirs = (theme_dir, os.path.join(THEMES_DIR, name))
+
+    try:
+        os.makedirs(themes_dir, exist_ok=True)
+        if os.path.isdir(source) or is_archive(source):
+            return import_tree(source, theme_dir, base_dirs)
+
+        # Un solo archivo de configuración: se prepara un tema mínimo y se importa igual
+        with tempfile.TemporaryDirectory(dir=themes_dir, prefix=".import-") as staging:
+            with open(source, 'rb') as f:
+                write_atomic(os.path.join(staging, "config"), f.read())
+            with open(os.path.join(staging, "README.md"), 'w') as f:
+                f.write(f"# {name}\n\nTema personalizado para Polybar.\n")
+            return import_tree(staging, theme_dir, base_dirs)
+    except (ThemeImportError, OSError) as e:
+        raise ThemeError(f"No se pudo importar el tema: {e}") from e
+
+def fork_theme(theme_path, name=None, overwrite=False, themes_dir=USER_THEMES_DIR):
+    """Crea una copia de usuario editable de un tema sin duplicar sus archivos"""
+    name = name or os.path.basename(os.path.normpath(theme_path))
+    _check_name(name)
+    theme_dir = os.path.join(themes_dir, name)
+    if os.path.exists(theme_dir) and not overwrite:
+        raise ThemeError(f"El tema {name} ya existe")
+    try:
+        return fork_tree(theme_path, theme_dir)
+    except (ThemeImportError, OSError) as e:
+        raise ThemeError(f"No se pudo copiar el tema: {e}") from e
+
+def create_overlay(theme_path, name=None, overwrite=False, themes_dir=USER_THEMES_DIR):
+    """Crea un tema de usuario que guarda solo los cambios sobre theme_path"""
+    name = name or os.path.basename(os.path.normpath(theme_path))
+    _check_name(name)
+    try:
+        return create_overlay_dir(theme_path, os.path.join(themes_dir, name), overwrite=overwrite)
+    except OverlayError as e:
+        raise ThemeError(str(e)) from e
+
+def create_low_power_theme(theme_path, budget=DEFAULT_BUDGET, name=None, overwrite=False,
+                           themes_dir=USER_THEMES_DIR):
+    """Crea un tema superpuesto con los intervalos alargados hasta budget despertares por segundo.
+
+    Si theme_path ya es superpuesto, el tema nuevo se apoya en su mismo tema base
+    y conserva sus cambios. Devuelve la ruta, los cambios y los despertares antes y después.
+    """
+    name = name or os.path.basename(os.path.normpath(theme_path)) + LOW_POWER_SUFFIX
+    _check_name(name)
+    try:
+        costs, totals = profile_theme(theme_path)
+    except OSError as e:
+        raise ThemeError(f"No se pudo analizar el tema: {e}") from e
+    changes, wakeups = low_power_intervals(costs, budget)
+
+    try:
+        if is_overlay(theme_path):
+            overlay = read_overlay(theme_path)
+            path = create_overlay_dir(base_path(overlay["base"]), os.path.join(themes_dir, name), overwrite=overwrite)
+            update_overlay(path, overlay.get("sections", {}))
+        else:
+            path = create_overlay_dir(theme_path, os.path.join(themes_dir, name), overwrite=overwrite)
+        update_overlay(path, changes)
+    except OverlayError as e:
+        raise ThemeError(str(e)) from e
+    return {"path": path, "changes": changes, "budget": budget,
+            "wakeups_before": totals["wakeups"], "wakeups_after": wakeups}
+
+def export_theme(theme_path, destination):
+    """Empaqueta un tema en .tar.gz o .zip (según la extensión); devuelve la ruta creada"""
+    name = os.path.basename(os.path.normpath(theme_path))
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, f"{name}.tar.gz")
+
+    tmp_path = f"{destination}.{os.getpid()}.tmp"
+    try:
+        if destination.endswith(".zip"):
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for directory, _, files in os.walk(theme_path):
+                    for file_name in sorted(files):
+                        path = os.path.join(directory, file_name)
+                        archive.write(path, os.path.join(name, os.path.relpath(path, theme_path)))
+        else:
+            with tarfile.open(tmp_path, 'w:gz') as archive:
+                archive.add(theme_path, arcname=name)
+        os.replace(tmp_path, destination)
+    except OSError as e:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise ThemeError(f"No se pudo exportar el tema: {e}") from e
+    return destination
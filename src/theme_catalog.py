@@ -0,0 +1,170 @@
+import os
+import json
+
+from paths import CACHE_DIR
+from overlay import OVERLAY_NAME
+
+# Índice persistente de temas
+INDEX_PATH = os.path.join(CACHE_DIR, "theme_index.json")
+INDEX_VERSION = 2
+
+CONFIG_VARIANTS = ("config", "config.ini")
+
+def _dir_key(st):
+    """Clave de validación de un directorio (mtime + inodo)"""
+    return [st.st_mtime_ns, st.st_ino]
+
+def read_readme_summary(readme_path):
+    """Devuelve el primer párrafo de texto de un README, sin títulos"""
+    lines = []
+    try:
+        with open(readme_path, 'r', errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    if lines:
+                        break
+                    continue
+                lines.append(line)
+    except OSError:
+        return ""
+    return " ".join(lines)
+
+def scan_theme_dir(theme_dir):
+    """Examina un directorio de tema y devuelve sus metadatos, o None si no es un tema"""
+    try:
+        names = set(os.listdir(theme_dir))
+    except OSError:
+        return None
+
+    config = next((variant for variant in CONFIG_VARIANTS + (OVERLAY_NAME,) if variant in names), None)
+    if config is None:
+        return None
+
+    return {
+        "config": config,
+        "overlay": config == OVERLAY_NAME,
+        "preview": "preview.png" in names,
+        "summary": read_readme_summary(os.path.join(theme_dir, "README.md")) if "README.md" in names else "",
+    }
+
+class ThemeCatalog:
+    """Catálogo de temas con un índice en disco validado por mtime/inodo de cada directorio.
+
+    Una carga en caliente solo consulta el directorio raíz de cada ubicación; los
+    directorios de tema solo se vuelven a examinar cuando su raíz cambia o cuando
+    se pide una revalidación explícita.
+    """
+
+    def __init__(self, roots, index_path=INDEX_PATH):
+        # roots: lista de tuplas (directorio, tipo), p. ej. (THEMES_DIR, "system")
+        self.roots = roots
+        self.index_path = index_path
+        self._index = None
+        self._dirty = False
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if index.get("version") != INDEX_VERSION:
+                raise ValueError("versión de índice incompatible")
+        except (OSError, ValueError):
+            index = {"version": INDEX_VERSION, "roots": {}}
+
+        self._index = index
+        return index
+
+    def _save_index(self):
+        if not self._dirty:
+            return
+
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except OSError:
+            # El índice es solo una optimización; si no se puede guardar se reconstruye
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def _refresh_root(self, root, cached, revalidate):
+        """Actualiza la entrada del índice de un directorio raíz"""
+        try:
+            root_st = os.stat(root)
+        except OSError:
+            return None
+
+        root_key = _dir_key(root_st)
+        if cached is not None and cached["key"] == root_key and not revalidate:
+            return cached
+
+        old_themes = cached["themes"] if cached is not None else {}
+        themes = {}
+
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            try:
+                if not entry.is_dir():
+                    continue
+                theme_key = _dir_key(entry.stat())
+            except OSError:
+                continue
+
+            old = old_themes.get(entry.name)
+            if old is not None and old["key"] == theme_key:
+                themes[entry.name] = old
+                continue
+
+            info = scan_theme_dir(entry.path)
+            if info is not None:
+                info["key"] = theme_key
+                themes[entry.name] = info
+
+        if cached is None or cached["key"] != root_key or cached["themes"] != themes:
+            self._dirty = True
+        return {"key": root_key, "themes": themes}
+
+    def load(self, revalidate=False):
+        """Devuelve la lista de temas ordenada por nombre.
+
+        Con revalidate=True se comprueba además cada directorio de tema, para
+        detectar cambios internos (p. ej. una vista previa añadida).
+        """
+        index = self._load_index()
+        themes = []
+
+        for root, theme_type in self.roots:
+            entry = self._refresh_root(root, index["roots"].get(root), revalidate)
+            if entry is None:
+                if index["roots"].pop(root, None) is not None:
+                    self._dirty = True
+                continue
+
+            index["roots"][root] = entry
+            for name, info in entry["themes"].items():
+                themes.append({
+                    "name": name,
+                    "path": os.path.join(root, name),
+                    "type": theme_type,
+                    "config": info["config"],
+                    "overlay": info["overlay"],
+                    "preview": info["preview"],
+                    "summary": info["summary"],
+                })
+
+        self._save_index()
+        themes.sort(key=lambda theme: (theme["name"], theme["type"]))
+        return themes
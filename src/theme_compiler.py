@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+
+from paths import CACHE_DIR
+from fileutil import write_atomic
+from overlay import load_theme
+from polybar_ini import load_theme_config
+
+# Compilación de temas: la configuración y todos sus include se aplanan en un solo
+# archivo sin comentarios, guardado en caché por el hash de su contenido. Los include
+# que no se encuentran (p. ej. ~/.config/polybar/<tema>/bars.ini de los temas de
+# adi1090x) se dejan en el resultado para que los resuelva polybar, con un aviso.
+COMPILED_DIR = os.path.join(CACHE_DIR, "compiled")
+COMPILER_VERSION = 2
+
+class CompileError(Exception):
+    pass
+
+def _format_value(value):
+    # El analizador quita las comillas; se reponen si sin ellas se perdería el valor
+    if value != value.strip() or (len(value) >= 2 and value[0] == value[-1] == '"'):
+        return f'"{value}"'
+    return value
+
+def _unresolved(config):
+    """Include sin resolver, sin repetir"""
+    seen, result = set(), []
+    for include in config.missing_includes:
+        if (include.directory, include.target) not in seen:
+            seen.add((include.directory, include.target))
+            result.append(include)
+    return result
+
+def flatten(config):
+    """Texto de una configuración con los include resueltos y sin comentarios"""
+    lines = [f"{'include-directory' if include.directory else 'include-file'} = {include.target}"
+             for include in _unresolved(config)]
+    for section in config.sections.values():
+        if lines:
+            lines.append("")
+        lines.append(f"[{section.name}]")
+        for entry in section.entries.values():
+            lines.append(f"{entry.key} = {_format_value(entry.value)}".rstrip())
+    return "\n".join(lines) + "\n"
+
+def compile_warnings(config):
+    return [f"{include.path}:{include.line}: no se encuentra {include.target}; se deja para que lo busque polybar"
+            for include in config.missing_includes]
+
+def _missing_paths(config):
+    """Rutas donde podrían aparecer los include que faltan (invalidan la caché si aparecen)"""
+    paths = []
+    for include in config.missing_includes:
+        path = os.path.expandvars(os.path.expanduser(include.target))
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(include.path), path)
+        paths.append(os.path.normpath(path))
+        if not include.directory:
+            paths.append(os.path.join(os.path.dirname(include.path), os.path.basename(path)))
+    return paths
+
+def _check(config):
+    if config.errors:
+        path, line, message = config.errors[0]
+        raise CompileError(f"{path}:{line}: {message}")
+
+def flatten_theme(theme_path, overrides=None):
+    """Texto compilado de un tema con algunos archivos sustituidos ({ruta: texto}), sin caché"""
+    try:
+        config = load_theme_config(theme_path, overrides=overrides)
+    except OSError as e:
+        raise CompileError(f"No se pudo leer el tema: {e}") from e
+    _check(config)
+    return flatten(config)
+
+def _count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+def _manifest_path(cache_dir, config_path):
+    return os.path.join(cache_dir, hashlib.sha1(config_path.encode()).hexdigest() + ".json")
+
+def _files_current(files):
+    for path, (mtime_ns, size) in files.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+            return False
+    return True
+
+def compile_theme(theme_path, cache_dir=COMPILED_DIR):
+    """Compila un tema; devuelve un dict con path, digest, source_lines, lines, warnings y cached.
+
+    Si ninguno de los archivos del tema cambió desde la última compilación se
+    reutiliza el resultado sin volver a analizar nada.
+    """
+    theme_path = os.path.abspath(theme_path)
+    manifest_path = _manifest_path(cache_dir, theme_path)
+    previous_path = None
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        previous_path = manifest["path"]
+        if (manifest.get("version") == COMPILER_VERSION and _files_current(manifest["files"])
+                and not any(os.path.exists(path) for path in manifest["missing"])
+                and os.path.exists(previous_path)):
+            return dict(manifest["result"], path=previous_path, cached=True)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    try:
+        config = load_theme(theme_path)
+    except OSError as e:
+        raise CompileError(f"No se pudo leer el tema: {e}") from e
+    _check(config)
+
+    text = flatten(config)
+    data = text.encode()
+    digest = hashlib.sha256(data).hexdigest()
+    compiled_path = os.path.join(cache_dir, f"{digest}.ini")
+    result = {
+        "digest": digest,
+        "source_lines": sum(_count_lines(path) for path in config.files),
+        "lines": text.count("\n"),
+        "warnings": compile_warnings(config),
+    }
+
+    try:
+        if not os.path.exists(compiled_path):
+            os.makedirs(cache_dir, exist_ok=True)
+            write_atomic(compiled_path, data)
+        write_atomic(manifest_path, json.dumps({
+            "version": COMPILER_VERSION,
+            "files": config.files,
+            "missing": _missing_paths(config),
+            "path": compiled_path,
+            "result": result,
+        }))
+    except OSError as e:
+        raise CompileError(f"No se pudo guardar el tema compilado: {e}") from e
+
+    # La versión anterior del tema ya no la usa nadie (si otro tema la compartía, se recompila)
+    if previous_path and previous_path != compiled_path:
+        try:
+            os.unlink(previous_path)
+        except OSError:
+            pass
+
+    return dict(result, path=compiled_path, cached=False)
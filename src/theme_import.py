@@ -0,0 +1,330 @@
+import os
+import json
+import stat
+import fcntl
+import shutil
+import hashlib
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from theme_catalog import CONFIG_VARIANTS
+
+# Importación y bifurcación de temas: cada archivo se copia una sola vez y los que
+# ya existen con el mismo contenido en un tema base se clonan (reflink) o se enlazan
+CHUNK_SIZE = 1 << 20
+MANIFEST_NAME = ".manifest.json"
+MAX_WORKERS = min(8, os.cpu_count() or 2)
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".zip")
+# ioctl de Linux para compartir los bloques de un archivo (btrfs, xfs...)
+FICLONE = 0x40049409
+
+class ThemeImportError(Exception):
+    pass
+
+def is_archive(path):
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+def archive_theme_name(path):
+    name = os.path.basename(os.path.normpath(path))
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+def clone_file(source, target, allow_hardlink=False, allow_copy=True):
+    """Copia un archivo compartiendo sus bloques si es posible; devuelve el método usado.
+
+    Primero se prueba un reflink (copia diferida por el sistema de archivos); después,
+    si se permite, un enlace duro; y si nada de eso funciona, una copia normal (o
+    None si allow_copy es False). Los enlaces duros solo son seguros si el original
+    no se edita en su sitio.
+    """
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copymode(source, target)
+        return "reflink"
+    except OSError:
+        try:
+            os.unlink(target)
+        except OSError:
+            pass
+
+    if allow_hardlink:
+        try:
+            os.link(source, target)
+            return "hardlink"
+        except OSError:
+            pass
+
+    if not allow_copy:
+        return None
+    shutil.copyfile(source, target)
+    shutil.copymode(source, target)
+    return "copy"
+
+def file_mode(path):
+    """Bits de permiso de un archivo (launch.sh y los scripts deben seguir siendo ejecutables)"""
+    return stat.S_IMODE(os.stat(path).st_mode) & 0o777
+
+def _safe_relpath(name):
+    """Ruta relativa normalizada de un miembro de un archivo, o None si sale del destino"""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts or name.startswith("/"):
+        return None
+    return os.path.join(*parts)
+
+def _hardlink_safe(path, replaced):
+    """Un enlace duro solo es seguro si nadie más puede editar el archivo en su sitio:
+    porque pertenece al tema que se va a sustituir o porque no se puede escribir"""
+    if replaced and path.startswith(os.path.join(replaced, "")):
+        return True
+    return not os.access(path, os.W_OK)
+
+def _index_base(base_dirs, executor, replaced=None):
+    """Índice hash -> (ruta, enlace duro permitido) de los archivos de los temas base.
+
+    Si el tema tiene manifiesto (una importación anterior) se reutilizan sus hashes.
+    """
+    index = {}
+    pending = []
+    for base in base_dirs:
+        if not base or not os.path.isdir(base):
+            continue
+        try:
+            with open(os.path.join(base, MANIFEST_NAME), 'r') as f:
+                manifest = json.load(f)["files"]
+        except (OSError, ValueError, KeyError):
+            manifest = {}
+
+        for directory, _, files in os.walk(base):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                rel = os.path.relpath(path, base)
+                if rel == MANIFEST_NAME or os.path.islink(path):
+                    continue
+                if rel in manifest:
+                    index.setdefault(manifest[rel], (path, _hardlink_safe(path, replaced)))
+                else:
+                    pending.append((path, executor.submit(file_sha256, path)))
+
+    for path, future in pending:
+        try:
+            index.setdefault(future.result(), (path, _hardlink_safe(path, replaced)))
+        except OSError:
+            continue
+    return index
+
+class _ThemeBuilder:
+    """Construye un tema en un directorio temporal junto al destino"""
+
+    def __init__(self, destination, base_index, executor):
+        self.destination = destination
+        self.base_index = base_index
+        self.executor = executor
+        self.tmp_dir = os.path.join(os.path.dirname(destination),
+                                    f".{os.path.basename(destination)}.{os.getpid()}.tmp")
+        self.hashes = {}
+        self.stats = {"files": 0, "linked": 0, "copied": 0, "bytes_copied": 0}
+        self.futures = []
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+
+    def _target(self, rel):
+        target = os.path.join(self.tmp_dir, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        return target
+
+    def _record(self, rel, digest, method, size):
+        self.hashes[rel] = digest
+        self.stats["files"] += 1
+        if method == "copy":
+            self.stats["copied"] += 1
+            self.stats["bytes_copied"] += size
+        else:
+            self.stats["linked"] += 1
+
+    def _clone_base(self, base, target, mode, allow_copy=True):
+        """Clona un archivo del tema base con los permisos del origen; el enlace duro solo
+        si ya los tiene, porque cambiarlos en el enlace los cambiaría también en el base"""
+        method = clone_file(base[0], target, allow_hardlink=base[1] and file_mode(base[0]) == mode,
+                            allow_copy=allow_copy)
+        if method not in (None, "hardlink"):
+            os.chmod(target, mode)
+        return method
+
+    def _add_path(self, rel, source):
+        digest = file_sha256(source)
+        target = self._target(rel)
+        base = self.base_index.get(digest)
+        if base is not None:
+            method = self._clone_base(base, target, file_mode(source))
+        else:
+            # El origen es del usuario: un enlace duro compartiría sus cambios futuros
+            method = clone_file(source, target)
+        return rel, digest, method, os.path.getsize(target)
+
+    def add_path(self, rel, source):
+        """Añade un archivo del disco; el hash y la copia se hacen en el grupo de hilos"""
+        self.futures.append(self.executor.submit(self._add_path, rel, source))
+
+    def add_stream(self, rel, stream, mode=None):
+        """Añade un archivo leído de un flujo, calculando el hash mientras se escribe.
+
+        mode son los permisos guardados en el archivo .tar/.zip (None si no los tiene).
+        """
+        target = self._target(rel)
+        digest = hashlib.sha256()
+        size = 0
+        with open(target, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        if mode is not None:
+            os.chmod(target, mode)
+
+        digest = digest.hexdigest()
+        method = "copy"
+        base = self.base_index.get(digest)
+        if base is not None:
+            # Si se puede compartir con el tema base, la copia recién escrita sobra
+            clone = f"{target}.clone"
+            method = self._clone_base(base, clone, file_mode(target), allow_copy=False) or "copy"
+            if method != "copy":
+                os.replace(clone, target)
+        self._record(rel, digest, method, size)
+
+    def _theme_root(self):
+        """Raíz del tema: el propio directorio o su único subdirectorio (p. ej. 'tema/' en un tar)"""
+        root = self.tmp_dir
+        while not any(os.path.isfile(os.path.join(root, variant)) for variant in CONFIG_VARIANTS):
+            entries = os.listdir(root)
+            if len(entries) != 1 or not os.path.isdir(os.path.join(root, entries[0])):
+                raise ThemeImportError("No se encontró un archivo de configuración (config o config.ini)")
+            root = os.path.join(root, entries[0])
+        return root
+
+    def finish(self):
+        for future in self.futures:
+            self._record(*future.result())
+
+        root = self._theme_root()
+        prefix = os.path.relpath(root, self.tmp_dir)
+        files = {os.path.relpath(rel, prefix) if prefix != "." else rel: digest
+                 for rel, digest in self.hashes.items()}
+        with open(os.path.join(root, MANIFEST_NAME), 'w') as f:
+            json.dump({"files": files}, f, indent=1, sort_keys=True)
+
+        # Sustitución del tema anterior: primero se aparta, luego se mueve el nuevo
+        old_dir = None
+        if os.path.exists(self.destination):
+            old_dir = f"{self.tmp_dir}.old"
+            os.rename(self.destination, old_dir)
+        try:
+            os.rename(root, self.destination)
+        except OSError:
+            if old_dir is not None:
+                os.rename(old_dir, self.destination)
+            raise
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        return dict(self.stats, path=self.destination)
+
+    def abort(self):
+        for future in self.futures:
+            future.cancel()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+def _add_directory(builder, source):
+    for directory, _, files in os.walk(source):
+        for file_name in files:
+            path = os.path.join(directory, file_name)
+            rel = os.path.relpath(path, source)
+            if rel != MANIFEST_NAME and os.path.isfile(path):
+                builder.add_path(rel, path)
+
+def _add_tar(builder, source):
+    # Modo flujo: el archivo se lee una sola vez, sin buscar hacia atrás
+    with tarfile.open(source, 'r|*') as archive:
+        for member in archive:
+            rel = _safe_relpath(member.name)
+            # Solo archivos normales: nada de enlaces ni dispositivos
+            if rel is None or not member.isfile() or os.path.basename(rel) == MANIFEST_NAME:
+                continue
+            builder.add_stream(rel, archive.extractfile(member), member.mode & 0o777)
+
+def _add_zip(builder, source):
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            rel = _safe_relpath(info.filename)
+            if rel is None or info.is_dir() or os.path.basename(rel) == MANIFEST_NAME:
+                continue
+            # Los zip creados fuera de Unix no guardan permisos (external_attr sin los 16 bits altos)
+            mode = (info.external_attr >> 16) & 0o777 or None
+            with archive.open(info) as stream:
+                builder.add_stream(rel, stream, mode)
+
+def import_tree(source, destination, base_dirs=()):
+    """Importa un directorio o un archivo .tar/.zip como tema en destination.
+
+    Los archivos idénticos a alguno de base_dirs (el tema del sistema del que se
+    parte o la importación anterior) se clonan desde allí en lugar de copiarse;
+    solo se enlazan cuando el enlace no puede propagar ediciones al original.
+    Devuelve estadísticas: files, linked, copied, bytes_copied y path.
+    """
+    if not os.path.isdir(source) and not is_archive(source):
+        raise ThemeImportError(f"{source} no es un directorio ni un archivo .tar/.zip")
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        builder = _ThemeBuilder(destination, _index_base(base_dirs, executor, replaced=destination), executor)
+        try:
+            if os.path.isdir(source):
+                _add_directory(builder, source)
+            elif source.lower().endswith(".zip"):
+                _add_zip(builder, source)
+            else:
+                _add_tar(builder, source)
+            return builder.finish()
+        except (tarfile.TarError, zipfile.BadZipFile) as e:
+            builder.abort()
+            raise ThemeImportError(f"Archivo no válido: {e}") from e
+        except BaseException:
+            builder.abort()
+            raise
+
+def fork_theme(source, destination):
+    """Copia un tema (p. ej. del sistema) para editarlo sin duplicar sus archivos"""
+    return import_tree(source, destination, base_dirs=(source,))
+
+def verify_theme(theme_dir):
+    """Archivos que ya no coinciden con el manifiesto del tema (modificados o ausentes)"""
+    try:
+        with open(os.path.join(theme_dir, MANIFEST_NAME), 'r') as f:
+            files = json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+    changed = []
+    for rel, digest in sorted(files.items()):
+        try:
+            if file_sha256(os.path.join(theme_dir, rel)) != digest:
+                changed.append(rel)
+        except OSError:
+            changed.append(rel)
+    return changed
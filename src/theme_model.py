@@ -0,0 +1,140 @@
+import os
+
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QAbstractListModel, QModelIndex, pyqtSignal
+
+from thumbnails import ICON_SIZE
+from theme_previews import generated_preview
+
+class _PreviewSignals(QObject):
+    # número de carga de la lista, {ruta del tema: captura generada o None}
+    resolved = pyqtSignal(int, object)
+
+class _ResolvePreviewsJob(QRunnable):
+    """Busca las capturas generadas de los temas sin preview.png fuera del hilo de la interfaz"""
+
+    def __init__(self, generation, theme_paths, signals):
+        super().__init__()
+        self.generation = generation
+        self.theme_paths = theme_paths
+        self.signals = signals
+
+    def run(self):
+        # Comprobar si una captura sigue valiendo hace un stat de cada archivo del tema
+        self.signals.resolved.emit(self.generation, {path: generated_preview(path) for path in self.theme_paths})
+
+class ThemeListModel(QAbstractListModel):
+    """Modelo perezoso de la lista de temas.
+
+    Las filas se añaden por lotes con fetchMore() a medida que la vista las
+    necesita y los iconos solo se piden para las filas que la vista dibuja.
+    """
+
+    PathRole = Qt.UserRole
+    BATCH_SIZE = 256
+
+    # Se conocen ya las capturas generadas de los temas sin preview.png
+    generated_previews_ready = pyqtSignal()
+
+    def __init__(self, thumbnails, parent=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails
+        self.thumbnails.thumbnail_ready.connect(self._thumbnail_ready)
+        self._themes = []
+        self._loaded = 0
+        self._rows_by_preview = {}
+        # Capturas generadas por ruta del tema, resueltas una vez por carga de la lista
+        self._generated = {}
+        self._generation = 0
+        self._preview_signals = _PreviewSignals()
+        self._preview_signals.resolved.connect(self._previews_resolved)
+
+    def set_themes(self, themes):
+        """Sustituye la lista de temas (ya ordenada por el catálogo)"""
+        self.beginResetModel()
+        self._themes = themes
+        self._loaded = 0
+        self._rows_by_preview = {}
+        self._generated = {}
+        self._generation += 1
+        self.endResetModel()
+
+        pending = [theme["path"] for theme in themes if not theme["preview"]]
+        if pending:
+            QThreadPool.globalInstance().start(_ResolvePreviewsJob(self._generation, pending, self._preview_signals))
+
+    def theme(self, index):
+        """Devuelve el diccionario del tema de un índice válido, o None"""
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        return self._themes[index.row()]
+
+    def preview_path(self, theme):
+        if not theme["preview"]:
+            # Sin preview.png: la captura generada, si sigue correspondiendo al tema (None hasta resolverla)
+            return self._generated.get(theme["path"])
+        return os.path.join(theme["path"], "preview.png")
+
+    def display_name(self, theme):
+        if theme["type"] == "user":
+            return theme["name"] + " (usuario)"
+        return theme["name"]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._themes)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.BATCH_SIZE, len(self._themes) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        theme = self.theme(index)
+        if theme is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.display_name(theme)
+        if role == self.PathRole:
+            return theme["path"]
+        if role == Qt.ToolTipRole:
+            return theme["summary"] or None
+        if role == Qt.DecorationRole:
+            preview_path = self.preview_path(theme)
+            if preview_path is None:
+                return None
+            # Solo se llega aquí para filas visibles: la miniatura se pide bajo demanda
+            self._rows_by_preview[preview_path] = index.row()
+            pixmap = self.thumbnails.get(preview_path, ICON_SIZE)
+            return QIcon(pixmap) if pixmap is not None else None
+        return None
+
+    def _previews_resolved(self, generation, previews):
+        if generation != self._generation:
+            return
+        self._generated = previews
+        rows = [row for row in range(self._loaded) if previews.get(self._themes[row]["path"])]
+        if rows:
+            self.dataChanged.emit(self.index(rows[0]), self.index(rows[-1]), [Qt.DecorationRole])
+        self.generated_previews_ready.emit()
+
+    def _thumbnail_ready(self, preview_path, width, height):
+        if (width, height) != (ICON_SIZE.width(), ICON_SIZE.height()):
+            return
+        row = self._rows_by_preview.get(preview_path)
+        if row is None or row >= self._loaded:
+            return
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
@@ -0,0 +1,145 @@
+import os
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from paths import CACHE_DIR
+from fileutil import write_atomic
+from overlay import load_theme
+from theme_compiler import compile_theme, CompileError
+from preview_render import render_preview, PreviewError
+
+# Vistas previas generadas para los temas que no traen preview.png. Las capturas se
+# guardan por el hash de la configuración aplanada; el índice relaciona cada tema con
+# su captura y con los archivos de los que salió, para saber sin analizar nada si
+# sigue valiendo.
+THEME_PREVIEWS_DIR = os.path.join(CACHE_DIR, "theme_previews")
+INDEX_NAME = "index.json"
+PREVIEW_NAME = "preview.png"
+# Cada captura pasa casi todo el tiempo en Xvfb y polybar: un hilo por núcleo basta
+MAX_WORKERS = os.cpu_count() or 2
+
+# Índice leído del disco: (directorio, mtime del índice, contenido)
+_index_cache = None
+
+def _files_current(files):
+    for path, (mtime_ns, size) in files.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+            return False
+    return True
+
+def _load_index(cache_dir):
+    global _index_cache
+    index_path = os.path.join(cache_dir, INDEX_NAME)
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return {}
+    if _index_cache is not None and _index_cache[:2] == (cache_dir, mtime):
+        return _index_cache[2]
+    try:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    _index_cache = (cache_dir, mtime, index)
+    return index
+
+def generated_preview(theme_path, cache_dir=THEME_PREVIEWS_DIR):
+    """Captura generada para un tema si sigue correspondiendo a su configuración, o None"""
+    entry = _load_index(cache_dir).get(os.path.abspath(theme_path))
+    if entry is None or not _files_current(entry["files"]):
+        return None
+    path = os.path.join(cache_dir, entry["preview"])
+    return path if os.path.exists(path) else None
+
+def theme_preview(theme_path, cache_dir=THEME_PREVIEWS_DIR):
+    """preview.png del tema o, si no tiene, la captura generada"""
+    path = os.path.join(theme_path, PREVIEW_NAME)
+    if os.path.exists(path):
+        return path
+    return generated_preview(theme_path, cache_dir)
+
+def _config_text(theme_path):
+    with open(compile_theme(theme_path)["path"], 'r') as f:
+        return f.read()
+
+def generate_previews(theme_paths, workers=MAX_WORKERS, cache_dir=THEME_PREVIEWS_DIR, into_theme=False,
+                      force=False):
+    """Genera en paralelo las vistas previas de varios temas.
+
+    Solo se dibujan los temas sin vista previa vigente, y una misma configuración
+    aplanada se dibuja una sola vez. Con into_theme=True la captura se copia
+    además como preview.png dentro del tema (p. ej. al construir el paquete).
+    Devuelve una lista de dicts con theme, path, cached y, si falló, error.
+    """
+    results = []
+    pending = []
+    for theme_path in (os.path.abspath(path) for path in theme_paths):
+        existing = None if force else theme_preview(theme_path, cache_dir)
+        if existing is None:
+            pending.append(theme_path)
+        else:
+            results.append({"theme": theme_path, "path": existing, "cached": True})
+
+    # La compilación (en caché casi siempre) se hace aquí; los hilos solo esperan a Xvfb y polybar
+    renders = {}
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for theme_path in pending:
+            try:
+                config_text = _config_text(theme_path)
+            except (CompileError, OSError) as e:
+                results.append({"theme": theme_path, "path": None, "cached": False, "error": str(e)})
+                continue
+            if config_text not in renders:
+                renders[config_text] = executor.submit(render_preview, config_text, cache_dir, None)
+            futures[theme_path] = renders[config_text]
+
+        updates = {}
+        for theme_path, future in futures.items():
+            try:
+                path = future.result()
+            except PreviewError as e:
+                results.append({"theme": theme_path, "path": None, "cached": False, "error": str(e)})
+                continue
+            updates[theme_path] = {"preview": os.path.basename(path), "files": load_theme(theme_path).files}
+            results.append({"theme": theme_path, "path": path, "cached": False})
+
+    if into_theme:
+        for result in results:
+            target = os.path.join(result["theme"], PREVIEW_NAME)
+            if result["path"] is None or result["path"] == target:
+                continue
+            try:
+                shutil.copyfile(result["path"], target)
+            except OSError as e:
+                result["error"] = str(e)
+
+    if updates:
+        index = dict(_load_index(cache_dir))
+        index.update(updates)
+        try:
+            write_atomic(os.path.join(cache_dir, INDEX_NAME), json.dumps(index))
+        except OSError:
+            pass
+        _prune(cache_dir, index)
+    return results
+
+def _prune(cache_dir, index):
+    """Borra las capturas a las que ya no apunta ningún tema"""
+    used = {entry["preview"] for entry in index.values()}
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(".png") and name not in used:
+            try:
+                os.unlink(os.path.join(cache_dir, name))
+            except OSError:
+                pass
@@ -0,0 +1,115 @@
+import os
+import re
+import shutil
+import subprocess
+from functools import lru_cache
+
+from overlay import load_theme
+
+ERROR = "error"
+WARNING = "advertencia"
+
+MODULE_LISTS = ("modules-left", "modules-center", "modules-right")
+FONT_KEY_RE = re.compile(r"^font-\d+$")
+
+class ValidationIssue:
+    __slots__ = ("severity", "message", "path", "line")
+
+    def __init__(self, severity, message, path=None, line=None):
+        self.severity = severity
+        self.message = message
+        self.path = path
+        self.line = line
+
+    def __str__(self):
+        location = ""
+        if self.path:
+            location = os.path.basename(self.path)
+            if self.line:
+                location += f":{self.line}"
+            location += ": "
+        return f"[{self.severity}] {location}{self.message}"
+
+@lru_cache(maxsize=1)
+def installed_font_families():
+    """Familias de fuentes instaladas según fontconfig (None si fc-list no está disponible)"""
+    if shutil.which("fc-list") is None:
+        return None
+    try:
+        result = subprocess.run(["fc-list", ":", "family"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    families = set()
+    for line in result.stdout.splitlines():
+        for family in line.split(","):
+            family = family.strip().lower()
+            if family:
+                families.add(family)
+    return families
+
+def font_family(value):
+    """Extrae la familia de un valor font-N ("Familia:size=10;2")"""
+    return value.split(";", 1)[0].split(":", 1)[0].strip().strip('"')
+
+def validate_config(config, check_fonts=True):
+    """Comprueba una configuración ya analizada y devuelve la lista de problemas"""
+    issues = []
+
+    for path, line, message in config.errors:
+        issues.append(ValidationIssue(ERROR, message, path, line))
+
+    for include in config.missing_includes:
+        issues.append(ValidationIssue(ERROR, f"No existe el archivo incluido {include.target}",
+                                      include.path, include.line))
+
+    for section, entry, reference, resolved in config.iter_references():
+        if resolved:
+            continue
+        # Una variable de entorno ausente puede existir en la sesión real
+        severity = WARNING if reference.startswith("${env:") else ERROR
+        issues.append(ValidationIssue(severity, f"Referencia sin resolver {reference} en [{section.name}] {entry.key}",
+                                      entry.path, entry.line))
+
+    bars = [section for name, section in config.sections.items() if name.startswith("bar/")]
+    if not bars:
+        issues.append(ValidationIssue(ERROR, "No hay ninguna sección [bar/...]", config.path))
+
+    families = installed_font_families() if check_fonts else None
+
+    for bar in bars:
+        for key in MODULE_LISTS:
+            entry = config.lookup(bar.name, key)
+            if entry is None:
+                continue
+            value, _ = config.resolve_value(bar.name, entry.value)
+            for module in dict.fromkeys(value.split()):
+                module_section = config.section(f"module/{module}")
+                if module_section is None:
+                    issues.append(ValidationIssue(ERROR, f"Módulo no definido '{module}' en {key} de [{bar.name}]",
+                                                  entry.path, entry.line))
+                elif config.get(module_section.name, "type") is None:
+                    issues.append(ValidationIssue(WARNING, f"El módulo '{module}' no tiene 'type'",
+                                                  module_section.path, module_section.line))
+
+        if families is None:
+            continue
+        for key, entry in bar.entries.items():
+            if not FONT_KEY_RE.match(key):
+                continue
+            family = font_family(entry.value)
+            if family and family.lower() not in families:
+                issues.append(ValidationIssue(WARNING, f"Fuente no instalada '{family}' ({key})",
+                                              entry.path, entry.line))
+
+    return issues
+
+def validate_theme(theme_path, check_fonts=True):
+    """Valida la configuración de un tema sin lanzar polybar"""
+    try:
+        config = load_theme(theme_path)
+    except OSError as e:
+        return [ValidationIssue(ERROR, f"No se pudo leer la configuración: {e}", theme_path)]
+    return validate_config(config, check_fonts)
+
+def has_errors(issues):
+    return any(issue.severity == ERROR for issue in issues)
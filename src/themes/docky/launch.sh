@@ -5,8 +5,13 @@
 # Terminar instancias en ejecución
 killall -q polybar
 
-# Esperar a que los procesos se cierren
-while pgrep -u $UID -x polybar >/dev/null; do sleep 1; done
+# Esperar a que los procesos se cierren (pwait espera en un pidfd; tail --pid
+# comprueba el proceso sin lanzar otros)
+if command -v pwait >/dev/null; then
+    pwait -u $UID -x polybar
+else
+    for pid in $(pgrep -u $UID -x polybar); do tail --pid="$pid" -s 0.05 -f /dev/null; done
+fi
 
 # Lanzar la barra
 polybar -q main -c "$HOME/.config/polybar/docky/config" &
@@ -0,0 +1,118 @@
+import os
+import hashlib
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+
+from paths import CACHE_DIR
+
+THUMBNAILS_DIR = os.path.join(CACHE_DIR, "thumbnails")
+
+# Tamaños usados por la lista de temas y el panel de vista previa
+ICON_SIZE = QSize(64, 64)
+PANE_SIZE = QSize(580, 180)
+
+def thumbnail_cache_path(source_path, mtime_ns, size):
+    """Ruta de la miniatura en disco; el mtime de la imagen original forma parte de la clave"""
+    key = f"{source_path}\0{mtime_ns}\0{size.width()}x{size.height()}"
+    return os.path.join(THUMBNAILS_DIR, hashlib.sha1(key.encode()).hexdigest() + ".png")
+
+def source_mtime_ns(source_path):
+    try:
+        return os.stat(source_path).st_mtime_ns
+    except OSError:
+        return None
+
+class _ThumbnailSignals(QObject):
+    # ruta original, ancho, alto, imagen escalada (nula si falló), mtime del original en ns
+    finished = pyqtSignal(str, int, int, QImage, object)
+
+class _ThumbnailJob(QRunnable):
+    """Decodifica y escala una vista previa fuera del hilo de la interfaz"""
+
+    def __init__(self, source_path, size, signals):
+        super().__init__()
+        self.source_path = source_path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        mtime_ns = source_mtime_ns(self.source_path)
+        if mtime_ns is not None:
+            cache_path = thumbnail_cache_path(self.source_path, mtime_ns, self.size)
+            if not image.load(cache_path):
+                source = QImage(self.source_path)
+                if not source.isNull():
+                    image = source.scaled(self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                    try:
+                        os.makedirs(THUMBNAILS_DIR, exist_ok=True)
+                        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                        if image.save(tmp_path, "PNG"):
+                            os.replace(tmp_path, cache_path)
+                    except OSError:
+                        pass
+
+        self.signals.finished.emit(self.source_path, self.size.width(), self.size.height(), image, mtime_ns)
+
+class ThumbnailCache(QObject):
+    """Miniaturas de vistas previas generadas en segundo plano.
+
+    Las imágenes se escalan en un QThreadPool, se guardan en disco invalidadas por
+    mtime y se mantienen en memoria en una caché LRU acotada de QPixmap.
+    """
+
+    # ruta original, ancho, alto
+    thumbnail_ready = pyqtSignal(str, int, int)
+
+    def __init__(self, max_pixmaps=256, parent=None):
+        super().__init__(parent)
+        self.max_pixmaps = max_pixmaps
+        self._pixmaps = OrderedDict()
+        self._pending = set()
+        # Miniaturas que no se pudieron decodificar: clave -> mtime del original al fallar.
+        # No se vuelven a encargar en cada repintado, solo cuando el original cambia
+        self._failed = {}
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount())))
+        self._signals = _ThumbnailSignals()
+        self._signals.finished.connect(self._job_finished)
+
+    def get(self, source_path, size):
+        """Devuelve la miniatura si está en memoria; si no, la encarga y devuelve None"""
+        key = (source_path, size.width(), size.height())
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+
+        if key in self._failed:
+            if source_mtime_ns(source_path) == self._failed[key]:
+                return None
+            del self._failed[key]
+
+        if key not in self._pending:
+            self._pending.add(key)
+            self._pool.start(_ThumbnailJob(source_path, QSize(size), self._signals))
+        return None
+
+    def clear(self):
+        """Vacía la caché en memoria (las miniaturas en disco se revalidan por mtime)"""
+        self._pixmaps.clear()
+        self._failed.clear()
+
+    def _job_finished(self, source_path, width, height, image, mtime_ns):
+        key = (source_path, width, height)
+        self._pending.discard(key)
+        if image.isNull():
+            self._failed[key] = mtime_ns
+            return
+
+        # QPixmap solo puede crearse en el hilo de la interfaz
+        self._pixmaps[key] = QPixmap.fromImage(image)
+        self._pixmaps.move_to_end(key)
+        while len(self._pixmaps) > self.max_pixmaps:
+            self._pixmaps.popitem(last=False)
+
+        self.thumbnail_ready.emit(source_path, width, height)
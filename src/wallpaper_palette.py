@@ -0,0 +1,271 @@
+import os
+import re
+import json
+import shlex
+import shutil
+import time
+import hashlib
+import colorsys
+import subprocess
+
+from paths import HOME, CACHE_DIR
+from fileutil import write_atomic
+
+# Paleta de polybar sacada del fondo de pantalla: la imagen se reduce a SAMPLE_SIZE
+# píxeles de lado, se agrupan sus colores (k-means con NumPy si está instalado, corte
+# por la mediana en Python puro si no) y los grupos se reparten entre los nombres de
+# colors.ini. El resultado se guarda por el hash de la imagen, así que cambiar de tema
+# o volver a un fondo ya visto no vuelve a leerla.
+WALLPAPER_PALETTES_DIR = os.path.join(CACHE_DIR, "wallpaper_palettes")
+PALETTE_VERSION = 1
+SAMPLE_SIZE = 64
+CLUSTERS = 8
+KMEANS_ITERATIONS = 10
+
+# Dónde guardan el fondo actual los programas habituales en Mabox/Openbox
+NITROGEN_CONFIG = os.path.join(HOME, ".config", "nitrogen", "bg-saved.cfg")
+FEHBG = os.path.join(HOME, ".fehbg")
+WALLPAPER_SOURCES = (NITROGEN_CONFIG, FEHBG)
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff")
+WATCH_INTERVAL = 2.0
+
+# Contraste mínimo entre el texto y el fondo de la barra (WCAG AA para texto normal)
+MIN_CONTRAST = 4.5
+# Luminosidad (HLS) máxima del fondo de la barra
+MAX_BACKGROUND_LIGHTNESS = 0.25
+# Alerta cuando el fondo de pantalla no tiene ningún rojo
+RED = (220, 70, 70)
+
+class WallpaperError(Exception):
+    pass
+
+def current_wallpaper(sources=WALLPAPER_SOURCES):
+    """Ruta del fondo de pantalla actual según nitrogen o feh, o None"""
+    for source in sources:
+        try:
+            with open(source, 'r', errors="replace") as f:
+                text = f.read()
+        except OSError:
+            continue
+        if source.endswith(".cfg"):
+            candidates = re.findall(r"^file=(.+)$", text, re.M)
+        else:
+            try:
+                candidates = [arg for line in text.splitlines() if "feh" in line for arg in shlex.split(line)]
+            except ValueError:
+                candidates = []
+        for candidate in candidates:
+            path = os.path.expanduser(candidate.strip())
+            if path.lower().endswith(IMAGE_SUFFIXES) and os.path.isfile(path):
+                return path
+    return None
+
+def image_digest(path):
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError as e:
+        raise WallpaperError(f"No se pudo leer {path}: {e}") from e
+    return digest.hexdigest()
+
+def _sample_pil(path, size):
+    from PIL import Image
+    with Image.open(path) as image:
+        # En JPEG, draft() decodifica ya reducido (1/2, 1/4 o 1/8): casi todo el ahorro está aquí
+        image.draft("RGB", (size * 2, size * 2))
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+        return image.tobytes()
+
+def _sample_imagemagick(path, size):
+    command = shutil.which("magick") or shutil.which("convert")
+    if command is None:
+        return None
+    args = [command, f"{path}[0]", "-resize", f"{size}x{size}", "-depth", "8", "rgb:-"]
+    try:
+        return subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+                              timeout=30).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        raise WallpaperError(f"ImageMagick no pudo leer {path}: {e}") from e
+
+def sample_pixels(path, size=SAMPLE_SIZE):
+    """Píxeles RGB (bytes) de la imagen reducida a size de lado como máximo"""
+    try:
+        data = _sample_pil(path, size)
+    except ImportError:
+        data = _sample_imagemagick(path, size)
+        if data is None:
+            raise WallpaperError("Hace falta python-pillow o imagemagick para leer el fondo de pantalla")
+    except OSError as e:
+        raise WallpaperError(f"No se pudo leer {path}: {e}") from e
+    if not data:
+        raise WallpaperError(f"La imagen {path} está vacía")
+    return data
+
+def _kmeans_numpy(data, clusters):
+    import numpy as np
+    pixels = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.float32)
+    # Centros iniciales repartidos por luminancia: el resultado no depende del azar
+    order = np.argsort(pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32))
+    centers = pixels[order[np.linspace(0, len(order) - 1, clusters).astype(int)]]
+    for _ in range(KMEANS_ITERATIONS):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=clusters)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, pixels)
+        new_centers = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(new_centers, centers, atol=0.5):
+            break
+        centers = new_centers
+    return [(tuple(int(round(c)) for c in center), int(count))
+            for center, count in zip(centers, counts) if count]
+
+def _median_cut(data, clusters):
+    pixels = [tuple(data[i:i + 3]) for i in range(0, len(data) - 2, 3)]
+    boxes = [pixels]
+    while len(boxes) < clusters:
+        # Se parte la caja con más variación en un canal, por la mediana de ese canal
+        def spread(box):
+            return max(max(p[c] for p in box) - min(p[c] for p in box) for c in range(3))
+        candidates = [box for box in boxes if len(box) > 1]
+        if not candidates:
+            break
+        box = max(candidates, key=spread)
+        channel = max(range(3), key=lambda c: max(p[c] for p in box) - min(p[c] for p in box))
+        box.sort(key=lambda p: p[channel])
+        middle = len(box) // 2
+        boxes.remove(box)
+        boxes.extend([box[:middle], box[middle:]])
+    return [(tuple(sum(p[c] for p in box) // len(box) for c in range(3)), len(box)) for box in boxes if box]
+
+def quantize(data, clusters=CLUSTERS):
+    """Colores dominantes [(rgb, píxeles)] de mayor a menor presencia, y el método usado"""
+    try:
+        colors, method = _kmeans_numpy(data, clusters), "kmeans"
+    except ImportError:
+        colors, method = _median_cut(data, clusters), "median-cut"
+    return sorted(colors, key=lambda item: -item[1]), method
+
+def _hex(rgb):
+    return "#{:02x}{:02x}{:02x}".format(*(max(0, min(255, int(c))) for c in rgb))
+
+def _luminance(rgb):
+    def channel(c):
+        c /= 255
+        return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+    r, g, b = (channel(c) for c in rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+def contrast(a, b):
+    high, low = sorted((_luminance(a), _luminance(b)), reverse=True)
+    return (high + 0.05) / (low + 0.05)
+
+def _shade(rgb, lightness):
+    h, _, s = colorsys.rgb_to_hls(*(c / 255 for c in rgb))
+    return tuple(round(c * 255) for c in colorsys.hls_to_rgb(h, lightness, s))
+
+def _readable(foreground, background):
+    """Aclara u oscurece foreground hasta que se lea sobre background"""
+    dark = _luminance(background) > 0.18
+    h, l, s = colorsys.rgb_to_hls(*(c / 255 for c in foreground))
+    while contrast(foreground, background) < MIN_CONTRAST and 0 < l < 1:
+        l = max(0.0, l - 0.05) if dark else min(1.0, l + 0.05)
+        foreground = tuple(round(c * 255) for c in colorsys.hls_to_rgb(h, l, s))
+    return foreground
+
+def _mix(a, b, amount):
+    return tuple(round(x + (y - x) * amount) for x, y in zip(a, b))
+
+def _hls(rgb):
+    return colorsys.rgb_to_hls(*(c / 255 for c in rgb))
+
+def build_palette(colors):
+    """Reparte los colores dominantes entre los nombres de colors.ini"""
+    if not colors:
+        raise WallpaperError("La imagen no tiene colores")
+    ranked = [rgb for rgb, _ in colors]
+    # Fondo: el color dominante, oscurecido si es claro para que la barra no deslumbre
+    background = ranked[0]
+    if _hls(background)[1] > MAX_BACKGROUND_LIGHTNESS:
+        background = _shade(background, MAX_BACKGROUND_LIGHTNESS)
+    text = max(ranked, key=lambda rgb: contrast(rgb, background))
+    foreground = _readable(text, background)
+
+    # Acentos: los más saturados (y no demasiado oscuros); alerta: el más rojo, o un rojo fijo
+    accents = sorted([rgb for rgb in ranked[1:] if rgb != text] or ranked, key=lambda rgb: -_hls(rgb)[2] * (0.5 + _luminance(rgb)))
+    def redness(rgb):
+        hue, _, saturation = _hls(rgb)
+        return saturation - 4 * min(hue, 1 - hue)
+    alert = max(ranked, key=redness)
+    if redness(alert) < 0.4:
+        alert = RED
+
+    palette = {
+        "background": background,
+        "background-alt": _mix(background, foreground, 0.12),
+        "foreground": foreground,
+        "foreground-alt": _mix(foreground, background, 0.4),
+        "primary": _readable(accents[0], background),
+        "secondary": _readable(accents[1] if len(accents) > 1 else accents[0], background),
+        "alert": _readable(alert, background),
+    }
+    return {name: _hex(rgb) for name, rgb in palette.items()}
+
+def wallpaper_palette(path=None, cache_dir=WALLPAPER_PALETTES_DIR, clusters=CLUSTERS):
+    """Paleta del fondo de pantalla (el actual si no se indica path).
+
+    Devuelve {"image", "palette", "colors", "method", "cached"}; palette usa los
+    nombres de colors.ini y se puede pasar tal cual a palette.apply_palette().
+    """
+    path = path or current_wallpaper()
+    if path is None:
+        raise WallpaperError("No se encontró el fondo de pantalla actual (nitrogen o feh)")
+    digest = image_digest(path)
+    cache_path = os.path.join(cache_dir, f"{digest}-{clusters}.json")
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if cached.get("version") == PALETTE_VERSION:
+            return dict(cached, image=path, cached=True)
+    except (OSError, ValueError):
+        pass
+
+    colors, method = quantize(sample_pixels(path), clusters)
+    result = {"version": PALETTE_VERSION, "palette": build_palette(colors), "method": method,
+              "colors": [{"color": _hex(rgb), "pixels": count} for rgb, count in colors]}
+    try:
+        write_atomic(cache_path, json.dumps(result))
+    except OSError:
+        pass
+    return dict(result, image=path, cached=False)
+
+def wallpaper_state(sources=WALLPAPER_SOURCES):
+    """Estado de los archivos que guardan el fondo: cambia cuando el usuario cambia de fondo"""
+    state = []
+    for source in sources:
+        try:
+            st = os.stat(source)
+            state.append((source, st.st_mtime_ns, st.st_size))
+        except OSError:
+            state.append((source, None, None))
+    return tuple(state)
+
+def watch(on_change, should_stop=lambda: False, sources=WALLPAPER_SOURCES, interval=WATCH_INTERVAL):
+    """Llama a on_change(ruta) cada vez que cambia el fondo de pantalla.
+
+    En cada vuelta solo se consulta el estado de los archivos de nitrogen y feh;
+    la imagen se lee únicamente cuando alguno cambia.
+    """
+    previous = wallpaper_state(sources)
+    while not should_stop():
+        time.sleep(interval)
+        state = wallpaper_state(sources)
+        if state == previous:
+            continue
+        previous = state
+        path = current_wallpaper(sources)
+        if path is not None:
+            on_change(path)
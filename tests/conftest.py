@@ -0,0 +1,14 @@
+import os
+import sys
+import shutil
+import tempfile
+
+# Las rutas de paths.py se calculan al importarlo: HOME temporal antes de importar nada de src
+HOME = tempfile.mkdtemp(prefix="mabox-panel-selector-home-")
+os.environ["HOME"] = HOME
+os.environ.pop("XDG_CACHE_HOME", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(HOME, ignore_errors=True)
@@ -0,0 +1,29 @@
+import os
+import time
+import zipfile
+
+from backup_store import BackupStore
+
+def test_expired_snapshots_are_archived(tmp_path):
+    store = BackupStore(str(tmp_path), keep_count=2)
+    now = time.time()
+    for i in range(4):
+        store.save(f"v{i}".encode(), timestamp=now + i)
+    assert [store.read(snapshot["hash"]) for snapshot in store.snapshots()] == [b"v2", b"v3"]
+    with zipfile.ZipFile(store.archive_path) as archive:
+        assert sorted(archive.read(name) for name in archive.namelist()) == [b"v0", b"v1"]
+
+def test_failed_archive_keeps_snapshots(tmp_path):
+    store = BackupStore(str(tmp_path), keep_count=2)
+    # Un directorio en lugar del zip: la escritura falla como con el disco lleno
+    os.makedirs(store.archive_path)
+    now = time.time()
+    for i in range(4):
+        store.save(f"v{i}".encode(), timestamp=now + i)
+    assert [store.read(snapshot["hash"]) for snapshot in store.snapshots()] == [b"v0", b"v1", b"v2", b"v3"]
+
+    os.rmdir(store.archive_path)
+    store.save(b"v4", timestamp=now + 4)
+    assert len(store.snapshots()) == 2
+    with zipfile.ZipFile(store.archive_path) as archive:
+        assert len(archive.namelist()) == 3
@@ -0,0 +1,101 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from bar_orchestrator import (BarOrchestrator, StaticMonitorSource, Monitor, BAR_READY, BAR_NAME,
+                              monitor_key)
+
+class FakeSupervisor:
+    """Lanza procesos que duermen con la línea de órdenes de polybar y crean su socket IPC"""
+
+    def __init__(self, ipc_dir):
+        self.ipc_dir = ipc_dir
+        self.processes = {}
+        self.started = []
+
+    def start(self, args=None, env=None):
+        args = ["polybar", "main"] if args is None else list(args)
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", *args],
+                                   stdin=subprocess.DEVNULL)
+        open(os.path.join(self.ipc_dir, f"ipc.{process.pid}.sock"), 'w').close()
+        self.processes[process.pid] = process
+        self.started.append(args)
+        return process
+
+    def running_pids(self):
+        return sorted(pid for pid, process in self.processes.items() if process.poll() is None)
+
+    def stop(self, timeout=2.0, pids=None):
+        for pid in self.running_pids() if pids is None else list(pids):
+            process = self.processes.pop(pid)
+            process.terminate()
+            process.wait(timeout)
+
+def monitor(name, x=0, primary=False):
+    return Monitor(name, 1920, 1080, x, 0, primary)
+
+@pytest.fixture
+def orchestrator(tmp_path):
+    ipc_dir = tmp_path / "ipc"
+    ipc_dir.mkdir()
+    supervisor = FakeSupervisor(str(ipc_dir))
+    config = tmp_path / "config.ini"
+    config.write_text("[bar/main]\nheight = 30\n")
+    orchestrator = BarOrchestrator(supervisor, StaticMonitorSource([monitor("HDMI-1"), monitor("DP-1", 1920)]),
+                                   config_path=str(config), config_dir=str(tmp_path / "monitors"),
+                                   overrides_path=str(tmp_path / "monitors.json"), ipc_dirs=[str(ipc_dir)])
+    os.makedirs(orchestrator.config_dir)
+    yield orchestrator
+    supervisor.stop()
+
+def test_sync_starts_one_bar_per_monitor(orchestrator):
+    result = orchestrator.sync()
+    assert sorted(report["monitor"] for report in result["started"]) == ["DP-1", "HDMI-1"]
+    assert all(report["state"] == BAR_READY for report in result["started"])
+    assert sorted(orchestrator.running_bars()[0]) == ["DP-1", "HDMI-1"]
+
+def test_sync_keeps_unaffected_bars(orchestrator):
+    orchestrator.sync()
+    bars = orchestrator.running_bars()[0]
+    orchestrator.source = StaticMonitorSource([monitor("HDMI-1"), monitor("eDP-1", 3840)])
+
+    result = orchestrator.sync()
+    assert result["kept"] == ["HDMI-1"]
+    assert result["stopped"] == ["DP-1"]
+    assert [report["monitor"] for report in result["started"]] == ["eDP-1"]
+    after = orchestrator.running_bars()[0]
+    assert after["HDMI-1"] == bars["HDMI-1"]
+    assert sorted(after) == ["HDMI-1", "eDP-1"]
+
+def test_sync_without_monitors_stops_nothing(orchestrator):
+    orchestrator.sync()
+    bars = orchestrator.running_bars()[0]
+    result = orchestrator.sync([])
+    assert result == {"started": [], "stopped": [], "kept": ["DP-1", "HDMI-1"]}
+    assert orchestrator.running_bars()[0] == bars
+
+def test_sync_without_monitors_starts_plain_bar(orchestrator):
+    result = orchestrator.sync([])
+    assert [report["monitor"] for report in result["started"]] == [""]
+    assert orchestrator.supervisor.started == [["polybar", "main"]]
+    # Cuando aparecen los monitores la barra provisional se sustituye por las de cada uno
+    orchestrator.sync()
+    bars, unmanaged = orchestrator.running_bars()
+    assert sorted(bars) == ["DP-1", "HDMI-1"] and unmanaged == []
+
+def test_monitor_config_overrides(orchestrator):
+    with open(orchestrator.overrides_path, 'w') as f:
+        f.write('{"HDMI-1": {"height": 40, "bottom": true}}')
+    path = orchestrator.monitor_config(monitor("HDMI-1"))
+    assert os.path.basename(path) == f"{monitor_key('HDMI-1')}.ini"
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+    assert f"[bar/{BAR_NAME}-HDMI-1]" in lines
+    assert "monitor = HDMI-1" in lines
+    assert lines[-2:] == ["height = 40", "bottom = true"]
+    mtime = os.stat(path).st_mtime_ns
+    # Sin cambios no se reescribe el archivo
+    orchestrator.monitor_config(monitor("HDMI-1"))
+    assert os.stat(path).st_mtime_ns == mtime
@@ -0,0 +1,13 @@
+from overlay import create_overlay, load_theme
+
+def test_missing_include_of_base_is_picked_up(tmp_path):
+    base = tmp_path / "base"
+    base.mkdir()
+    (base / "config.ini").write_text("[bar/main]\nheight = 30\ninclude-file = colors.ini\n")
+    theme = create_overlay(str(base), str(tmp_path / "theme"))
+
+    assert [include.target for include in load_theme(theme).missing_includes] == ["colors.ini"]
+    (base / "colors.ini").write_text("[color]\nbackground = #222\n")
+    config = load_theme(theme)
+    assert not config.missing_includes
+    assert config.get("color", "background") == "#222"
@@ -0,0 +1,121 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from paths import HOME
+from panel_switch import (toggle_autostart, update_autostart, autostart_backups, PanelSwitchError,
+                          DISABLED_PREFIX, STANZA_BEGIN, STANZA_END, POLYBAR_LAUNCH, is_polybar_service)
+
+AUTOSTART = """# Autostart de Openbox
+nitrogen --restore &
+(sleep 1s && tint2) &
+# conky
+conky -c ~/.config/conky/mabox.conkyrc &
+"""
+
+@pytest.fixture
+def autostart():
+    directory = os.path.join(HOME, ".config", "openbox")
+    os.makedirs(directory)
+    path = os.path.join(directory, "autostart")
+    with open(path, 'w') as f:
+        f.write(AUTOSTART)
+    yield path
+    shutil.rmtree(directory)
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+def test_home_is_temporary():
+    assert HOME == os.environ["HOME"]
+    assert os.path.basename(HOME).startswith("mabox-panel-selector-home-")
+
+@pytest.mark.parametrize("panel", ["polybar", "tint2"])
+def test_toggle_is_idempotent(panel):
+    once = toggle_autostart(AUTOSTART, panel)
+    assert toggle_autostart(once, panel) == once
+
+def test_polybar_disables_only_tint2_and_adds_stanza():
+    text = toggle_autostart(AUTOSTART, "polybar")
+    lines = text.splitlines()
+    assert DISABLED_PREFIX + "(sleep 1s && tint2) &" in lines
+    assert "nitrogen --restore &" in lines
+    assert "# conky" in lines
+    assert lines[-3:] == [STANZA_BEGIN, POLYBAR_LAUNCH, STANZA_END]
+
+def test_round_trip_restores_original():
+    assert toggle_autostart(toggle_autostart(AUTOSTART, "polybar"), "tint2") == AUTOSTART
+
+def test_legacy_commented_tint2_is_restored():
+    # Así lo dejaban los antiguos scripts de bash
+    legacy = "nitrogen --restore &\n#(sleep 1s && tint2) &\n[ -x /usr/bin/polybar ] && polybar main &\n"
+    assert toggle_autostart(legacy, "tint2") == "nitrogen --restore &\n(sleep 1s && tint2) &\n"
+
+def test_legacy_comment_left_alone_when_tint2_is_active():
+    text = "(sleep 1s && tint2) &\n#tint2 -c ~/.config/tint2/old.tint2rc &\n"
+    assert toggle_autostart(text, "tint2") == text
+
+def test_unknown_panel():
+    with pytest.raises(PanelSwitchError):
+        toggle_autostart(AUTOSTART, "lxpanel")
+
+@pytest.mark.parametrize("panel", ["polybar", "tint2"])
+def test_update_autostart_twice_gives_same_file(autostart, panel):
+    update_autostart(panel, autostart)
+    first = read(autostart)
+    assert update_autostart(panel, autostart) is False
+    assert read(autostart) == first
+
+def test_update_autostart_keeps_backup(autostart):
+    assert update_autostart("polybar", autostart) is True
+    assert autostart_backups(autostart).restore_previous(autostart) is not None
+    assert read(autostart) == AUTOSTART
+
+def test_missing_autostart(autostart):
+    os.remove(autostart)
+    with pytest.raises(PanelSwitchError):
+        update_autostart("polybar", autostart)
+
+def test_unreadable_autostart(autostart):
+    # Un directorio en lugar del archivo falla también con root, al contrario que chmod 0
+    os.remove(autostart)
+    os.mkdir(autostart)
+    with pytest.raises(PanelSwitchError):
+        update_autostart("polybar", autostart)
+
+@pytest.mark.parametrize("args, expected", [
+    (["/bin/bash", "/usr/bin/mabox-panel-selector", "bars", "--watch"], True),
+    (["python", "/usr/share/mabox-panel-selector/panel_selector.py", "scripts", "serve"], True),
+    (["python3", "panel_cli.py", "bars"], False),
+    (["python3", "panel_cli.py", "switch", "tint2"], False),
+    (["python3", "panel_cli.py", "scripts", "list"], False),
+    (["polybar", "main"], False),
+])
+def test_polybar_services(args, expected):
+    assert is_polybar_service(args) is expected
+
+def test_polybar_launch_falls_back_only_without_selector(tmp_path):
+    # Se sustituyen las rutas absolutas para probar las dos ramas con órdenes falsas
+    log = tmp_path / "log"
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name in ("polybar", "mabox-panel-selector"):
+        path = bin_dir / name
+        path.write_text(f'#!/bin/sh\necho "{name} $*" >> {log}\n[ "$1" != bars ]\n')
+        path.chmod(0o755)
+
+    def run():
+        command = POLYBAR_LAUNCH.replace("/usr/bin/", f"{bin_dir}/").rstrip("& ") + "; wait"
+        subprocess.run(["sh", "-c", command], timeout=10,
+                       env=dict(os.environ, PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}"))
+        lines = sorted(read(log).splitlines())
+        log.unlink()
+        return lines
+
+    # bars --watch termina con error: no se lanza 'polybar main'
+    assert run() == ["mabox-panel-selector bars --watch", "mabox-panel-selector scripts serve"]
+    (bin_dir / "mabox-panel-selector").unlink()
+    assert run() == ["polybar main"]
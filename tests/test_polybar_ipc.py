@@ -0,0 +1,107 @@
+import os
+import shutil
+import socket
+import struct
+import threading
+
+import pytest
+
+import polybar_ipc
+from polybar_ipc import TYPE_CMD, TYPE_OK, TYPE_ERR, IPCError, encode_message, read_message, send_command
+from process_supervisor import PolybarSupervisor
+
+class FakeIPCServer:
+    """Servidor IPC falso que imita a polybar, para probar la recarga sin X.
+
+    Crea <directorio>/ipc.<pid>.sock con el PID del proceso actual, registra los
+    mensajes recibidos como (tipo, texto) y responde con TYPE_OK (o con
+    TYPE_ERR a los comandos de reject_commands).
+    """
+
+    def __init__(self, directory, reject_commands=()):
+        self.path = os.path.join(directory, f"ipc.{os.getpid()}.sock")
+        self.reject_commands = set(reject_commands)
+        self.messages = []
+        self._sock = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(4)
+        threading.Thread(target=self._serve, args=(self._sock,), daemon=True).start()
+        return self
+
+    def _serve(self, sock):
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    msg_type, payload = read_message(conn)
+                except (OSError, IPCError, struct.error):
+                    continue
+                self.messages.append((msg_type, payload))
+                if payload in self.reject_commands:
+                    conn.sendall(encode_message(TYPE_ERR, f"Comando rechazado: {payload}"))
+                else:
+                    conn.sendall(encode_message(TYPE_OK, ""))
+
+    def stop(self):
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+@pytest.fixture
+def ipc_dir(tmp_path, monkeypatch):
+    # Ni los sockets ni las colas de polybar de verdad que pueda haber en el equipo
+    monkeypatch.setattr(polybar_ipc, "socket_dirs", lambda: [str(tmp_path / "polybar")])
+    monkeypatch.setattr(polybar_ipc, "find_legacy_fifos", lambda: [])
+    return str(tmp_path / "polybar")
+
+def test_command_reaches_socket(ipc_dir):
+    with FakeIPCServer(ipc_dir) as server:
+        assert send_command("restart") == 1
+    assert server.messages == [(TYPE_CMD, "restart")]
+
+def test_rejected_command(ipc_dir):
+    with FakeIPCServer(ipc_dir, reject_commands=("restart",)) as server:
+        assert send_command("restart") == 0
+    assert server.messages == [(TYPE_CMD, "restart")]
+
+def test_reload_uses_ipc(ipc_dir):
+    supervisor = PolybarSupervisor(command=("false",))
+    with FakeIPCServer(ipc_dir):
+        method, _ = supervisor.reload()
+    assert method == "ipc"
+    assert supervisor.processes == {}
+
+def test_reload_restarts_without_socket(ipc_dir, tmp_path):
+    # Un 'sleep' con nombre propio: stop() busca los procesos por nombre y no debe tocar otros
+    command = tmp_path / "fakebar"
+    shutil.copy(shutil.which("sleep"), command)
+    supervisor = PolybarSupervisor(command=(str(command), "60"))
+    try:
+        method, _ = supervisor.reload()
+        assert method == "restart"
+        assert supervisor.running_pids() == list(supervisor.processes)
+        assert len(supervisor.processes) == 1
+    finally:
+        supervisor.stop()
+    assert supervisor.running_pids() == []
@@ -0,0 +1,60 @@
+import os
+import fcntl
+import shlex
+import subprocess
+import threading
+
+from script_cache import convert_exec_lines, fifo_path, lock_path
+
+MODULE = """[module/updates]
+type = custom/script
+exec = echo directo
+interval = 60
+"""
+
+def exec_line(text):
+    return next(line.split("=", 1)[1].strip() for line in text.splitlines() if line.startswith("exec"))
+
+def run(command):
+    return subprocess.run(["sh", "-c", command], capture_output=True, text=True, timeout=5).stdout
+
+def test_convert_registers_command(tmp_path):
+    text, entries = convert_exec_lines(MODULE, {}, str(tmp_path))
+    assert entries == {"updates": {"command": "echo directo", "ttl": 60.0}}
+    assert "tail = true" in text.splitlines()
+    assert convert_exec_lines(text, entries, str(tmp_path)) == (text, {})
+
+def test_stale_fifo_falls_back_to_command(tmp_path):
+    text, _ = convert_exec_lines(MODULE, {}, str(tmp_path))
+    # FIFO de un servicio que murió sin limpiar: sin el flock, cat se quedaría bloqueado
+    os.mkfifo(fifo_path("updates", str(tmp_path)))
+    assert run(exec_line(text)) == "directo\n"
+
+def test_running_service_is_read_from_fifo(tmp_path):
+    text, _ = convert_exec_lines(MODULE, {}, str(tmp_path))
+    fifo = fifo_path("updates", str(tmp_path))
+    os.mkfifo(fifo)
+    fd = os.open(lock_path(str(tmp_path)), os.O_RDWR | os.O_CREAT, 0o600)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def feed():
+        with open(fifo, 'w') as f:
+            f.write("en caché\n")
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        assert run(exec_line(text)) == "en caché\n"
+    finally:
+        writer.join(5)
+        os.close(fd)
+
+def test_legacy_line_is_updated(tmp_path):
+    fifo = shlex.quote(fifo_path("updates", str(tmp_path)))
+    legacy = MODULE.replace("exec = echo directo", f"exec = cat {fifo} 2>/dev/null || sh -c 'echo directo'")
+    legacy = legacy.replace("interval = 60", "tail = true")
+    text, entries = convert_exec_lines(legacy, {}, str(tmp_path))
+    assert not entries
+    assert exec_line(text).startswith("! flock -n ")
+    os.mkfifo(fifo_path("updates", str(tmp_path)))
+    assert run(exec_line(text)) == "directo\n"
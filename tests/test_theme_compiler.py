@@ -0,0 +1,38 @@
+import os
+
+from theme_compiler import compile_theme
+
+CONFIG = """[bar/main]
+height = 30
+include-file = ~/missing/bars.ini
+include-file = colors.ini
+"""
+
+def write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+def test_missing_include_is_kept_with_warning(tmp_path):
+    theme = tmp_path / "theme"
+    theme.mkdir()
+    write(theme / "config.ini", CONFIG)
+    write(theme / "colors.ini", "[color]\nbackground = #222\n")
+    cache = str(tmp_path / "compiled")
+
+    result = compile_theme(str(theme), cache)
+    text = read(result["path"])
+    assert text.startswith("include-file = ~/missing/bars.ini\n")
+    assert "background = #222" in text
+    assert len(result["warnings"]) == 1 and "~/missing/bars.ini" in result["warnings"][0]
+    assert compile_theme(str(theme), cache)["cached"]
+
+    # Si el archivo aparece (aquí, en el directorio del tema) se vuelve a compilar
+    write(theme / "bars.ini", "[bar/extra]\nheight = 9\n")
+    result = compile_theme(str(theme), cache)
+    assert not result["cached"] and not result["warnings"]
+    assert "include-file" not in read(result["path"])
+    assert os.path.exists(result["path"])
@@ -0,0 +1,51 @@
+import os
+import stat
+import tarfile
+import zipfile
+
+import pytest
+
+from theme_import import fork_theme, import_tree
+
+def write(path, text, mode=0o644):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+    os.chmod(path, mode)
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+@pytest.fixture
+def theme(tmp_path):
+    path = tmp_path / "blocks"
+    write(path / "config.ini", "[bar/main]\nheight = 30\n")
+    write(path / "launch.sh", "#!/bin/sh\npolybar main\n", 0o755)
+    write(path / "components" / "scripts" / "powermenu.sh", "#!/bin/sh\n", 0o700)
+    return path
+
+def check_modes(path):
+    assert mode(path / "config.ini") == 0o644
+    assert mode(path / "launch.sh") == 0o755
+    assert mode(path / "components" / "scripts" / "powermenu.sh") == 0o700
+
+def test_fork_keeps_modes(theme, tmp_path):
+    result = fork_theme(str(theme), str(tmp_path / "user" / "blocks"))
+    check_modes(tmp_path / "user" / "blocks")
+    assert result["files"] == 3
+
+def test_tar_import_keeps_modes(theme, tmp_path):
+    archive = tmp_path / "blocks.tar.gz"
+    with tarfile.open(archive, 'w:gz') as tar:
+        tar.add(theme, arcname="blocks")
+    import_tree(str(archive), str(tmp_path / "user" / "blocks"))
+    check_modes(tmp_path / "user" / "blocks")
+
+def test_zip_import_keeps_modes(theme, tmp_path):
+    archive = tmp_path / "blocks.zip"
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for rel in ("config.ini", "launch.sh", "components/scripts/powermenu.sh"):
+            zf.write(theme / rel, rel)
+    # Con el tema de origen como base, lo idéntico se clona desde él y debe tomar el modo del zip
+    import_tree(str(archive), str(tmp_path / "user" / "blocks"), base_dirs=(str(theme),))
+    check_modes(tmp_path / "user" / "blocks")